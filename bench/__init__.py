@@ -0,0 +1,5 @@
+"""Synthetic data and repeatable benchmarks for the Cloud K ERP.
+
+See :mod:`bench.generate` for the dataset and :mod:`bench.run` for the
+benchmark runner (``python -m bench.run --help``).
+"""
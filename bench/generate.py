@@ -0,0 +1,119 @@
+"""Seeded synthetic data in the shape the app stores.
+
+:func:`generate` fills a storage handle with outlets, platforms, stock
+items and purchase lots, recipes, and years of daily sales and expenses.
+The same :class:`Scale` and seed always produce the same rows, so
+benchmark runs against a generated database are comparable.
+"""
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from erp.pricing import grand_total
+from erp.storage import DEFAULT_OUTLETS
+
+UNITS = ["kg", "ltr", "gm", "ml", "pcs", "box"]
+PLATFORMS = {"Direct": (0.0, 0.0), "Zomato": (22.0, 30.0), "Swiggy": (20.0, 25.0)}
+EXPENSE_CATEGORIES = ["Rent", "Salary", "Electricity", "Marketing", "Misc"]
+LOTS_PER_ITEM = 4
+CHUNK_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Size of a generated dataset."""
+
+    outlets: int = 7
+    recipes: int = 40
+    items: int = 60
+    years: int = 2
+    sales_per_day: int = 40        # per outlet
+    expenses_per_month: int = 12   # per outlet
+    seed: int = 0
+
+    def label(self):
+        return "-".join(f"{k}{v}" for k, v in asdict(self).items())
+
+
+def outlet_names(n):
+    return DEFAULT_OUTLETS[:n] + [f"Outlet {i}" for i in range(len(DEFAULT_OUTLETS) + 1, n + 1)]
+
+
+def _insert(db, table, frame):
+    for start in range(0, len(frame), CHUNK_ROWS):
+        db.insert(table, frame.iloc[start:start + CHUNK_ROWS])
+
+
+def generate(db, scale=Scale()):
+    """Write a ``scale``-sized dataset into ``db``; returns the recipes."""
+    rng = np.random.default_rng(scale.seed)
+    outlets = outlet_names(scale.outlets)
+    for name in outlets:
+        if name not in db.outlets():
+            db.add_outlet(name)
+        for platform, (comm, fee) in PLATFORMS.items():
+            db.set_platform(name, platform, comm, fee)
+
+    # Stock: a few lots per item per outlet, sized to cover the generated sales
+    items = [f"Item {i:03d}" for i in range(1, scale.items + 1)]
+    units = rng.choice(UNITS, len(items))
+    unit_costs = rng.uniform(0.5, 50.0, len(items))
+    recipes = {}
+    for d in range(1, scale.recipes + 1):
+        used = rng.choice(len(items), size=min(len(items), rng.integers(2, 7)), replace=False)
+        recipes[f"Dish {d:03d}"] = {items[i]: float(round(rng.uniform(0.05, 2.0), 2)) for i in used}
+    for dish, recipe in recipes.items():
+        db.save_recipe(dish, recipe, sum(qty * unit_costs[items.index(item)] for item, qty in recipe.items()))
+
+    n_lots = len(outlets) * len(items) * LOTS_PER_ITEM
+    lot_qty = rng.uniform(0.5, 1.5, n_lots) * scale.years * 365 * scale.sales_per_day
+    lot_item = np.tile(np.repeat(np.arange(len(items)), LOTS_PER_ITEM), len(outlets))
+    _insert(db, "inventory", pd.DataFrame({
+        "id": [f"g-i{i}" for i in range(n_lots)],
+        "Outlet": np.repeat(outlets, len(items) * LOTS_PER_ITEM),
+        "Item": np.asarray(items, dtype=object)[lot_item],
+        "Qty": lot_qty,
+        "Unit": units[lot_item],
+        "Total_Cost": lot_qty * unit_costs[lot_item] * rng.uniform(0.9, 1.1, n_lots),
+    }))
+
+    # Sales: standard-costed lines spread uniformly over the period
+    start = pd.Timestamp("2024-01-01")
+    days = scale.years * 365
+    n_sales = len(outlets) * days * scale.sales_per_day
+    dish_names = list(recipes)
+    dish_cost = np.array([sum(q * unit_costs[items.index(i)] for i, q in recipes[d].items()) for d in dish_names])
+    dish = rng.integers(0, len(dish_names), n_sales)
+    platform = rng.integers(0, len(PLATFORMS), n_sales)
+    comm, fee = (np.array([v[k] for v in PLATFORMS.values()]) for k in (0, 1))
+    qty = rng.integers(1, 4, n_sales).astype(float)
+    revenue = grand_total(dish_cost[dish]) * qty
+    ing_cost = dish_cost[dish] * qty
+    comm_paid = revenue * comm[platform] / 100
+    del_cost = fee[platform]
+    _insert(db, "sales", pd.DataFrame({
+        "id": [f"g-s{i}" for i in range(n_sales)],
+        "Date": start + pd.to_timedelta(
+            np.sort(rng.integers(0, days, (len(outlets), n_sales // len(outlets))), axis=1).ravel(), unit="D"),
+        "Outlet": np.repeat(outlets, days * scale.sales_per_day),
+        "Dish": np.asarray(dish_names, dtype=object)[dish],
+        "Platform": np.asarray(list(PLATFORMS), dtype=object)[platform],
+        "Qty": qty,
+        "Revenue": revenue,
+        "Comm_Paid": comm_paid,
+        "Del_Cost": del_cost,
+        "Ing_Cost": ing_cost,
+        "Net_Profit": revenue - ing_cost - comm_paid - del_cost,
+    }))
+
+    n_exp = len(outlets) * scale.years * 12 * scale.expenses_per_month
+    _insert(db, "expenses", pd.DataFrame({
+        "id": [f"g-e{i}" for i in range(n_exp)],
+        "Date": start + pd.to_timedelta(rng.integers(0, days, n_exp), unit="D"),
+        "Outlet": np.repeat(outlets, n_exp // len(outlets)),
+        "Category": rng.choice(EXPENSE_CATEGORIES, n_exp),
+        "Amount": rng.uniform(100, 20_000, n_exp).round(2),
+        "Notes": "",
+    }))
+    return recipes
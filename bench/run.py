@@ -0,0 +1,300 @@
+"""Timing and memory benchmarks for the ERP operations and pages.
+
+    python -m bench.run [--outlets 7 --recipes 40 --items 60 --years 2 ...]
+                        [--out results.json] [--compare baseline.json]
+
+A database is generated once per :class:`~bench.generate.Scale` (and
+reused from ``--cache-dir``), so every run measures the same rows. Each
+benchmark is timed ``--repeat`` times and reports the median and best
+wall time. One extra run under :mod:`tracemalloc` gives its peak Python
+allocation. ``--compare`` prints the ratio against an earlier results
+file and flags anything slower than ``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from bench.generate import Scale, generate, outlet_names
+from erp import core
+from erp.costing import stock_prices
+from erp.orders import ingredient_demand
+from erp.pricing import price_table
+from erp.settlement import settle
+from erp.storage import CachedStorage, SQLiteStorage
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+PAGES = ["Dashboard", "Sale Entry", "Bulk Import", "Misc Expenses", "Stock Room",
+         "Recipe Master", "Menu & Pricing", "Outlet & Platform Settings",
+         "Backup & History"]
+
+# Run in a fresh interpreter: the first render of ``page``, app imports included
+_COLD_RENDER = """
+import sys, time, tracemalloc
+from streamlit.testing.v1 import AppTest
+app, page, traced = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+at = AppTest.from_file(app, default_timeout=600)
+at.session_state["page"] = page
+if traced:
+    tracemalloc.start()
+start = time.perf_counter()
+at.run()
+print(time.perf_counter() - start, tracemalloc.get_traced_memory()[1] if traced else 0)
+if at.exception:
+    sys.exit(at.exception[0].value)
+"""
+
+
+def prepare(scale, cache_dir):
+    """Path of a database holding the ``scale`` dataset, generating it if needed."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"bench-{scale.label()}.db")
+    if not os.path.exists(path):
+        partial = path + ".partial"
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(partial + suffix):
+                os.remove(partial + suffix)
+        backend = SQLiteStorage(partial, snapshot_every=0)
+        try:
+            generate(CachedStorage(backend), scale)
+        finally:
+            backend.close()
+        shutil.move(partial, path)
+    return path
+
+
+def _working_copy(path):
+    """Scratch copy of the generated database for benchmarks that write."""
+    fd, copy = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    shutil.copyfile(path, copy)
+    return copy
+
+
+def _measure(fn, setup, repeat, teardown=None):
+    """Median/best seconds over ``repeat`` runs, plus one traced run's peak KiB.
+
+    ``teardown`` (untimed) gets each state ``setup`` built once ``fn`` is done with it.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        try:
+            start = time.perf_counter()
+            fn(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            if teardown is not None:
+                teardown(state)
+    state = setup()
+    tracemalloc.start()
+    try:
+        fn(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        if teardown is not None:
+            teardown(state)
+    return {"median_s": statistics.median(times), "best_s": min(times), "repeat": repeat,
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def operation_benchmarks(path, scale):
+    """``name -> (setup, fn)``, plus the warm storage (on a scratch copy) for the caller to close.
+
+    ``setup`` builds the state ``fn`` is timed on: a fresh storage for the
+    cold benchmarks, the warmed-up one otherwise.
+    """
+    outlet = outlet_names(scale.outlets)[0]
+    work = _working_copy(path)
+    shared = CachedStorage(SQLiteStorage(work, snapshot_every=0))
+    recipes = shared.recipes()
+    order = [(dish, 2, "Zomato") for dish in list(recipes)[:5]]
+    demand = ingredient_demand(pd.DataFrame(order, columns=["Dish", "Qty", "Platform"]), recipes).to_dict()
+    # Warm every cache the "warm" benchmarks rely on
+    shared.period_totals(outlet, "month")
+    shared.outlet_totals("month")
+    shared.dish_costs(outlet)
+    shared.stock_forecast(outlet)
+    # The last three months on record, as the date-range pickers' default
+    end = shared.query("sales", outlet=outlet)["Date"].max()
+    start = end.replace(day=1) - pd.DateOffset(months=2)
+
+    def cold():
+        return CachedStorage(SQLiteStorage(path, snapshot_every=0))
+
+    def warm():
+        return shared
+
+    def menu_table(db):
+        return price_table(recipes, db.dish_costs(outlet), db.dish_pricing(outlet))
+
+    return {
+        "dashboard_cold": (cold, lambda db: db.period_totals(outlet, "month")),
+        "dashboard_warm": (warm, lambda db: db.period_totals(outlet, "month")),
+        "dashboard_all_outlets_cold": (cold, lambda db: db.outlet_totals("month")),
+        "dashboard_all_outlets_warm": (warm, lambda db: db.outlet_totals("month")),
+        "dashboard_3_months_cold": (cold, lambda db: db.period_totals(outlet, "month", start, end)),
+        "dashboard_all_outlets_3_months_cold": (cold, lambda db: db.outlet_totals("month", start=start, end=end)),
+        "sales_log_3_months_cold": (cold, lambda db: db.page("sales", outlet, "Date", True, 0, 25, start, end)),
+        "sales_log_all_cold": (cold, lambda db: db.page("sales", outlet, "Date", True, 0, 25)),
+        "sale_stock_check": (warm, lambda db: db.consume_stock(outlet, demand, dry_run=True)),
+        "sale_record_order": (warm, lambda db: core.record_order(db, outlet, pd.Timestamp("2025-06-01"), order)),
+        "settle_outlet_history": (warm, lambda db: settle(db.query("sales", outlet=outlet),
+                                                           db.rate_schedule([outlet]))),
+        "stock_forecast_cold": (cold, lambda db: db.stock_forecast(outlet)),
+        "stock_forecast_warm": (warm, lambda db: db.stock_forecast(outlet)),
+        "recipe_stock_lookup": (warm, lambda db: stock_prices(db.query("inventory", outlet=outlet))),
+        "menu_pricing_table_cold": (cold, menu_table),
+        "menu_pricing_table_warm": (warm, menu_table),
+    }, shared
+
+
+def _slug(page):
+    return "page_" + page.lower().replace(" & ", "_").replace(" ", "_")
+
+
+def page_benchmarks(path, pages, repeat):
+    """Headless renders of each page through Streamlit's AppTest.
+
+    ``page_<name>`` is the first render after navigating to the page;
+    ``page_<name>_rerun`` is the next rerun of the same session, which is
+    what a user waits for on every widget interaction.
+    ``page_<name>_cold`` opens the app on that page in a new process, so it
+    also pays for every module the page imports.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["CLOUDK_DB"] = path
+    results = {}
+    for page in pages:
+        def navigated(page=page):
+            at = AppTest.from_file(APP, default_timeout=600)
+            at.run()
+            at.sidebar.radio[0].set_value(page)
+            return at
+
+        def rendered():
+            return render(navigated())
+
+        def render(at):
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            return at
+
+        results[_slug(page)] = _measure(render, navigated, repeat)
+        results[_slug(page) + "_rerun"] = _measure(render, rendered, repeat)
+        results[_slug(page) + "_cold"] = _measure_cold(page, repeat)
+    return results
+
+
+def _measure_cold(page, repeat):
+    """Like :func:`_measure`, for ``page``'s first render in a new interpreter."""
+    def run(traced):
+        done = subprocess.run([sys.executable, "-c", _COLD_RENDER, APP, page, "1" if traced else "0"],
+                              cwd=os.path.dirname(APP), capture_output=True, text=True)
+        if done.returncode:
+            raise RuntimeError(done.stderr.strip().splitlines()[-1])
+        seconds, peak = done.stdout.split()[-2:]
+        return float(seconds), int(peak)
+
+    times = [run(False)[0] for _ in range(repeat)]
+    return {"median_s": statistics.median(times), "best_s": min(times), "repeat": repeat,
+            "peak_kib": round(run(True)[1] / 1024, 1)}
+
+
+def compare(results, baseline, threshold):
+    """Lines comparing ``results`` to ``baseline``; also returns the regressed names."""
+    lines, regressed = [], []
+    for name, new in results["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if old is None:
+            lines.append(f"{name:40s} {new['median_s'] * 1000:10.2f} ms   (new)")
+            continue
+        ratio = new["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressed.append(name)
+        lines.append(f"{name:40s} {new['median_s'] * 1000:10.2f} ms  x{ratio:5.2f}  "
+                     f"peak {new['peak_kib']:>10.1f} KiB (was {old['peak_kib']:.1f}){flag}")
+    if baseline.get("scale") != results["scale"]:
+        lines.insert(0, "warning: baseline was run at a different scale")
+    return lines, regressed
+
+
+def main(argv=None):
+    defaults = Scale()
+    parser = argparse.ArgumentParser(description="Cloud K ERP benchmarks")
+    for field in ("outlets", "recipes", "items", "years", "sales_per_day", "expenses_per_month", "seed"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(defaults, field))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only benchmarks whose name contains one of these")
+    parser.add_argument("--no-pages", action="store_true", help="skip the AppTest page renders")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "cloudk-bench"))
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio flagged as a regression")
+    args = parser.parse_args(argv)
+
+    scale = Scale(args.outlets, args.recipes, args.items, args.years, args.sales_per_day,
+                  args.expenses_per_month, args.seed)
+    start = time.perf_counter()
+    path = prepare(scale, args.cache_dir)
+    print(f"dataset {scale.label()} ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    def wanted(name):
+        return not args.only or any(part in name for part in args.only)
+
+    benchmarks = {}
+    operations, shared = operation_benchmarks(path, scale)
+    work = shared.backend.path
+
+    def release(db):
+        if db is not shared:  # a cold storage opened for this round
+            db.backend.close()
+
+    try:
+        for name, (setup, fn) in operations.items():
+            if wanted(name):
+                benchmarks[name] = _measure(fn, setup, args.repeat, release)
+                print(f"{name:40s} {benchmarks[name]['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+    finally:
+        shared.backend.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(work + suffix):
+                os.remove(work + suffix)
+    if not args.no_pages:
+        pages = [p for p in PAGES if wanted(_slug(p))]
+        benchmarks.update(page_benchmarks(path, pages, args.repeat))
+
+    results = {
+        "scale": scale.__dict__,
+        "environment": {"python": platform.python_version(), "pandas": pd.__version__,
+                        "machine": platform.machine(), "platform": platform.platform()},
+        "benchmarks": benchmarks,
+    }
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            lines, regressed = compare(results, json.load(fh), args.threshold)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+    for name, result in benchmarks.items():
+        print(f"{name:40s} {result['median_s'] * 1000:10.2f} ms  peak {result['peak_kib']:>10.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Cloud K ERP core: storage and business logic behind the Streamlit app."""
@@ -0,0 +1,122 @@
+"""Local HTTP/JSON service for pushing POS events without the UI.
+
+Run next to the Streamlit app, against the same database::
+
+    python -m erp.api --port 8600 --db cloudk.db
+
+Endpoints:
+
+``GET /health``
+    ``{"status": "ok"}``
+``GET /outlets``
+    ``{"outlets": [...]}``
+``POST /events``
+    Body ``{"events": [...]}`` (see :func:`erp.core.apply_events`). The
+    whole batch is written in one transaction; the reply is the per-type
+    row counts, or ``400`` with ``{"errors": [...]}`` and nothing written
+    (``500`` with the same shape if the batch fails unexpectedly).
+
+Batches for different outlets run concurrently (see
+:class:`~erp.storage.CachedStorage` locking); the Streamlit process notices
+them through the database's data version on its next rerun.
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from erp.core import BatchError, apply_events
+from erp.storage import open_storage
+
+MAX_EVENTS = 10_000
+MAX_BODY = 16 * 1024 * 1024
+
+log = logging.getLogger("cloudk.api")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "CloudK/1"
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        elif self.path == "/outlets":
+            self._reply(200, {"outlets": self.server.db.outlets()})
+        else:
+            self._reply(404, {"errors": [f"Unknown path {self.path}"]})
+
+    def do_POST(self):
+        if self.path != "/events":
+            self._reply(404, {"errors": [f"Unknown path {self.path}"]})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400, {"errors": ["Content-Length must be a whole number of bytes"]})
+            return
+        if length > MAX_BODY:
+            self._reply(413, {"errors": [f"Body larger than {MAX_BODY} bytes"]})
+            return
+        try:
+            events = json.loads(self.rfile.read(length) or b"{}").get("events")
+        except (ValueError, AttributeError):
+            self._reply(400, {"errors": ["Body must be a JSON object with an 'events' list"]})
+            return
+        if not isinstance(events, list):
+            self._reply(400, {"errors": ["Body must be a JSON object with an 'events' list"]})
+            return
+        if len(events) > MAX_EVENTS:
+            self._reply(413, {"errors": [f"At most {MAX_EVENTS} events per batch"]})
+            return
+        try:
+            summary = apply_events(self.server.db, events)
+        except BatchError as exc:
+            self._reply(400, {"errors": exc.problems})
+        except Exception as exc:  # the client always gets a JSON reply, never a dropped connection
+            log.exception("Batch of %d event(s) failed", len(events))
+            self._reply(500, {"errors": [f"Internal error: {type(exc).__name__}: {exc}"]})
+        else:
+            self._reply(200, summary)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(db, host="127.0.0.1", port=8600, quiet=False):
+    """HTTP server bound to ``host:port`` that writes into ``db``."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.db = db
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cloud K ERP event ingestion API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--db", default=None, help="SQLite file (defaults to CLOUDK_DB or cloudk.db)")
+    parser.add_argument("--quiet", action="store_true", help="don't log every request")
+    args = parser.parse_args(argv)
+    server = make_server(open_storage(args.db), args.host, args.port, args.quiet)
+    print(f"Cloud K API listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Headless ERP operations.
+
+Every change the pages make to the books goes through these functions, so
+they can be called from scripts, the JSON API (:mod:`erp.api`) or a Python
+shell without a Streamlit rerun driving them. All of them take the storage
+handle returned by :func:`erp.storage.open_storage` as their first argument.
+
+:func:`apply_events` is the batch entry point: a list of sale, expense and
+stock events is validated up front and then written in one transaction.
+"""
+import math
+import os
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from erp.importer import import_report
+from erp.inventory import InsufficientStock
+from erp.orders import SaleError, cost_lines, listed, new_ids, record_order, record_sales
+from erp.pricing import INPUTS
+from erp.schema import SchemaError
+from erp.settlement import resettle
+
+__all__ = [
+    "BatchError", "OutletError", "RecipeError", "EVENT_FIELDS", "EVENT_REQUIRED",
+    "add_outlet", "rename_outlet", "delete_outlet", "rename_dish", "set_dish_pricing",
+    "set_platform", "delete_platform", "set_platform_rate", "delete_platform_rate", "resettle",
+    "record_expense", "add_stock", "record_order", "import_report", "apply_events",
+    "import_backup",
+]
+
+# Event type -> {JSON field: table column}
+EVENT_FIELDS = {
+    "stock": {"outlet": "Outlet", "item": "Item", "qty": "Qty", "unit": "Unit", "total_cost": "Total_Cost"},
+    "sale": {"outlet": "Outlet", "date": "Date", "dish": "Dish", "qty": "Qty", "platform": "Platform",
+             "revenue": "Revenue"},
+    "expense": {"outlet": "Outlet", "date": "Date", "category": "Category", "amount": "Amount", "notes": "Notes"},
+}
+# Event type -> fields every event of that type must carry
+EVENT_REQUIRED = {
+    "stock": ["outlet", "item", "qty"],
+    "sale": ["outlet", "date", "dish", "qty"],
+    "expense": ["outlet", "date", "amount"],
+}
+NUMERIC_FIELDS = {"qty", "total_cost", "revenue", "amount"}
+
+
+class OutletError(ValueError):
+    """Raised when an outlet (or one of its platforms) cannot be added, changed or deleted."""
+
+
+class RecipeError(ValueError):
+    """Raised when a dish cannot be renamed or priced."""
+
+
+class BatchError(SaleError):
+    """Raised when a batch of events is rejected; nothing from it was written."""
+
+
+# --- outlets ---
+def add_outlet(db, name):
+    """Add an outlet, or bring back an archived one of the same name together with its rows."""
+    name = (name or "").strip()
+    if not name or name in db.outlets():
+        raise OutletError("Invalid name or outlet already exists.")
+    db.add_outlet(name)
+
+
+def rename_outlet(db, old, new):
+    """Rename an outlet; its stock, sale, expense and platform rows follow it."""
+    new = (new or "").strip()
+    if not new or new in db.outlets():
+        raise OutletError("Invalid name or outlet already exists.")
+    if new in db.archived_outlets():
+        raise OutletError(f"'{new}' is an archived outlet; restore it or pick another name.")
+    db.rename_outlet(old, new)
+
+
+def delete_outlet(db, name, purge=False):
+    """Archive an outlet (its rows are kept and it can be restored), or ``purge`` it with all its rows."""
+    if len(db.outlets()) <= 1:
+        raise OutletError("You must have at least one outlet.")
+    db.delete_outlet(name, purge)
+
+
+# --- dishes ---
+def rename_dish(db, old, new):
+    """Rename a dish in the recipe book, menu prices and every recorded sale."""
+    new = (new or "").strip()
+    if not new or new in db.dishes():
+        raise RecipeError("Invalid name, or a dish with that name already exists or has sales on record.")
+    db.rename_dish(old, new)
+
+
+def set_dish_pricing(db, outlet, inputs):
+    """Save ``outlet``'s per-unit commission, advertising and misc costs of each dish.
+
+    ``inputs`` is indexed by dish with :data:`~erp.pricing.INPUTS` columns
+    (blanks count as 0). They are added to the production cost in the menu
+    grand total, which Sale Entry and imports price new sales at.
+    """
+    values = inputs[INPUTS].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    unknown = set(values.index) - set(db.recipes())
+    if unknown:
+        raise RecipeError(f"No recipe for dish(es): {listed(unknown)}")
+    if (values < 0).any(axis=None):
+        raise RecipeError(f"Costs cannot be negative: {listed(values.index[(values < 0).any(axis=1)])}")
+    db.set_dish_pricing(outlet, values)
+
+
+# --- platforms ---
+def set_platform(db, outlet, platform, comm, delivery):
+    """Link ``platform`` to ``outlet`` (or change its base rates) and re-price its recorded sales.
+
+    Returns the number of sale rows whose settlement changed.
+    """
+    platform = (platform or "").strip()
+    if not platform:
+        raise OutletError("Please enter a platform name.")
+    with db.outlet_lock(outlet), db.transaction():
+        db.set_platform(outlet, platform, comm, delivery)
+        return resettle(db, outlet, platform)
+
+
+def delete_platform(db, outlet, platform):
+    """Unlink a platform; sales already recorded through it keep their settlement."""
+    db.delete_platform(outlet, platform)
+
+
+def set_platform_rate(db, outlet, platform, effective, comm, delivery):
+    """Change a linked platform's rates from ``effective`` on, re-pricing sales since then.
+
+    ``effective`` may be in the past; returns the number of sale rows whose
+    settlement changed.
+    """
+    if platform not in db.platforms(outlet):
+        raise OutletError(f"{platform!r} is not linked to {outlet}.")
+    effective = pd.Timestamp(effective).normalize()
+    with db.outlet_lock(outlet), db.transaction():
+        db.set_platform_rate(outlet, platform, effective, comm, delivery)
+        return resettle(db, outlet, platform, since=effective)
+
+
+def delete_platform_rate(db, outlet, platform, effective):
+    """Drop a dated rate change; sales since then fall back to the previous rate."""
+    effective = pd.Timestamp(effective).normalize()
+    with db.outlet_lock(outlet), db.transaction():
+        db.delete_platform_rate(outlet, platform, effective)
+        return resettle(db, outlet, platform, since=effective)
+
+
+# --- ledgers ---
+def record_expense(db, outlet, date, category, amount, notes=""):
+    db.insert("expenses", {
+        "id": new_ids(1)[0], "Date": pd.Timestamp(date), "Outlet": outlet,
+        "Category": category, "Amount": amount, "Notes": notes,
+    })
+
+
+def add_stock(db, outlet, item, qty, unit, total_cost):
+    """Add one purchase lot to an outlet's stock."""
+    if not item:
+        raise SchemaError("Please enter an item name.")
+    db.insert("inventory", {
+        "id": new_ids(1)[0], "Outlet": outlet, "Item": item,
+        "Qty": qty, "Unit": unit, "Total_Cost": total_cost,
+    })
+
+
+# --- batches ---
+def _field_problem(field, value):
+    """Why ``value`` does not fit event field ``field`` (``None`` if it does)."""
+    if field in NUMERIC_FIELDS:
+        number = value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+        if isinstance(value, str):
+            number = pd.to_numeric(value, errors="coerce")
+        return None if number is not None and math.isfinite(number) else f"{field} must be a number"
+    if not isinstance(value, str):
+        return f"{field} must be text"
+    if field == "date" and pd.isna(pd.to_datetime(value, errors="coerce")):
+        return "date must be a readable date"
+    return None
+
+
+def _split_events(events, outlets):
+    """Group raw event dicts by type as column-named rows; collect every problem.
+
+    Besides the type, fields and outlet, each event's required fields
+    (:data:`EVENT_REQUIRED`) and value types are checked here, so a bad
+    event is reported by number instead of failing the batch later.
+    """
+    rows = {kind: [] for kind in EVENT_FIELDS}
+    problems = []
+    for number, event in enumerate(events, start=1):
+        if not isinstance(event, dict):
+            problems.append(f"Event {number}: expected an object")
+            continue
+        kind = event.get("type")
+        fields = EVENT_FIELDS.get(kind)
+        if fields is None:
+            problems.append(f"Event {number}: unknown type {kind!r}")
+            continue
+        unknown = set(event) - set(fields) - {"type"}
+        if unknown:
+            problems.append(f"Event {number}: unknown field(s) {listed(unknown)}")
+            continue
+        missing = [f for f in EVENT_REQUIRED[kind] if event.get(f) is None or event.get(f) == ""]
+        if missing:
+            problems.append(f"Event {number}: missing field(s) {listed(missing)}")
+            continue
+        bad = [p for f, v in event.items() if f in fields and v is not None and (p := _field_problem(f, v))]
+        if bad:
+            problems.append(f"Event {number}: {'; '.join(bad)}")
+        elif event["outlet"] not in outlets:
+            problems.append(f"Event {number}: unknown outlet {event['outlet']!r}")
+        else:
+            rows[kind].append({fields[k]: v for k, v in event.items() if k in fields})
+    return rows, problems
+
+
+def _sale_lines(rows):
+    lines = pd.DataFrame(rows)
+    lines["Qty"] = pd.to_numeric(lines["Qty"], errors="coerce")
+    if not (lines["Qty"] > 0).all():
+        raise SaleError(["Sale quantities must be positive numbers"])
+    lines["Date"] = pd.to_datetime(lines["Date"], errors="coerce")
+    if lines["Date"].isna().any():
+        raise SaleError(["Sale dates must be readable dates"])
+    if "Platform" not in lines:
+        lines["Platform"] = "Direct"
+    lines["Platform"] = lines["Platform"].fillna("Direct").astype(str)
+    lines["Dish"] = lines["Dish"].astype(str)
+    if "Revenue" in lines:
+        lines["Revenue"] = pd.to_numeric(lines["Revenue"], errors="coerce")
+    return lines
+
+
+def apply_events(db, events):
+    """Write a batch of sale, expense and stock events, all or nothing.
+
+    Each event is a dict with a ``type`` (``"sale"``, ``"expense"`` or
+    ``"stock"``) and the fields listed in :data:`EVENT_FIELDS`. Stock lots
+    are added first, then sales are costed and deducted FIFO with one stock
+    check per outlet, then expenses are recorded. Raises :class:`BatchError`
+    listing every problem; returns the number of rows written per type and
+    the sales revenue.
+    """
+    rows, problems = _split_events(events, set(db.outlets()))
+    if problems:
+        raise BatchError(problems)
+    summary = {kind: len(kind_rows) for kind, kind_rows in rows.items()}
+    summary["revenue"] = 0.0
+    outlets = {row["Outlet"] for kind_rows in rows.values() for row in kind_rows}
+    try:
+        with db.outlet_locks(outlets), db.transaction():
+            if rows["stock"]:
+                db.insert("inventory", pd.DataFrame(rows["stock"]).assign(id=new_ids(len(rows["stock"]))))
+            if rows["sale"]:
+                recipes = db.recipes()
+                lines = _sale_lines(rows["sale"])
+                for outlet, outlet_lines in lines.groupby("Outlet", sort=False):
+                    costed = cost_lines(outlet_lines.drop(columns="Outlet"), recipes, db.dish_costs(outlet),
+                                        list(db.platforms(outlet)), db.dish_pricing(outlet))
+                    recorded, _ = record_sales(db, outlet, costed, recipes)
+                    summary["revenue"] += float(recorded["Revenue"].sum())
+            if rows["expense"]:
+                db.insert("expenses", pd.DataFrame(rows["expense"]).assign(id=new_ids(len(rows["expense"]))))
+    except InsufficientStock as exc:
+        raise BatchError([str(exc)]) from exc
+    except SaleError as exc:
+        raise BatchError(exc.problems) from exc
+    except SchemaError as exc:
+        raise BatchError([str(exc)]) from exc
+    return summary
+
+
+# --- backups ---
+def import_backup(db, data):
+    """Replace every outlet's data with a backup file's contents (``bytes``).
+
+    The backup is one made by :meth:`~erp.storage.Storage.export_database`;
+    the replacement is journaled, so it can be undone like any other change.
+    Raises ``ValueError`` if ``data`` is not a readable Cloud K database.
+    """
+    fd, path = tempfile.mkstemp(suffix=".db")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        db.import_database(path)
+    except sqlite3.DatabaseError as exc:
+        raise ValueError(f"Not a Cloud K backup: {exc}") from exc
+    finally:
+        os.remove(path)
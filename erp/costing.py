@@ -0,0 +1,130 @@
+"""Live recipe costing.
+
+Dish production costs used to be frozen at the moment a recipe was saved.
+:class:`CostingEngine` instead keeps every recipe as a row of a
+dish × ingredient quantity matrix, plus a reverse index from ingredient to
+the dishes that use it. When an outlet's stock prices change, only the
+dishes that use a re-priced ingredient are recomputed, with one
+matrix-vector product.
+"""
+import numpy as np
+import pandas as pd
+
+
+def stock_prices(inventory):
+    """Unit and unit cost of each item in an inventory frame (lots in purchase order).
+
+    The unit cost is the weighted average over the stock on hand; once an
+    item has run out, it is the purchase price of its newest lot.
+    """
+    if len(inventory) == 0:
+        return pd.DataFrame({"Unit": pd.Series(dtype=object), "Unit_Cost": pd.Series(dtype=float)},
+                            index=pd.Index([], name="Item"))
+    priced = inventory.assign(Unit_Cost=inventory["Unit_Cost"].where(inventory["Unit_Cost"] > 0))
+    grouped = priced.groupby("Item", sort=False).agg(Unit=("Unit", "first"), Qty=("Qty", "sum"),
+                                                     Total_Cost=("Total_Cost", "sum"), Last_Cost=("Unit_Cost", "last"))
+    qty = grouped["Qty"].to_numpy(dtype=float)
+    cost = grouped["Total_Cost"].to_numpy(dtype=float)
+    last = grouped["Last_Cost"].fillna(0.0).to_numpy(dtype=float)
+    grouped["Unit_Cost"] = np.divide(cost, qty, out=last.copy(), where=qty > 0)
+    grouped.index = grouped.index.astype(object)  # plain item names, not category codes
+    return grouped[["Unit", "Unit_Cost"]]
+
+
+class CostingEngine:
+    """Per-outlet dish costs derived from recipes and ingredient prices."""
+
+    def __init__(self, recipes=None):
+        self._dishes, self._dish_pos = [], {}
+        self._items, self._item_pos = [], {}
+        self._matrix = np.zeros((0, 0))
+        self._used_by = {}
+        self._prices = {}  # outlet -> unit cost per item column
+        self._costs = {}   # outlet -> cost per dish row
+        for dish, recipe in (recipes or {}).items():
+            self.set_recipe(dish, recipe)
+
+    # --- recipes ---
+    def set_recipe(self, dish, recipe):
+        """Add or replace a dish's recipe; returns the ingredients no earlier recipe used.
+
+        Those start out priced at 0 for every outlet until its prices are
+        set again.
+        """
+        added = [item for item in recipe if item not in self._item_pos]
+        for item in added:
+            self._add_item(item)
+        if dish not in self._dish_pos:
+            self._dish_pos[dish] = len(self._dishes)
+            self._dishes.append(dish)
+            self._matrix = np.vstack([self._matrix, np.zeros((1, len(self._items)))])
+            for outlet in self._costs:
+                self._costs[outlet] = np.append(self._costs[outlet], 0.0)
+        row = self._dish_pos[dish]
+        for col in np.flatnonzero(self._matrix[row]):
+            self._used_by[self._items[col]].discard(dish)
+        self._matrix[row] = 0.0
+        for item, qty in recipe.items():
+            self._matrix[row, self._item_pos[item]] = qty
+            self._used_by[item].add(dish)
+        for outlet, prices in self._prices.items():
+            self._costs[outlet][row] = self._matrix[row] @ prices
+        return added
+
+    def remove_recipe(self, dish):
+        row = self._dish_pos.pop(dish, None)
+        if row is None:
+            return
+        for users in self._used_by.values():
+            users.discard(dish)
+        self._matrix = np.delete(self._matrix, row, axis=0)
+        del self._dishes[row]
+        self._dish_pos = {d: i for i, d in enumerate(self._dishes)}
+        for outlet in self._costs:
+            self._costs[outlet] = np.delete(self._costs[outlet], row)
+
+    def rename_recipe(self, old, new):
+        row = self._dish_pos.pop(old, None)
+        if row is None:
+            return
+        self._dish_pos[new] = row
+        self._dishes[row] = new
+        for users in self._used_by.values():
+            if old in users:
+                users.discard(old)
+                users.add(new)
+
+    def _add_item(self, item):
+        self._item_pos[item] = len(self._items)
+        self._items.append(item)
+        self._used_by[item] = set()
+        self._matrix = np.hstack([self._matrix, np.zeros((len(self._dishes), 1))])
+        for outlet in self._prices:
+            self._prices[outlet] = np.append(self._prices[outlet], 0.0)
+
+    # --- prices ---
+    def set_prices(self, outlet, unit_costs):
+        """Load an outlet's unit cost per item; returns the dishes re-costed."""
+        prices = unit_costs.reindex(self._items, fill_value=0.0).to_numpy(dtype=float)
+        old = self._prices.get(outlet)
+        self._prices[outlet] = prices
+        if old is None:
+            self._costs[outlet] = self._matrix @ prices
+            return list(self._dishes)
+        changed = np.flatnonzero(old != prices)
+        affected = set().union(*(self._used_by[self._items[c]] for c in changed))
+        if affected:
+            rows = np.fromiter((self._dish_pos[d] for d in affected), dtype=int)
+            self._costs[outlet][rows] = self._matrix[rows] @ prices
+        return sorted(affected)
+
+    def forget(self, outlet):
+        self._prices.pop(outlet, None)
+        self._costs.pop(outlet, None)
+
+    def has_prices(self, outlet):
+        return outlet in self._prices
+
+    def dish_costs(self, outlet):
+        """Production cost of every dish at ``outlet`` as a Series."""
+        return pd.Series(self._costs[outlet], index=pd.Index(self._dishes, name="Dish"), dtype=float)
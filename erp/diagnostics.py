@@ -0,0 +1,116 @@
+"""Per-rerun timing and memory instrumentation.
+
+``app.py`` calls :func:`start` with the page name at the top of every rerun
+and :func:`finish` at the bottom (in a ``finally``, so reruns cut short by
+``st.rerun()`` or an exception are recorded too); work in between is wrapped in
+``with section("name"):`` (sections nest, giving ``"outer/inner"`` names).
+Each finished rerun is kept in :data:`RECENT` for the Diagnostics page and
+written as one JSON line to the ``cloudk.perf`` logger. Reruns slower than
+:data:`SLOW_RERUN_S`, or sections slower than :data:`SLOW_SECTION_S`, are
+logged as warnings.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+SLOW_RERUN_S = float(os.environ.get("CLOUDK_SLOW_RERUN_S", 1.0))
+SLOW_SECTION_S = float(os.environ.get("CLOUDK_SLOW_SECTION_S", 0.5))
+HISTORY = 500
+
+log = logging.getLogger("cloudk.perf")
+
+# Most recent finished reruns (all sessions in this process), oldest first
+RECENT = deque(maxlen=HISTORY)
+
+_current = threading.local()  # Streamlit runs each session's script in its own thread
+
+
+class Rerun:
+    """Timings collected during one script run."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.sections = {}  # name -> [seconds, calls]
+        self.stack = []
+
+
+def start(page):
+    _current.rerun = Rerun(page)
+    return _current.rerun
+
+
+@contextmanager
+def section(name):
+    """Time the enclosed block as ``name`` within the current rerun (no-op outside one)."""
+    rerun = getattr(_current, "rerun", None)
+    if rerun is None:
+        yield
+        return
+    rerun.stack.append(name)
+    full = "/".join(rerun.stack)
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun.stack.pop()
+        timing = rerun.sections.setdefault(full, [0.0, 0])
+        timing[0] += time.perf_counter() - began
+        timing[1] += 1
+
+
+def rss_mib():
+    """Resident memory of this process in MiB (``None`` where unsupported)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if os.uname().sysname == "Darwin" else peak / 2**10
+
+
+def finish():
+    """Record and log the current rerun; returns its record (or ``None``)."""
+    rerun = getattr(_current, "rerun", None)
+    if rerun is None:
+        return None
+    _current.rerun = None
+    total = time.perf_counter() - rerun.started
+    slow_sections = [name for name, (seconds, _) in rerun.sections.items() if seconds > SLOW_SECTION_S]
+    rss = rss_mib()
+    record = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "page": rerun.page,
+        "total_ms": round(total * 1000, 2),
+        "sections": {name: {"ms": round(seconds * 1000, 2), "calls": calls}
+                     for name, (seconds, calls) in rerun.sections.items()},
+        "rss_mib": None if rss is None else round(rss, 1),
+        "slow": total > SLOW_RERUN_S or bool(slow_sections),
+    }
+    RECENT.append(record)
+    if record["slow"]:
+        log.warning(json.dumps({"event": "slow_rerun", "slow_sections": slow_sections, **record}))
+    else:
+        log.info(json.dumps({"event": "rerun", **record}))
+    return record
+
+
+def configure_logging(path=None):
+    """Send ``cloudk.perf`` records as JSON lines to ``path`` (or ``CLOUDK_PERF_LOG``), once."""
+    path = path or os.environ.get("CLOUDK_PERF_LOG")
+    if not path or any(getattr(h, "baseFilename", None) == os.path.abspath(path) for h in log.handlers):
+        return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
@@ -0,0 +1,137 @@
+"""Consumption-driven stock forecasting and reorder suggestions.
+
+Ingredient use is never recorded directly: it is the sales of each dish
+times the recipe book. :class:`DishDemand` keeps units sold per dish per
+day and is adjusted row by row as sales are recorded, like a
+:class:`~erp.rollups.PeriodRollup`, so a forecast never rescans history.
+:func:`forecast` then turns the last ``window`` days into a daily
+ingredient burn through a sparse (coordinate-list) dish × ingredient
+product, and derives days of cover, a reorder point with safety stock for
+the supplier lead time, and a suggested purchase for every item.
+"""
+import numpy as np
+import pandas as pd
+
+WINDOW_DAYS = 28      # history the burn rate is averaged over
+LEAD_TIME_DAYS = 2    # days between ordering and receiving stock
+COVER_DAYS = 7        # stock a purchase should last for beyond the lead time
+SERVICE_Z = 1.65      # safety stock in standard deviations (~95% no stock-out)
+
+COLUMNS = ["Item", "Unit", "On_Hand", "Burn_Per_Day", "Days_Of_Cover", "Reorder_Point",
+           "Suggested_Qty", "Est_Cost"]
+
+
+class DishDemand:
+    """Units sold per dish per day."""
+
+    def __init__(self):
+        self._days = {}  # day number (days since epoch) -> {dish: qty}
+
+    def add(self, frame, sign=1):
+        """Fold sale rows in; ``sign=-1`` takes them back out."""
+        if len(frame) == 0:
+            return
+        sums = pd.Series(frame["Qty"].to_numpy(dtype=float) * sign).groupby(
+            [frame["Date"].to_numpy().astype("datetime64[D]").astype(np.int64),
+             frame["Dish"].astype(object).to_numpy()], sort=False,
+        ).sum()
+        for (day, dish), qty in sums.items():
+            dishes = self._days.setdefault(day, {})
+            dishes[dish] = dishes.get(dish, 0.0) + qty
+            if abs(dishes[dish]) < 1e-9:
+                del dishes[dish]
+                if not dishes:
+                    del self._days[day]
+
+    def remove(self, frame):
+        self.add(frame, sign=-1)
+
+    def rename(self, old, new):
+        for dishes in self._days.values():
+            if old in dishes:
+                dishes[new] = dishes.get(new, 0.0) + dishes.pop(old)
+
+    def first_day(self):
+        return min(self._days) if self._days else None
+
+    def last_day(self):
+        return max(self._days) if self._days else None
+
+    def matrix(self, end_day, days, dishes):
+        """``days`` × ``len(dishes)`` units sold, for the days up to and including ``end_day``."""
+        position = {dish: j for j, dish in enumerate(dishes)}
+        out = np.zeros((days, len(dishes)))
+        for i, day in enumerate(range(end_day - days + 1, end_day + 1)):
+            for dish, qty in self._days.get(day, {}).items():
+                j = position.get(dish)
+                if j is not None:
+                    out[i, j] = qty
+        return out
+
+
+def recipe_coo(recipes):
+    """The recipe book as coordinate lists: ``dishes, items, dish_index, item_index, qty``."""
+    dishes = list(recipes)
+    items = sorted({item for recipe in recipes.values() for item in recipe})
+    item_pos = {item: k for k, item in enumerate(items)}
+    entries = [(j, item_pos[item], qty) for j, dish in enumerate(dishes) for item, qty in recipes[dish].items()]
+    dish_index, item_index, qty = (np.array(column) for column in zip(*entries)) if entries else ([], [], [])
+    return (dishes, items, np.asarray(dish_index, dtype=np.int64), np.asarray(item_index, dtype=np.int64),
+            np.asarray(qty, dtype=float))
+
+
+def ingredient_burn(dish_days, dish_index, item_index, qty, n_items):
+    """Days × ingredients usage from days × dishes units sold, touching only non-zero recipe entries."""
+    usage = np.zeros((n_items, len(dish_days)))
+    np.add.at(usage, item_index, (dish_days[:, dish_index] * qty).T)
+    return usage.T
+
+
+def forecast(demand, recipes, stock, as_of=None, window=WINDOW_DAYS, lead_time=LEAD_TIME_DAYS,
+             cover=COVER_DAYS, z=SERVICE_Z):
+    """Burn rate, days of cover, reorder point and purchase suggestion per item.
+
+    ``demand`` is the outlet's :class:`DishDemand`; ``stock`` is indexed by
+    item with ``On_Hand``, ``Unit`` and ``Unit_Cost`` columns. The burn rate
+    is the average daily use over the ``window`` days ending ``as_of``
+    (default: today), or since the first sale if that is more recent; days
+    without sales count as zero use. An item is due for reorder once on hand falls to
+    ``burn × lead_time + safety stock``; the suggestion tops it up to
+    ``cover`` more days than that. Rows are sorted by days of cover.
+    """
+    dishes, items, dish_index, item_index, qty = recipe_coo(recipes)
+    # Up to today, so an outlet that stopped selling is not forecast from its old demand
+    end = int(np.datetime64(pd.Timestamp.today() if as_of is None else pd.Timestamp(as_of), "D").astype(np.int64))
+    first = demand.first_day()
+    if first is None or not items or end < first:
+        daily = np.zeros((1, len(items)))
+    else:
+        # A young outlet is averaged over the days it has traded, not the full window
+        days = min(window, end - first + 1)
+        daily = ingredient_burn(demand.matrix(end, days, dishes), dish_index, item_index, qty, len(items))
+
+    burn = pd.Series(daily.mean(axis=0), index=items)
+    spread = pd.Series(daily.std(axis=0), index=items)
+    # Items in stock that no recipe uses still get a row (with zero burn)
+    names = list(dict.fromkeys(list(stock.index) + [i for i in items if burn[i] > 0]))
+    burn, spread = burn.reindex(names, fill_value=0.0), spread.reindex(names, fill_value=0.0)
+    on_hand = stock["On_Hand"].reindex(names, fill_value=0.0).astype(float)
+
+    safety = z * spread * np.sqrt(lead_time)
+    reorder_point = burn * lead_time + safety
+    order_up_to = burn * (lead_time + cover) + safety
+    due = (burn > 0) & (on_hand <= reorder_point)
+    suggested = (order_up_to - on_hand).clip(lower=0.0).where(due, 0.0)
+    days_of_cover = (on_hand / burn.where(burn > 0)).fillna(np.inf)
+
+    table = pd.DataFrame({
+        "Item": names,
+        "Unit": stock["Unit"].reindex(names).astype(object).to_numpy(),
+        "On_Hand": on_hand.to_numpy(),
+        "Burn_Per_Day": burn.to_numpy(),
+        "Days_Of_Cover": days_of_cover.to_numpy(),
+        "Reorder_Point": reorder_point.to_numpy(),
+        "Suggested_Qty": suggested.to_numpy(),
+        "Est_Cost": (suggested * stock["Unit_Cost"].reindex(names, fill_value=0.0).astype(float)).to_numpy(),
+    }, columns=COLUMNS)
+    return table.sort_values(["Days_Of_Cover", "Item"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,165 @@
+"""Bulk import of aggregator (Zomato/Swiggy/...) sales reports.
+
+A report is parsed in chunks, normalized to ``Date, Dish, Platform, Qty``
+(plus ``Revenue`` when the file carries the gross order value) and validated as a
+whole before anything is written. Costing and ingredient consumption are
+computed with vectorized operations, and the sales rows and stock
+deductions are applied in a single transaction.
+"""
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from erp.inventory import InsufficientStock
+from erp.orders import SaleError, cost_lines, listed, record_sales
+
+# Accepted header spellings for each normalized column (compared case-insensitively).
+COLUMN_ALIASES = {
+    "Date": ["date", "order date", "order_date", "order time", "created at", "placed at"],
+    "Dish": ["dish", "item", "item name", "item_name", "items", "dish name"],
+    "Qty": ["qty", "quantity", "item quantity", "count"],
+    "Platform": ["platform", "channel", "source", "aggregator"],
+    "Revenue": ["revenue", "amount", "order value", "total", "bill amount"],
+}
+REQUIRED = ["Date", "Dish", "Qty"]
+# Payouts are net of commission and delivery fees, which settlement would then take off again
+NET_COLUMNS = ["payout", "net payout", "net_payout", "settlement amount"]
+
+# Year-first dates (ISO 8601 and the like) are read as such; anything else numeric is day/month/year
+YEAR_FIRST = r"^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})"
+DAY_FIRST = r"^(\d{1,2})[-/.](\d{1,2})[-/.]\d{2,4}\b"
+UTC_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+class ReportError(SaleError):
+    """Raised when a report's file layout or rows fail validation."""
+
+
+def _match_columns(header):
+    lookup = {str(h).strip().lower(): h for h in header}
+    mapping = {}
+    for target, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                mapping[lookup[alias]] = target
+                break
+    return mapping
+
+
+def _read_chunks(source, name, chunksize):
+    """Yield raw DataFrame chunks from a CSV (streamed) or .xlsx file.
+
+    Files that cannot be read raise :class:`ReportError` like any other
+    validation problem.
+    """
+    name = str(name)
+    if name.lower().endswith(".xls"):
+        raise ReportError([f"{name}: old .xls workbooks are not supported; save the report as .xlsx or CSV."])
+    try:
+        if name.lower().endswith(".xlsx"):
+            yield pd.read_excel(source)
+        else:
+            yield from pd.read_csv(source, chunksize=chunksize)
+    except pd.errors.EmptyDataError:
+        raise ReportError(["The file has no rows."]) from None
+    except (ValueError, zipfile.BadZipFile) as exc:  # parser and encoding errors are ValueErrors
+        raise ReportError([f"Could not read {name}: {exc}"]) from None
+
+
+def parse_dates(values):
+    """Report dates as normalized Timestamps, plus a mask of ambiguous entries.
+
+    Year-first values are parsed as ISO 8601 (any UTC offset is dropped, so
+    times stay in the report's local time). Other values are read day
+    first; numeric ones that only make sense month first (``03/25/2024``)
+    are left as NaT and flagged as ambiguous rather than guessed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values).dt.tz_localize(None).dt.normalize(), np.zeros(len(values), dtype=bool)
+    text = values.astype(str).str.strip()
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+
+    iso = text.str.match(YEAR_FIRST)
+    if iso.any():
+        # Other separators too, so 2024/03/05 is not read as year-day-month
+        iso_text = text[iso].str.replace(YEAR_FIRST, r"\1-\2-\3", regex=True)
+        iso_text = iso_text.str.replace(UTC_OFFSET, "", regex=True)
+        dates[iso] = pd.to_datetime(iso_text, errors="coerce", format="ISO8601")
+
+    day_month = text.str.extract(DAY_FIRST).astype(float)
+    ambiguous = (~iso & (day_month[1] > 12) & (day_month[0] <= 12)).to_numpy()
+    rest = ~iso & ~ambiguous
+    if rest.any():
+        dates[rest] = pd.to_datetime(text[rest], errors="coerce", dayfirst=True, format="mixed")
+    return dates.dt.normalize(), ambiguous
+
+
+def read_report(source, name="report.csv", platform=None, chunksize=50_000):
+    """Parse a report into normalized sale lines.
+
+    ``platform`` is used for every line when the file has no platform column
+    (or overrides it when given). Raises :class:`ReportError` on missing
+    columns or rows with unparseable or ambiguous dates or bad quantities.
+    """
+    parts, problems, offset = [], [], 0
+    for chunk in _read_chunks(source, name, chunksize):
+        mapping = _match_columns(chunk.columns)
+        missing = [c for c in REQUIRED if c not in mapping.values()]
+        if platform is None and "Platform" not in mapping.values():
+            missing.append("Platform (or pick a default platform)")
+        if missing:
+            raise ReportError([f"Missing column(s): {', '.join(missing)}"])
+        net = [h for h in chunk.columns if str(h).strip().lower() in NET_COLUMNS]
+        if net and "Revenue" not in mapping.values():
+            raise ReportError([f"Column {net[0]!r} is the platform payout after commission and fees; "
+                               "add the gross order value (Revenue or Order Value) or remove the column."])
+
+        lines = chunk[list(mapping)].rename(columns=mapping)
+        if platform is not None:
+            lines["Platform"] = platform
+        lines["Date"], ambiguous = parse_dates(lines["Date"])
+        lines["Qty"] = pd.to_numeric(lines["Qty"], errors="coerce")
+        lines["Dish"] = lines["Dish"].astype(str).str.strip()
+        lines["Platform"] = lines["Platform"].astype(str).str.strip()
+        if "Revenue" in lines:
+            lines["Revenue"] = pd.to_numeric(lines["Revenue"], errors="coerce")
+
+        rows = pd.RangeIndex(offset + 2, offset + 2 + len(lines))  # spreadsheet row numbers (header is row 1)
+        bad_date = lines["Date"].isna().to_numpy() & ~ambiguous
+        bad_qty = ~(lines["Qty"] > 0).to_numpy()
+        if bad_date.any():
+            problems.append(f"Unreadable date on row(s) {listed(rows[bad_date])}")
+        if ambiguous.any():
+            problems.append(f"Ambiguous date (expected day/month/year or YYYY-MM-DD) on row(s) {listed(rows[ambiguous])}")
+        if bad_qty.any():
+            problems.append(f"Quantity must be a positive number on row(s) {listed(rows[bad_qty])}")
+        if "Revenue" in lines and lines["Revenue"].isna().any():
+            problems.append(f"Unreadable amount on row(s) {listed(rows[lines['Revenue'].isna().to_numpy()])}")
+        parts.append(lines)
+        offset += len(lines)
+
+    if problems:
+        raise ReportError(problems)
+    if not parts or offset == 0:
+        raise ReportError(["The file has no rows."])
+    return pd.concat(parts, ignore_index=True)
+
+
+def import_report(db, outlet, source, name="report.csv", platform=None, dry_run=False):
+    """Validate, cost and (unless ``dry_run``) apply a report to ``outlet``.
+
+    Either every line is recorded and all stock is deducted, or nothing is
+    written and :class:`~erp.orders.SaleError` is raised. Returns the costed
+    lines and the ingredient demand.
+    """
+    recipes = db.recipes()
+    lines = read_report(source, name=name, platform=platform)
+    lines = cost_lines(lines, recipes, db.dish_costs(outlet), list(db.platforms(outlet)), db.dish_pricing(outlet))
+    try:
+        return record_sales(db, outlet, lines, recipes, dry_run=dry_run)
+    except InsufficientStock as exc:
+        raise ReportError([
+            f"Insufficient {item}: need {round(need, 2)}, have {round(have, 2)}"
+            for item, (need, have) in exc.shortfalls.items()
+        ]) from None
@@ -0,0 +1,94 @@
+"""Lot-aware stock index with FIFO consumption.
+
+Every "Add to Stock" row is a purchase lot. :class:`StockIndex` hashes an
+outlet's lots by item, in purchase order, and keeps a running on-hand total
+per item. Availability checks and FIFO consumption therefore cost
+O(ingredients + lots touched) instead of a scan over the inventory table,
+and the cost of goods comes from the lots that were actually drawn down.
+"""
+
+EPSILON = 1e-9
+
+
+class InsufficientStock(ValueError):
+    """Raised when a demand cannot be met; ``shortfalls`` maps item -> (needed, available)."""
+
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls
+        super().__init__("; ".join(
+            f"Insufficient {item}. Need {round(need, 2)}, have {round(have, 2)}"
+            for item, (need, have) in shortfalls.items()
+        ))
+
+
+class StockIndex:
+    """One outlet's open lots per item, oldest first."""
+
+    def __init__(self, inventory=None):
+        self._lots = {}      # item -> {lot_id: [qty, total_cost]} in purchase order
+        self._on_hand = {}   # item -> total qty across open lots
+        self._item_of = {}   # lot_id -> item
+        if inventory is not None:
+            for lot_id, item, qty, cost in zip(inventory["id"], inventory["Item"],
+                                               inventory["Qty"], inventory["Total_Cost"]):
+                self.add_lot(lot_id, item, qty, cost)
+
+    def add_lot(self, lot_id, item, qty, total_cost):
+        if qty <= EPSILON:
+            return
+        self._lots.setdefault(item, {})[lot_id] = [float(qty), float(total_cost)]
+        self._on_hand[item] = self._on_hand.get(item, 0.0) + float(qty)
+        self._item_of[lot_id] = item
+
+    def remove_lot(self, lot_id):
+        item = self._item_of.pop(lot_id, None)
+        if item is None:
+            return
+        qty, _ = self._lots[item].pop(lot_id)
+        self._on_hand[item] -= qty
+        if not self._lots[item]:
+            del self._lots[item], self._on_hand[item]
+
+    def update_lot(self, lot_id, item, qty, total_cost):
+        """Mirror an edit of a lot row (exhausted lots drop out of the index)."""
+        lot = self._lots.get(item, {}).get(lot_id)
+        if lot is None:
+            self.add_lot(lot_id, item, qty, total_cost)
+        elif qty <= EPSILON:
+            self.remove_lot(lot_id)
+        else:
+            self._on_hand[item] += float(qty) - lot[0]
+            lot[0], lot[1] = float(qty), float(total_cost)
+
+    def on_hand(self, item):
+        return self._on_hand.get(item, 0.0)
+
+    def shortfalls(self, demand):
+        """Items in ``demand`` (item -> qty) that the open lots cannot cover."""
+        return {item: (need, self.on_hand(item)) for item, need in demand.items()
+                if need > self.on_hand(item) + EPSILON}
+
+    def plan(self, demand):
+        """FIFO draw-down for ``demand`` without applying it.
+
+        Returns ``(changes, cost)``: the new ``Qty``/``Total_Cost`` of every
+        lot touched, and the total cost of the stock consumed. Raises
+        :class:`InsufficientStock` if any item falls short.
+        """
+        short = self.shortfalls(demand)
+        if short:
+            raise InsufficientStock(short)
+        changes, cost = {}, 0.0
+        for item, need in demand.items():
+            for lot_id, (qty, lot_cost) in self._lots.get(item, {}).items():
+                if need <= EPSILON:
+                    break
+                take = min(qty, need)
+                unit_cost = lot_cost / qty
+                left = qty - take
+                if left <= EPSILON:
+                    left = 0.0
+                changes[lot_id] = {"Qty": left, "Total_Cost": unit_cost * left}
+                cost += unit_cost * take
+                need -= take
+        return changes, cost
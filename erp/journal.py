@@ -0,0 +1,219 @@
+"""Append-only change journal, snapshots and point-in-time restore.
+
+Every write :class:`~erp.storage.SQLiteStorage` makes is also recorded, in
+the same transaction, as one row of the ``journal`` table. Most entries are
+``"rows"`` entries: for each table touched, the rows as they were before
+(deleted) and after (inserted), keyed by :data:`KEYS` and carrying their
+rowid where they had one. Applying the same
+entry with ``before`` and ``after`` swapped undoes it. A full import is
+journaled as an ``"import"`` entry pointing at the database files holding
+the data before and after it.
+
+A snapshot is a compacted copy of the database (journal emptied and
+vacuumed) named after the last journal entry it contains. To restore a
+point in time, :func:`restore` copies the newest snapshot at or before it
+and replays only the journal tail.
+"""
+import json
+import os
+import re
+import shutil
+import sqlite3
+import zlib
+from datetime import datetime
+
+# Primary key of every journaled table
+KEYS = {
+    "outlets": ["id"], "dishes": ["id"], "platforms": ["id"],
+    "inventory": ["id"], "sales": ["id"], "expenses": ["id"],
+    "recipes": ["dish_id", "Item"], "menu_prices": ["dish_id"], "dish_pricing": ["outlet_id", "dish_id"],
+    "outlet_platforms": ["outlet_id", "platform_id"],
+    "platform_rates": ["outlet_id", "platform_id", "Effective"],
+}
+
+DDL = """
+CREATE TABLE journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    op TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    payload BLOB NOT NULL
+)
+"""
+
+SNAPSHOT_NAME = re.compile(r"(snapshot|import)-(\d+)\.db$")
+
+
+class JournalError(ValueError):
+    """Raised when the journal cannot undo or replay what was asked."""
+
+
+def change(table, columns, before=(), after=()):
+    """One table's part of a ``"rows"`` entry."""
+    return {"table": table, "columns": list(columns), "before": [list(r) for r in before],
+            "after": [list(r) for r in after]}
+
+
+def encode(payload):
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def summarize(op, payload):
+    """Short human-readable description of an entry, e.g. ``"sales +3, inventory ~1"``."""
+    if op == "import":
+        return "full database import"
+    counts = {}
+    for ch in payload["changes"]:
+        added, removed = counts.get(ch["table"], (0, 0))
+        counts[ch["table"]] = (added + len(ch["after"]), removed + len(ch["before"]))
+    parts = []
+    for table, (added, removed) in counts.items():
+        if added and removed:
+            parts.append(f"{table} ~{max(added, removed)}")
+        elif added:
+            parts.append(f"{table} +{added}")
+        elif removed:
+            parts.append(f"{table} -{removed}")
+    return ", ".join(parts) or "no change"
+
+
+def record(conn, op, payload, note=""):
+    """Append an entry on ``conn`` (inside the caller's transaction)."""
+    summary = summarize(op, payload) + (f" ({note})" if note else "")
+    conn.execute(
+        "INSERT INTO journal (ts, op, summary, payload) VALUES (?, ?, ?, ?)",
+        (datetime.now().isoformat(timespec="seconds"), op, summary, encode(payload)),
+    )
+
+
+def last_seq(conn):
+    """Seq of the newest entry ever written (compaction never lowers it)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'journal'").fetchone()
+    return row[0] if row else 0
+
+
+def _delete_keys(conn, table, columns, rows):
+    keys = KEYS[table]
+    positions = [columns.index(k) for k in keys]
+    conn.executemany(
+        f"DELETE FROM {table} WHERE " + " AND ".join(f"{k} = ?" for k in keys),
+        [tuple(row[p] for p in positions) for row in rows],
+    )
+
+
+def _insert_rows(conn, table, columns, rows):
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [tuple(row) for row in rows],
+    )
+
+
+def replace_all(conn, path):
+    """Replace every journaled table's rows on ``conn`` with those in the database at ``path``."""
+    if not os.path.exists(path):
+        raise JournalError(f"{path} is missing; this import can no longer be replayed or undone")
+    src = sqlite3.connect(path)
+    try:
+        for table in KEYS:
+            conn.execute(f"DELETE FROM {table}")
+            cursor = src.execute(f"SELECT * FROM {table}")
+            _insert_rows(conn, table, [d[0] for d in cursor.description], cursor)
+    finally:
+        src.close()
+
+
+def apply(conn, op, payload, inverse=False):
+    """Replay (or, with ``inverse``, undo) one entry directly on ``conn``."""
+    if op == "import":
+        replace_all(conn, payload["before"] if inverse else payload["after"])
+        return
+    if op != "rows":
+        raise JournalError(f"Unknown journal entry type {op!r}")
+    changes = reversed(payload["changes"]) if inverse else payload["changes"]
+    for ch in changes:
+        gone, added = (ch["after"], ch["before"]) if inverse else (ch["before"], ch["after"])
+        if gone:
+            _delete_keys(conn, ch["table"], ch["columns"], gone)
+        if added:
+            _insert_rows(conn, ch["table"], ch["columns"], added)
+
+
+def inverse_payload(op, payload):
+    """The entry that undoes ``(op, payload)``."""
+    if op == "import":
+        return {"before": payload["after"], "after": payload["before"]}
+    return {"changes": [dict(ch, before=ch["after"], after=ch["before"]) for ch in reversed(payload["changes"])]}
+
+
+# --- snapshots ---
+def snapshot_dir(path):
+    return f"{path}.snapshots"
+
+
+def snapshots(directory, kind="snapshot"):
+    """``[(seq, path)]`` of the snapshots (or saved ``"import"`` files) in ``directory``, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    found = [(int(m.group(2)), os.path.join(directory, name))
+             for name in os.listdir(directory) if (m := SNAPSHOT_NAME.match(name)) and m.group(1) == kind]
+    return sorted(found)
+
+
+def write_snapshot(conn, directory, seq):
+    """Copy the database behind ``conn`` into a compacted snapshot as of ``seq``."""
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, f"snapshot-{seq:012d}.db")
+    partial = target + ".partial"
+    dest = sqlite3.connect(partial)
+    try:
+        conn.backup(dest)
+        # The data is the snapshot; its history lives on in the live journal
+        dest.execute("DELETE FROM journal")
+        dest.commit()
+        dest.execute("VACUUM")
+    finally:
+        dest.close()
+    os.replace(partial, target)
+    return target
+
+
+def restore(target, source, upto=None, directory=None):
+    """Build the database as of journal entry ``upto`` (default: latest) at ``target``.
+
+    Starts from the newest snapshot at or before ``upto`` in ``directory``
+    (default: next to ``source``) and replays the journal entries of
+    ``source`` after it. Returns the number of entries replayed.
+    """
+    directory = directory or snapshot_dir(source)
+    src = sqlite3.connect(source)
+    try:
+        upto = last_seq(src) if upto is None else upto
+        usable = [(seq, path) for seq, path in snapshots(directory) if seq <= upto]
+        if not usable:
+            raise JournalError(f"No snapshot at or before entry {upto}")
+        base_seq, base = usable[-1]
+        first = src.execute("SELECT MIN(seq) FROM journal").fetchone()[0]
+        if base_seq < upto and (first is None or first > base_seq + 1):
+            raise JournalError("The journal no longer reaches back to the newest usable snapshot")
+        shutil.copyfile(base, target)
+        dest = sqlite3.connect(target, isolation_level=None)
+        try:
+            dest.execute("BEGIN")
+            tail = src.execute("SELECT seq, ts, op, summary, payload FROM journal WHERE seq > ? AND seq <= ? "
+                               "ORDER BY seq", (base_seq, upto))
+            replayed = 0
+            for seq, ts, op, summary, blob in tail:
+                apply(dest, op, decode(blob))
+                dest.execute("INSERT INTO journal (seq, ts, op, summary, payload) VALUES (?, ?, ?, ?, ?)",
+                             (seq, ts, op, summary, blob))
+                replayed += 1
+            dest.execute("COMMIT")
+        finally:
+            dest.close()
+    finally:
+        src.close()
+    return replayed
@@ -0,0 +1,434 @@
+"""Append-optimized in-memory ledger for the row tables.
+
+Recording a sale used to ``pd.concat`` the whole table with a one-row frame,
+so every entry copied the full history. A :class:`Ledger` keeps one growable
+numpy array per column instead: new rows are staged in a small chunk of
+plain dicts and written into the arrays in bulk, with capacity doubling so
+appends are amortized O(1). :meth:`Ledger.frame` wraps the filled part of
+the arrays in a DataFrame without copying them. Categorical columns are
+stored as integer codes plus a growing list of categories.
+
+Dated tables are kept as a :class:`MonthlyLedger`, one :class:`Ledger` per
+calendar month, so reading a date range only touches the months it
+overlaps and the months can be loaded from storage as they are needed.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _code_dtype(n_categories):
+    """Smallest code width pandas uses for ``n_categories`` (so wrapping never copies)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _coerce(values, dtype):
+    """Turn a list/Series of raw values into an array of ``dtype``."""
+    if getattr(values, "dtype", None) == dtype:
+        return np.asarray(values)  # already typed (e.g. a validated frame)
+    if dtype.kind == "M":
+        return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy(dtype=dtype)
+    if dtype.kind == "f":
+        return pd.to_numeric(pd.Series(values, dtype=object)).fillna(0.0).to_numpy(dtype=dtype)
+    out = np.empty(len(values), dtype=object)
+    out[:] = list(values)
+    return out
+
+
+class Ledger:
+    """Columnar, append-optimized table keyed by an ``id`` column.
+
+    ``dtypes`` maps each column to its numpy dtype (``object`` for text) or
+    to ``"category"``. Frames returned by :meth:`frame` are read-only views;
+    they stay valid until the ledger is next mutated. Ledgers created with
+    ``share_categories`` set to another ledger encode categoricals with that
+    ledger's codes, so their frames concatenate without recoding.
+    """
+
+    def __init__(self, dtypes, chunk_size=256, share_categories=None):
+        self.dtypes = {c: d if d == "category" else np.dtype(d) for c, d in dtypes.items()}
+        self.chunk_size = chunk_size
+        if share_categories is None:
+            self._categories = {c: [] for c, d in self.dtypes.items() if d == "category"}
+            self._codes = {c: {} for c in self._categories}
+            self._cat_dtypes = {}
+        else:
+            shared = share_categories
+            self._categories, self._codes, self._cat_dtypes = shared._categories, shared._codes, shared._cat_dtypes
+        self._arrays = {c: np.empty(0, dtype=_code_dtype(0) if d == "category" else d)
+                        for c, d in self.dtypes.items()}
+        self._size = 0
+        self._chunk = []
+        self._positions = {}
+        self._frame = None
+
+    def __len__(self):
+        return self._size + len(self._chunk)
+
+    def __contains__(self, row_id):
+        self._flush()
+        return row_id in self._positions
+
+    # --- writes ---
+    def append(self, row):
+        """Stage one row (a dict); it is written to the arrays lazily."""
+        self._chunk.append(row)
+        self._frame = None
+        if len(self._chunk) >= self.chunk_size:
+            self._flush()
+
+    def extend(self, rows):
+        """Bulk-append a DataFrame (or list of dicts) in one write."""
+        self._flush()
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame(list(rows))
+        if len(rows):
+            self._write({c: rows[c] if c in rows else [None] * len(rows) for c in self.dtypes}, len(rows))
+
+    def update(self, row_id, values):
+        """Overwrite some columns of one row in place. Returns False if unknown."""
+        self._flush()
+        pos = self._positions.get(row_id)
+        if pos is None:
+            return False
+        for col, value in values.items():
+            self._arrays[col][pos] = self._encode(col, [value])[0]
+        self._frame = None
+        return True
+
+    def update_many(self, ids, values):
+        """Overwrite columns of many rows at once.
+
+        ``values`` maps each column to an array aligned with ``ids``; unknown
+        ids are skipped. Returns the number of rows updated.
+        """
+        self._flush()
+        positions = np.fromiter((self._positions.get(i, -1) for i in ids), dtype=np.int64, count=len(ids))
+        known = positions >= 0
+        if not known.any():
+            return 0
+        for col, column in values.items():
+            self._arrays[col][positions[known]] = self._encode(col, np.asarray(column)[known])
+        self._frame = None
+        return int(known.sum())
+
+    def delete(self, ids):
+        """Remove rows by id with a single compaction. Returns rows removed."""
+        self._flush()
+        drop = [self._positions[i] for i in ids if i in self._positions]
+        if not drop:
+            return 0
+        keep = np.ones(self._size, dtype=bool)
+        keep[drop] = False
+        # Fresh arrays, so frames handed out earlier are left untouched
+        self._arrays = {c: a[:self._size][keep] for c, a in self._arrays.items()}
+        self._size = int(keep.sum())
+        self._positions = {row_id: i for i, row_id in enumerate(self._arrays["id"])}
+        self._frame = None
+        return len(drop)
+
+    def rename_category(self, column, old, new):
+        """Relabel one value of a categorical column in every row at once."""
+        codes = self._codes[column]
+        code = codes.pop(old, None)
+        if code is None:
+            return False
+        codes[new] = code
+        self._categories[column][code] = new
+        self._cat_dtypes.pop(column, None)
+        self._frame = None
+        return True
+
+    # --- reads ---
+    def frame(self):
+        """Current contents as a DataFrame that shares memory with the ledger."""
+        self._flush()
+        if self._frame is not None and any(self._frame[c].dtype is not self._cat_dtypes.get(c)
+                                           for c in self._categories):
+            self._frame = None  # a ledger sharing the categories added or renamed one
+        if self._frame is None:
+            self._frame = pd.DataFrame(
+                {c: self._column(c, a[:self._size]) for c, a in self._arrays.items()}, copy=False,
+            )
+        return self._frame
+
+    def rows(self, ids):
+        """The rows with the given ids (unknown ids are skipped)."""
+        self._flush()
+        positions = [self._positions[i] for i in ids if i in self._positions]
+        return pd.DataFrame({c: self._column(c, a[positions]) for c, a in self._arrays.items()})
+
+    def categories(self, column):
+        """Distinct values ever stored in a categorical column."""
+        return list(self._categories[column])
+
+    # --- internals ---
+    def _flush(self):
+        if not self._chunk:
+            return
+        chunk, self._chunk = self._chunk, []
+        self._write({c: [row.get(c) for row in chunk] for c in self.dtypes}, len(chunk))
+
+    def _write(self, columns, n):
+        self._store({col: self._encode(col, values) for col, values in columns.items()}, n)
+
+    def _store(self, encoded, n):
+        """Append ``n`` rows of columns already run through :meth:`_encode`."""
+        start, end = self._size, self._size + n
+        self._reserve(end)
+        for col, values in encoded.items():
+            if values.dtype != self._arrays[col].dtype:
+                # Codes from a ledger sharing the categories, after it outgrew this width
+                self._arrays[col] = self._arrays[col].astype(values.dtype)
+            self._arrays[col][start:end] = values
+        self._positions.update(zip(self._arrays["id"][start:end].tolist(), range(start, end)))
+        self._size = end
+        self._frame = None
+
+    def _column(self, col, values):
+        if col not in self._categories:
+            return pd.Series(values, dtype=values.dtype, copy=False)
+        if col not in self._cat_dtypes:
+            self._cat_dtypes[col] = pd.CategoricalDtype(self._categories[col])
+        return pd.Series(pd.Categorical.from_codes(values, dtype=self._cat_dtypes[col], validate=False),
+                         copy=False)
+
+    def _encode(self, col, values):
+        """Raw values -> storage array for ``col`` (category codes for categoricals)."""
+        if col not in self._categories:
+            return _coerce(values, self.dtypes[col])
+        cats, codes = self._categories[col], self._codes[col]
+        before = len(cats)
+        values = pd.Categorical(values)  # cheap when ``values`` is already categorical
+        local = np.asarray(values.codes)
+        # Translate the (few) distinct values once, then map codes in bulk
+        lookup = np.empty(len(values.categories), dtype=np.int64)
+        for i, value in enumerate(values.categories):
+            value = str(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(cats)
+                cats.append(value)
+            lookup[i] = code
+        out = np.full(len(local), -1, dtype=np.int64)
+        present = local >= 0
+        out[present] = lookup[local[present]]
+        if len(cats) != before:
+            self._cat_dtypes.pop(col, None)
+        # Checked even without new categories here: a ledger sharing them may have added some
+        width = _code_dtype(len(cats))
+        if width != self._arrays[col].dtype:
+            self._arrays[col] = self._arrays[col].astype(width)
+        return out.astype(self._arrays[col].dtype)
+
+    def _reserve(self, needed):
+        capacity = len(self._arrays["id"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, self.chunk_size)
+        for col, old in self._arrays.items():
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            self._arrays[col] = grown
+
+
+def month_key(date):
+    """Partition key of ``date``: whole months since January 1970."""
+    return int(np.datetime64(pd.Timestamp(date), "M").astype(np.int64))
+
+
+def _month_keys(dates):
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+
+
+def month_span(start=None, end=None):
+    """First and last day of the whole months overlapping ``start``..``end`` (an open end stays ``None``)."""
+    first = None if start is None else pd.Timestamp(start).to_period("M").start_time
+    last = None if end is None else pd.Timestamp(end).to_period("M").end_time.normalize()
+    return first, last
+
+
+class MonthlyLedger:
+    """A :class:`Ledger` partitioned by the calendar month of its ``Date`` column.
+
+    Offers the same reads and writes as a ledger; :meth:`frame` can be
+    limited to a date range and then only concatenates the partitions that
+    overlap it. Partitions share one set of categories. Months can be filled
+    from storage a range at a time with :meth:`load`: rows written to a month
+    that is not loaded yet are left to storage, and :attr:`complete` tells
+    whether every month is in memory (as aggregates over all rows need).
+    """
+
+    def __init__(self, dtypes, chunk_size=256):
+        self.dtypes = dtypes
+        self.chunk_size = chunk_size
+        self.complete = False
+        self._shared = Ledger(dtypes, chunk_size)  # holds the categories only, never rows
+        self._parts = {}     # month key -> Ledger
+        self._months = {}    # row id -> month key
+        self._loaded = set()  # month keys loaded one by one
+        self._head = None    # every month up to this key is loaded
+        self._tail = None    # every month from this key on is loaded
+        self._frame = None
+
+    def __len__(self):
+        return len(self._months)
+
+    def __contains__(self, row_id):
+        return row_id in self._months
+
+    # --- loading ---
+    def covers(self, start=None, end=None):
+        """Whether every month overlapping ``start``..``end`` (open ends: unbounded) is loaded."""
+        if self.complete:
+            return True
+        # An open end is covered up to the loaded head (or from the loaded tail)
+        first = month_key(start) if start is not None else None if self._head is None else self._head + 1
+        last = month_key(end) if end is not None else None if self._tail is None else self._tail - 1
+        if first is None or last is None:
+            return False
+        return bool(self._is_loaded(np.arange(first, last + 1)).all())
+
+    def load(self, rows, start=None, end=None):
+        """Add ``rows`` read from storage for ``start``..``end``, then mark those months loaded.
+
+        ``rows`` must hold every stored row of the whole months overlapping
+        the range; rows of months loaded before are skipped.
+        """
+        months = _month_keys(rows["Date"])
+        fresh = ~self._is_loaded(months)
+        self._add(rows[fresh] if not fresh.all() else rows, months[fresh])
+        if start is None and end is None:
+            self.complete = True
+        elif start is None:
+            last = month_key(end)
+            self._head = last if self._head is None else max(self._head, last)
+        elif end is None:
+            first = month_key(start)
+            self._tail = first if self._tail is None else min(self._tail, first)
+        else:
+            self._loaded.update(range(month_key(start), month_key(end) + 1))
+        # Head, tail and single months may have joined up into the whole history
+        self.complete = self.complete or self.covers()
+
+    def _is_loaded(self, months):
+        if self.complete:
+            return np.ones(len(months), dtype=bool)
+        loaded = np.isin(months, list(self._loaded))
+        if self._head is not None:
+            loaded |= months <= self._head
+        if self._tail is not None:
+            loaded |= months >= self._tail
+        return loaded
+
+    # --- writes ---
+    def extend(self, rows):
+        """Bulk-append a DataFrame; rows of months not loaded yet are left out."""
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame(list(rows))
+        months = _month_keys(rows["Date"])
+        keep = self._is_loaded(months)
+        self._add(rows[keep] if not keep.all() else rows, months[keep])
+
+    def _add(self, rows, months):
+        if not len(rows):
+            return
+        # Encode every column once, then each month is a contiguous slice of the sorted arrays
+        order = np.argsort(months, kind="stable")
+        months = months[order]
+        n = len(rows)
+        encoded = {c: self._shared._encode(c, rows[c] if c in rows else [None] * n)[order] for c in self.dtypes}
+        bounds = np.flatnonzero(np.diff(months)) + 1
+        for lo, hi in zip(np.r_[0, bounds].tolist(), np.r_[bounds, n].tolist()):
+            part = self._parts.get(int(months[lo]))
+            if part is None:
+                part = self._parts[int(months[lo])] = Ledger(self.dtypes, self.chunk_size,
+                                                             share_categories=self._shared)
+            part._flush()
+            part._store({c: a[lo:hi] for c, a in encoded.items()}, hi - lo)
+        self._months.update(zip(encoded["id"].tolist(), months.tolist()))
+        self._frame = None
+
+    def update(self, row_id, values):
+        """Overwrite some columns of one row; a new ``Date`` may move it to another month."""
+        month = self._months.get(row_id)
+        if month is None:
+            return False
+        part = self._parts[month]
+        if "Date" in values and month_key(values["Date"]) != month:
+            row = part.rows([row_id])
+            part.delete([row_id])
+            del self._months[row_id]
+            for col, value in values.items():
+                row[col] = [value]
+            self.extend(row.assign(Date=pd.to_datetime(row["Date"])))
+        else:
+            part.update(row_id, values)
+        self._frame = None
+        return True
+
+    def update_many(self, ids, values):
+        """Overwrite columns of many rows at once (see :meth:`Ledger.update_many`)."""
+        if "Date" in values:
+            return sum(self.update(i, {c: v[n] for c, v in values.items()}) for n, i in enumerate(ids))
+        months = np.fromiter((self._months.get(i, -1) for i in ids), dtype=np.int64, count=len(ids))
+        ids, updated = np.asarray(ids, dtype=object), 0
+        for month in np.unique(months[months >= 0]).tolist():
+            mask = months == month
+            updated += self._parts[month].update_many(ids[mask].tolist(),
+                                                      {c: np.asarray(v)[mask] for c, v in values.items()})
+        self._frame = None
+        return updated
+
+    def delete(self, ids):
+        """Remove rows by id, one compaction per month touched. Returns rows removed."""
+        by_month = {}
+        for row_id in ids:
+            month = self._months.pop(row_id, None)
+            if month is not None:
+                by_month.setdefault(month, []).append(row_id)
+        removed = sum(self._parts[month].delete(month_ids) for month, month_ids in by_month.items())
+        if removed:
+            self._frame = None
+        return removed
+
+    def rename_category(self, column, old, new):
+        """Relabel one value of a categorical column in every month at once."""
+        self._frame = None
+        return self._shared.rename_category(column, old, new)
+
+    # --- reads ---
+    def frame(self, start=None, end=None):
+        """Rows of the months overlapping ``start``..``end`` (default: all loaded rows), oldest month first."""
+        whole = start is None and end is None
+        if whole and self._frame is not None and all(
+                self._frame[c].dtype is self._shared._cat_dtypes.get(c) for c in self._shared._categories):
+            return self._frame
+        first = -np.inf if start is None else month_key(start)
+        last = np.inf if end is None else month_key(end)
+        parts = [self._parts[m] for m in sorted(self._parts) if first <= m <= last and len(self._parts[m])]
+        if len(parts) < 2:
+            df = (parts[0] if parts else self._shared).frame()
+        else:
+            # Join the stored arrays (codes share one set of categories) and build the frame once
+            for part in parts:
+                part._flush()
+            df = pd.DataFrame({c: self._shared._column(c, np.concatenate([p._arrays[c][:p._size] for p in parts]))
+                               for c in self.dtypes}, copy=False)
+        if whole:
+            self._frame = df
+        return df
+
+    def rows(self, ids):
+        """The rows with the given ids, grouped by month (unknown ids are skipped)."""
+        by_month = {}
+        for row_id in ids:
+            if row_id in self._months:
+                by_month.setdefault(self._months[row_id], []).append(row_id)
+        frames = [self._parts[month].rows(month_ids) for month, month_ids in by_month.items()]
+        return pd.concat(frames, ignore_index=True) if frames else self._shared.rows([])
+
+    def categories(self, column):
+        return self._shared.categories(column)
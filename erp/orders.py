@@ -0,0 +1,135 @@
+"""Costing and recording of sale lines.
+
+Both a multi-dish order from the Sale Entry page and a bulk report go
+through :func:`record_sales`: the ingredient demand of all lines is
+aggregated, checked against stock once, drawn down FIFO, and every sale
+row is written in the same transaction.
+"""
+import itertools
+from datetime import datetime
+
+import pandas as pd
+
+from erp.pricing import INPUTS, grand_total
+from erp.settlement import settle
+
+MAX_LISTED = 5
+
+_id_counter = itertools.count()
+
+
+class SaleError(ValueError):
+    """Raised when sale lines fail validation; ``problems`` lists every issue."""
+
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def listed(values):
+    """Short, de-duplicated listing of offending values for error messages."""
+    values = sorted(set(map(str, values)))
+    more = f" (+{len(values) - MAX_LISTED} more)" if len(values) > MAX_LISTED else ""
+    return ", ".join(values[:MAX_LISTED]) + more
+
+
+def new_ids(n):
+    """``n`` unique row ids sharing one timestamp (the counter keeps batches apart)."""
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    return [f"{stamp}-{next(_id_counter)}" for _ in range(n)]
+
+
+def cost_lines(lines, recipes, dish_costs, platforms, inputs=None):
+    """Validate dishes/platforms and add Revenue, Ing_Cost and Net_Profit.
+
+    Dish and platform names are matched case-insensitively against the
+    recipe book and the outlet's configured platforms. Lines without a
+    ``Revenue`` are priced at the menu grand total, including the outlet's
+    per-dish pricing ``inputs`` (see :meth:`~erp.storage.Storage.dish_pricing`).
+    ``Ing_Cost`` is the recipe (standard) cost until :func:`allocate_cost`
+    replaces it.
+    """
+    problems = []
+    dish_names = {d.lower(): d for d in recipes}
+    plat_names = {p.lower(): p for p in (platforms or ["Direct"])}
+
+    dishes = lines["Dish"].str.lower().map(dish_names)
+    plats = lines["Platform"].str.lower().map(plat_names)
+    if dishes.isna().any():
+        problems.append(f"No recipe for dish(es): {listed(lines.loc[dishes.isna(), 'Dish'])}")
+    if plats.isna().any():
+        problems.append(f"Platform(s) not linked to this outlet: {listed(lines.loc[plats.isna(), 'Platform'])}")
+    if problems:
+        raise SaleError(problems)
+
+    lines = lines.assign(Dish=dishes, Platform=plats)
+
+    unit_cost = lines["Dish"].map(dish_costs).fillna(0.0).astype(float)
+    lines["Ing_Cost"] = unit_cost * lines["Qty"]
+    extras = {} if inputs is None else {c: lines["Dish"].map(inputs[c]).fillna(0.0).astype(float) for c in INPUTS}
+    list_price = grand_total(unit_cost, **extras) * lines["Qty"]
+    lines["Revenue"] = lines["Revenue"].fillna(list_price) if "Revenue" in lines else list_price
+    lines["Net_Profit"] = lines["Revenue"] - lines["Ing_Cost"]
+    return lines
+
+
+def ingredient_demand(lines, recipes):
+    """Total quantity of each ingredient consumed by ``lines``."""
+    per_dish = lines.groupby("Dish")["Qty"].sum()
+    bom = pd.DataFrame(
+        [(dish, item, qty) for dish, recipe in recipes.items() if dish in per_dish.index
+         for item, qty in recipe.items()],
+        columns=["Dish", "Item", "Per_Dish"],
+    )
+    bom["Needed"] = bom["Per_Dish"] * bom["Dish"].map(per_dish)
+    return bom.groupby("Item")["Needed"].sum()
+
+
+def allocate_cost(lines, cogs):
+    """Spread the FIFO cost of goods over lines in proportion to their recipe cost."""
+    standard = lines["Ing_Cost"].sum()
+    ratio = cogs / standard if standard > 0 else 0.0
+    ing_cost = lines["Ing_Cost"] * ratio
+    return lines.assign(Ing_Cost=ing_cost, Net_Profit=lines["Revenue"] - ing_cost)
+
+
+def record_sales(db, outlet, lines, recipes, dry_run=False):
+    """Deduct stock for costed ``lines`` and write them, all or nothing.
+
+    Raises :class:`~erp.inventory.InsufficientStock` if the combined demand
+    cannot be met. Returns the lines with their FIFO ``Ing_Cost``, platform
+    commission and delivery fee (at the rates in force on each line's date),
+    and the ingredient demand.
+    """
+    demand = ingredient_demand(lines, recipes)
+    # The outlet lock makes check, deduct and insert atomic against other cashiers
+    with db.outlet_lock(outlet), db.transaction():
+        cogs = db.consume_stock(outlet, demand.to_dict(), dry_run=dry_run)
+        lines = settle(allocate_cost(lines, cogs).assign(Outlet=outlet), db.rate_schedule([outlet]))
+        if not dry_run:
+            db.insert("sales", lines.assign(id=new_ids(len(lines))))
+    return lines, demand
+
+
+def record_order(db, outlet, date, items):
+    """Record one order of several ``(dish, qty, platform)`` lines.
+
+    Quantities of the same dish are summed into one demand, stock is checked
+    once and all lines land in a single commit.
+    """
+    lines = pd.DataFrame(list(items), columns=["Dish", "Qty", "Platform"])
+    lines = lines.dropna(subset=["Dish"])
+    if lines.empty:
+        raise SaleError(["Add at least one dish to the order."])
+    lines["Qty"] = pd.to_numeric(lines["Qty"], errors="coerce")
+    bad_qty = ~(lines["Qty"] > 0)
+    if bad_qty.any():
+        raise SaleError([f"Quantity must be at least 1 for: {listed(lines.loc[bad_qty, 'Dish'])}"])
+    lines.insert(0, "Date", pd.Timestamp(date))
+    lines["Platform"] = lines["Platform"].fillna("Direct").astype(str)
+    lines["Dish"] = lines["Dish"].astype(str)
+
+    recipes = db.recipes()
+    lines = cost_lines(lines, recipes, db.dish_costs(outlet), list(db.platforms(outlet)), db.dish_pricing(outlet))
+    lines, _ = record_sales(db, outlet, lines, recipes)
+    return lines
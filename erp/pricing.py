@@ -0,0 +1,44 @@
+"""Selling-price formula shared by Menu & Pricing, Sale Entry and imports.
+
+Besides its production cost, a dish's price covers three per-unit amounts
+set on the Menu & Pricing page for each outlet (:data:`INPUTS`): platform
+commission, advertising and miscellaneous costs.
+"""
+import pandas as pd
+
+LABOUR_RATE = 0.10  # share of total spent
+PROFIT_RATE = 0.10  # share of (total spent + labour)
+
+INPUTS = ["comm", "adv", "misc"]  # ₹ per unit, stored per outlet and dish
+COLUMNS = ["Dish", "Production_Cost", *INPUTS, "Total_Spent", "Labour", "Profit", "Grand_Total"]
+
+
+def breakdown(prod_cost, comm=0.0, adv=0.0, misc=0.0):
+    """``(total_spent, labour, profit, grand_total)`` per unit; works on scalars and arrays."""
+    total_spent = prod_cost + comm + adv + misc
+    labour = total_spent * LABOUR_RATE
+    profit = (total_spent + labour) * PROFIT_RATE
+    return total_spent, labour, profit, total_spent + labour + profit
+
+
+def grand_total(prod_cost, comm=0.0, adv=0.0, misc=0.0):
+    """Per-unit selling price; works on scalars and on numpy/pandas arrays."""
+    return breakdown(prod_cost, comm, adv, misc)[-1]
+
+
+def price_table(dishes, dish_costs, inputs):
+    """The pricing of ``dishes`` as a numeric :data:`COLUMNS` frame.
+
+    ``dish_costs`` is a Series of production costs by dish and ``inputs`` a
+    frame of :data:`INPUTS` by dish (as from
+    :meth:`~erp.storage.Storage.dish_pricing`); missing values count as 0.
+    """
+    index = pd.Index(list(dishes), name="Dish")
+    costs = dish_costs.reindex(index, fill_value=0.0).to_numpy(float)
+    amounts = inputs.reindex(index=index, columns=INPUTS, fill_value=0.0).fillna(0.0).to_numpy(float)
+    total_spent, labour, profit, total = breakdown(costs, *amounts.T)
+    return pd.DataFrame({
+        "Dish": index.to_numpy(), "Production_Cost": costs,
+        **dict(zip(INPUTS, amounts.T)),
+        "Total_Spent": total_spent, "Labour": labour, "Profit": profit, "Grand_Total": total,
+    }, columns=COLUMNS)
@@ -0,0 +1,137 @@
+"""Materialized monthly/yearly totals for the Dashboard.
+
+A :class:`PeriodRollup` keeps running sums of a ledger's money columns per
+month and per year. It is built once from history and then adjusted by each
+insert and delete, so the Dashboard only ever touches one row per period.
+The ``outlet_*`` helpers do the same P&L for many outlets at once, with one
+grouped pass over the ledgers instead of one aggregation per outlet.
+"""
+import calendar
+
+import numpy as np
+import pandas as pd
+
+SALES_MEASURES = ["Revenue", "Comm_Paid", "Del_Cost", "Ing_Cost", "Net_Profit"]
+EXPENSE_MEASURES = ["Amount"]
+GRAINS = ("month", "year")
+
+
+def _period_keys(dates, grain):
+    """Integer period keys that sort chronologically."""
+    dates = pd.to_datetime(dates)
+    if grain == "year":
+        return dates.dt.year.to_numpy()
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+
+
+def period_label(key, grain):
+    if grain == "year":
+        return str(key)
+    year, month = divmod(int(key), 12)
+    return f"{calendar.month_abbr[month + 1]} {year}"
+
+
+class PeriodRollup:
+    """Running per-period sums (and row counts) of ``measures``."""
+
+    def __init__(self, measures):
+        self.measures = list(measures)
+        self._totals = {grain: {} for grain in GRAINS}
+        self._counts = {grain: {} for grain in GRAINS}
+
+    def add(self, frame, sign=1):
+        """Fold rows into the totals; ``sign=-1`` takes them back out."""
+        if len(frame) == 0:
+            return
+        values = np.nan_to_num(frame.reindex(columns=self.measures).to_numpy(dtype=float)) * sign
+        for grain in GRAINS:
+            keys, inverse = np.unique(_period_keys(frame["Date"], grain), return_inverse=True)
+            sums = np.zeros((len(keys), len(self.measures)))
+            np.add.at(sums, inverse, values)
+            counts = np.bincount(inverse) * sign
+            totals, rows = self._totals[grain], self._counts[grain]
+            for key, total, count in zip(keys.tolist(), sums, counts.tolist()):
+                rows[key] = rows.get(key, 0) + count
+                if rows[key] <= 0:
+                    rows.pop(key)
+                    totals.pop(key, None)
+                else:
+                    totals[key] = totals.get(key, 0.0) + total
+
+    def remove(self, frame):
+        self.add(frame, sign=-1)
+
+    def table(self, grain):
+        """Totals for ``grain`` indexed by period key, oldest first."""
+        totals = self._totals[grain]
+        keys = sorted(totals)
+        return pd.DataFrame([totals[k] for k in keys], index=pd.Index(keys, name="key"),
+                            columns=self.measures, dtype=float)
+
+
+def _finish(stats, grain):
+    """Label periods and add ``Final_Profit`` to a table with a ``key`` column."""
+    stats.insert(stats.columns.get_loc("key"), "Period", [period_label(k, grain) for k in stats["key"]])
+    stats["Final_Profit"] = stats["Net_Profit"] - stats["Amount"]
+    return stats.drop(columns="key").reset_index(drop=True)
+
+
+def _joined(sales, expenses, grain):
+    return sales.table(grain).join(expenses.table(grain), how="outer").fillna(0.0).sort_index()
+
+
+def period_pnl(sales, expenses, grain):
+    """Combine sales and expense rollups into the Dashboard's P&L table."""
+    return _finish(_joined(sales, expenses, grain).reset_index(), grain)
+
+
+def stack_pnl(rollups, grain):
+    """Per-outlet P&L from ``{outlet: (sales_rollup, expense_rollup)}``.
+
+    Rows are ordered by period, then outlet, so charts keep periods in
+    chronological order.
+    """
+    columns = ["Outlet", "key"] + SALES_MEASURES + EXPENSE_MEASURES
+    frames = [_joined(sales, expenses, grain).reset_index().assign(Outlet=outlet)[columns]
+              for outlet, (sales, expenses) in rollups.items()]
+    stats = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return _finish(stats.sort_values(["key", "Outlet"], kind="stable"), grain)
+
+
+def _outlet_sums(frame, measures, grain):
+    """Sums of ``measures`` per (Outlet, period key), in one grouped pass."""
+    keys = pd.Series(_period_keys(frame["Date"], grain), index=frame.index, name="key", dtype="int64")
+    values = frame.reindex(columns=measures).astype(float).fillna(0.0)
+    sums = values.groupby([frame["Outlet"], keys], observed=True, sort=False).sum()
+    sums = sums.reset_index()
+    sums["Outlet"] = sums["Outlet"].astype(object)
+    return sums
+
+
+def outlet_pnl(sales, expenses, grain):
+    """Per-outlet, per-period P&L straight from multi-outlet ledger frames."""
+    stats = _outlet_sums(sales, SALES_MEASURES, grain).merge(
+        _outlet_sums(expenses, EXPENSE_MEASURES, grain), on=["Outlet", "key"], how="outer",
+    )
+    measures = SALES_MEASURES + EXPENSE_MEASURES
+    stats[measures] = stats[measures].fillna(0.0)
+    return _finish(stats.sort_values(["key", "Outlet"], kind="stable"), grain)
+
+
+def platform_split(sales):
+    """Qty, revenue and profit of a sales frame per (Outlet, Platform)."""
+    measures = ["Qty", "Revenue", "Comm_Paid", "Del_Cost", "Net_Profit"]
+    sums = sales[measures].groupby([sales["Outlet"], sales["Platform"]], observed=True, dropna=False).sum()
+    sums = sums.reset_index()
+    sums["Outlet"] = sums["Outlet"].astype(object)
+    sums["Platform"] = sums["Platform"].astype(object).fillna("Unknown")
+    return sums
+
+
+def contribution_ranking(stats):
+    """Outlets ranked by total profit, with their share of revenue and profit."""
+    totals = stats.groupby("Outlet", sort=False)[["Revenue", "Final_Profit"]].sum()
+    for col, share in (("Revenue", "Revenue_Share"), ("Final_Profit", "Profit_Share")):
+        whole = totals[col].sum()
+        totals[share] = totals[col] / whole if whole else 0.0
+    return totals.sort_values("Final_Profit", ascending=False).reset_index()
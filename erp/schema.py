@@ -0,0 +1,92 @@
+"""Declared schema of the row tables.
+
+Every column has one in-memory type: dimension columns (outlet, dish,
+platform, ...) are categoricals, ``Date`` is ``datetime64[ns]`` and money
+and quantity columns are ``float64``. Rows are checked and converted once,
+by :func:`validate`, when they are inserted; after that every page can rely
+on the dtypes without converting again.
+"""
+import pandas as pd
+
+SCHEMAS = {
+    "inventory": {
+        "id": "object", "Outlet": "category", "Item": "category", "Qty": "float64",
+        "Unit": "category", "Total_Cost": "float64", "Unit_Cost": "float64",
+    },
+    "sales": {
+        "id": "object", "Date": "datetime64[ns]", "Outlet": "category", "Dish": "category",
+        "Platform": "category", "Qty": "float64", "Revenue": "float64", "Comm_Paid": "float64",
+        "Del_Cost": "float64", "Ing_Cost": "float64", "Net_Profit": "float64",
+    },
+    "expenses": {
+        "id": "object", "Date": "datetime64[ns]", "Outlet": "category", "Category": "category",
+        "Amount": "float64", "Notes": "object",
+    },
+}
+
+# Columns that must be present and non-empty on insert.
+REQUIRED = {
+    "inventory": ["id", "Outlet", "Item"],
+    "sales": ["id", "Date", "Outlet", "Dish"],
+    "expenses": ["id", "Date", "Outlet"],
+}
+
+# Column layout of the row tables, in display order.
+TABLES = {table: list(columns) for table, columns in SCHEMAS.items()}
+
+
+class SchemaError(ValueError):
+    """Raised when rows do not fit a table's schema."""
+
+
+def conform(table, df):
+    """Cast an already-valid frame (e.g. read back from storage) to the schema dtypes."""
+    out = {}
+    for col, dtype in SCHEMAS[table].items():
+        values = df[col] if col in df else pd.Series(None, index=df.index, dtype=object)
+        if dtype == "datetime64[ns]":
+            out[col] = pd.to_datetime(values).astype(dtype)
+        elif dtype == "float64":
+            out[col] = pd.to_numeric(values).fillna(0.0).astype(dtype)
+        elif dtype == "category":
+            out[col] = values.astype("category")
+        else:
+            out[col] = values.astype(object)
+    return pd.DataFrame(out, index=df.index)
+
+
+def validate(table, rows):
+    """Check ``rows`` (dict, list of dicts or DataFrame) and return a typed frame.
+
+    Unknown columns, missing required values, unreadable dates and
+    non-numeric amounts raise :class:`SchemaError`. Optional numeric columns
+    default to 0, except a stock lot's ``Unit_Cost``, which is its purchase
+    price per unit (``Total_Cost / Qty``) unless given.
+    """
+    if isinstance(rows, dict):
+        rows = [rows]
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    schema = SCHEMAS[table]
+    unknown = [c for c in df.columns if c not in schema]
+    if unknown:
+        raise SchemaError(f"Unknown column(s) for {table}: {', '.join(map(str, unknown))}")
+    for col in REQUIRED[table]:
+        if col not in df or df[col].isna().any() or (df[col].astype(str).str.strip() == "").any():
+            raise SchemaError(f"{table}.{col} is required")
+    for col, dtype in schema.items():
+        if col not in df:
+            continue
+        if dtype == "datetime64[ns]":
+            parsed = pd.to_datetime(df[col], errors="coerce")
+            if parsed.isna().any():
+                raise SchemaError(f"{table}.{col} has unreadable dates")
+            df = df.assign(**{col: parsed.dt.normalize()})
+        elif dtype == "float64":
+            parsed = pd.to_numeric(df[col], errors="coerce")
+            if (parsed.isna() & df[col].notna()).any():
+                raise SchemaError(f"{table}.{col} must be numeric")
+    df = conform(table, df)
+    if table == "inventory":
+        unpriced = (df["Unit_Cost"] <= 0) & (df["Qty"] > 0)
+        df.loc[unpriced, "Unit_Cost"] = df.loc[unpriced, "Total_Cost"] / df.loc[unpriced, "Qty"]
+    return df
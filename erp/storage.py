@@ -0,0 +1,1674 @@
+"""Durable storage for the Cloud K ERP.
+
+Pages talk to a :class:`Storage` object instead of holding whole DataFrames
+in ``st.session_state``. Every read is scoped (by outlet and, for ledgers, by
+date) so a rerun only pulls the rows it actually renders.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from erp import journal
+from erp.costing import CostingEngine, stock_prices
+from erp.forecast import DishDemand, forecast
+from erp.inventory import StockIndex
+from erp.ledger import Ledger, MonthlyLedger, month_span
+from erp.pricing import INPUTS
+from erp.rollups import (EXPENSE_MEASURES, SALES_MEASURES, PeriodRollup, outlet_pnl, period_pnl,
+                         platform_split, stack_pnl)
+from erp.schema import SCHEMAS, TABLES, SchemaError, conform, validate
+from erp.settlement import RATE_COLUMNS
+
+DEFAULT_OUTLETS = [
+    "The Home Plate", "No Cap Burgers", "Pocket Pizzaz", "Witx Sandwitx",
+    "Hello Momos", "Khushi Breakfast Club", "Bihar ka Swad",
+]
+
+ROLLUP_MEASURES = {"sales": SALES_MEASURES, "expenses": EXPENSE_MEASURES}
+PARTITIONED = ("sales", "expenses")  # dated tables, cached as one ledger partition per month
+
+# A compacted snapshot is taken after this many journal entries; older ones beyond
+# KEEP_SNAPSHOTS are dropped together with the journal entries they cover.
+SNAPSHOT_EVERY = int(os.environ.get("CLOUDK_SNAPSHOT_EVERY", 5000))
+KEEP_SNAPSHOTS = int(os.environ.get("CLOUDK_KEEP_SNAPSHOTS", 3))
+
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+MIGRATIONS = [
+    """
+    CREATE TABLE outlets (
+        name TEXT PRIMARY KEY,
+        position INTEGER NOT NULL
+    );
+    CREATE TABLE inventory (
+        id TEXT PRIMARY KEY,
+        Outlet TEXT NOT NULL,
+        Item TEXT NOT NULL,
+        Qty REAL NOT NULL DEFAULT 0,
+        Unit TEXT,
+        Total_Cost REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX ix_inventory_outlet_item ON inventory (Outlet, Item);
+    CREATE TABLE sales (
+        id TEXT PRIMARY KEY,
+        Date TEXT NOT NULL,
+        Outlet TEXT NOT NULL,
+        Dish TEXT NOT NULL,
+        Platform TEXT,
+        Qty REAL NOT NULL DEFAULT 0,
+        Revenue REAL NOT NULL DEFAULT 0,
+        Comm_Paid REAL NOT NULL DEFAULT 0,
+        Del_Cost REAL NOT NULL DEFAULT 0,
+        Ing_Cost REAL NOT NULL DEFAULT 0,
+        Net_Profit REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX ix_sales_outlet_date ON sales (Outlet, Date);
+    CREATE TABLE expenses (
+        id TEXT PRIMARY KEY,
+        Date TEXT NOT NULL,
+        Outlet TEXT NOT NULL,
+        Category TEXT,
+        Amount REAL NOT NULL DEFAULT 0,
+        Notes TEXT
+    );
+    CREATE INDEX ix_expenses_outlet_date ON expenses (Outlet, Date);
+    CREATE TABLE recipes (
+        Dish TEXT NOT NULL,
+        Item TEXT NOT NULL,
+        Qty REAL NOT NULL,
+        PRIMARY KEY (Dish, Item)
+    );
+    CREATE TABLE menu_prices (
+        Dish TEXT PRIMARY KEY,
+        Cost REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE platforms (
+        Outlet TEXT NOT NULL,
+        Platform TEXT NOT NULL,
+        comm REAL NOT NULL DEFAULT 0,
+        del REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (Outlet, Platform)
+    );
+    """,
+    journal.DDL,
+    """
+    CREATE TABLE platform_rates (
+        Outlet TEXT NOT NULL,
+        Platform TEXT NOT NULL,
+        Effective TEXT NOT NULL,
+        comm REAL NOT NULL DEFAULT 0,
+        del REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (Outlet, Platform, Effective)
+    );
+    """,
+    # Outlets, dishes and platforms become dimension tables with integer ids; every other
+    # table refers to them by id. Rows of outlets deleted before this version are kept as
+    # archived outlets. Older journal entries describe the old layout and are dropped.
+    """
+    CREATE TABLE outlets_v4 (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        position INTEGER NOT NULL,
+        archived INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT INTO outlets_v4 (name, position) SELECT name, position FROM outlets ORDER BY position;
+    INSERT INTO outlets_v4 (name, position, archived)
+        SELECT Outlet, -1, 1 FROM (
+            SELECT Outlet FROM inventory UNION SELECT Outlet FROM sales UNION SELECT Outlet FROM expenses
+            UNION SELECT Outlet FROM platforms UNION SELECT Outlet FROM platform_rates
+        ) WHERE Outlet NOT IN (SELECT name FROM outlets);
+    CREATE TABLE dishes (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    INSERT INTO dishes (name)
+        SELECT Dish FROM recipes UNION SELECT Dish FROM menu_prices UNION SELECT Dish FROM sales;
+    CREATE TABLE platforms_v4 (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    INSERT INTO platforms_v4 (name)
+        SELECT Platform FROM platforms UNION SELECT Platform FROM platform_rates
+        UNION SELECT Platform FROM sales WHERE Platform IS NOT NULL;
+
+    CREATE TABLE inventory_v4 (
+        id TEXT PRIMARY KEY,
+        outlet_id INTEGER NOT NULL,
+        Item TEXT NOT NULL,
+        Qty REAL NOT NULL DEFAULT 0,
+        Unit TEXT,
+        Total_Cost REAL NOT NULL DEFAULT 0
+    );
+    INSERT INTO inventory_v4 (rowid, id, outlet_id, Item, Qty, Unit, Total_Cost)
+        SELECT t.rowid, t.id, o.id, t.Item, t.Qty, t.Unit, t.Total_Cost
+        FROM inventory t JOIN outlets_v4 o ON o.name = t.Outlet;
+    CREATE TABLE sales_v4 (
+        id TEXT PRIMARY KEY,
+        Date TEXT NOT NULL,
+        outlet_id INTEGER NOT NULL,
+        dish_id INTEGER NOT NULL,
+        platform_id INTEGER,
+        Qty REAL NOT NULL DEFAULT 0,
+        Revenue REAL NOT NULL DEFAULT 0,
+        Comm_Paid REAL NOT NULL DEFAULT 0,
+        Del_Cost REAL NOT NULL DEFAULT 0,
+        Ing_Cost REAL NOT NULL DEFAULT 0,
+        Net_Profit REAL NOT NULL DEFAULT 0
+    );
+    INSERT INTO sales_v4 (rowid, id, Date, outlet_id, dish_id, platform_id, Qty, Revenue, Comm_Paid,
+                          Del_Cost, Ing_Cost, Net_Profit)
+        SELECT t.rowid, t.id, t.Date, o.id, d.id, p.id, t.Qty, t.Revenue, t.Comm_Paid,
+               t.Del_Cost, t.Ing_Cost, t.Net_Profit
+        FROM sales t JOIN outlets_v4 o ON o.name = t.Outlet JOIN dishes d ON d.name = t.Dish
+        LEFT JOIN platforms_v4 p ON p.name = t.Platform;
+    CREATE TABLE expenses_v4 (
+        id TEXT PRIMARY KEY,
+        Date TEXT NOT NULL,
+        outlet_id INTEGER NOT NULL,
+        Category TEXT,
+        Amount REAL NOT NULL DEFAULT 0,
+        Notes TEXT
+    );
+    INSERT INTO expenses_v4 (rowid, id, Date, outlet_id, Category, Amount, Notes)
+        SELECT t.rowid, t.id, t.Date, o.id, t.Category, t.Amount, t.Notes
+        FROM expenses t JOIN outlets_v4 o ON o.name = t.Outlet;
+    CREATE TABLE recipes_v4 (
+        dish_id INTEGER NOT NULL,
+        Item TEXT NOT NULL,
+        Qty REAL NOT NULL,
+        PRIMARY KEY (dish_id, Item)
+    );
+    INSERT INTO recipes_v4 (rowid, dish_id, Item, Qty)
+        SELECT t.rowid, d.id, t.Item, t.Qty FROM recipes t JOIN dishes d ON d.name = t.Dish;
+    CREATE TABLE menu_prices_v4 (
+        dish_id INTEGER NOT NULL PRIMARY KEY,
+        Cost REAL NOT NULL DEFAULT 0
+    );
+    INSERT INTO menu_prices_v4 (dish_id, Cost)
+        SELECT d.id, t.Cost FROM menu_prices t JOIN dishes d ON d.name = t.Dish;
+    CREATE TABLE outlet_platforms (
+        outlet_id INTEGER NOT NULL,
+        platform_id INTEGER NOT NULL,
+        comm REAL NOT NULL DEFAULT 0,
+        del REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (outlet_id, platform_id)
+    );
+    INSERT INTO outlet_platforms (rowid, outlet_id, platform_id, comm, del)
+        SELECT t.rowid, o.id, p.id, t.comm, t.del
+        FROM platforms t JOIN outlets_v4 o ON o.name = t.Outlet JOIN platforms_v4 p ON p.name = t.Platform;
+    CREATE TABLE platform_rates_v4 (
+        outlet_id INTEGER NOT NULL,
+        platform_id INTEGER NOT NULL,
+        Effective TEXT NOT NULL,
+        comm REAL NOT NULL DEFAULT 0,
+        del REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (outlet_id, platform_id, Effective)
+    );
+    INSERT INTO platform_rates_v4 (outlet_id, platform_id, Effective, comm, del)
+        SELECT o.id, p.id, t.Effective, t.comm, t.del
+        FROM platform_rates t JOIN outlets_v4 o ON o.name = t.Outlet JOIN platforms_v4 p ON p.name = t.Platform;
+
+    DROP TABLE inventory;
+    DROP TABLE sales;
+    DROP TABLE expenses;
+    DROP TABLE recipes;
+    DROP TABLE menu_prices;
+    DROP TABLE platform_rates;
+    DROP TABLE platforms;
+    DROP TABLE outlets;
+    ALTER TABLE outlets_v4 RENAME TO outlets;
+    ALTER TABLE platforms_v4 RENAME TO platforms;
+    ALTER TABLE inventory_v4 RENAME TO inventory;
+    ALTER TABLE sales_v4 RENAME TO sales;
+    ALTER TABLE expenses_v4 RENAME TO expenses;
+    ALTER TABLE recipes_v4 RENAME TO recipes;
+    ALTER TABLE menu_prices_v4 RENAME TO menu_prices;
+    ALTER TABLE platform_rates_v4 RENAME TO platform_rates;
+    CREATE INDEX ix_inventory_outlet_item ON inventory (outlet_id, Item);
+    CREATE INDEX ix_sales_outlet_date ON sales (outlet_id, Date);
+    CREATE INDEX ix_expenses_outlet_date ON expenses (outlet_id, Date);
+    DELETE FROM journal;
+    """,
+    """
+    CREATE TABLE dish_pricing (
+        outlet_id INTEGER NOT NULL,
+        dish_id INTEGER NOT NULL,
+        comm REAL NOT NULL DEFAULT 0,
+        adv REAL NOT NULL DEFAULT 0,
+        misc REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (outlet_id, dish_id)
+    );
+    """,
+    # Each lot keeps its purchase price per unit, so an item's cost is still known once its
+    # lots are used up. Lots emptied before this version have no price left to recover.
+    """
+    ALTER TABLE inventory ADD COLUMN Unit_Cost REAL NOT NULL DEFAULT 0;
+    UPDATE inventory SET Unit_Cost = Total_Cost / Qty WHERE Qty > 0;
+    """,
+]
+
+# Name columns of the row tables that are stored as ids: column -> (key column, dimension table)
+DIMENSIONS = {
+    "Outlet": ("outlet_id", "outlets"),
+    "Dish": ("dish_id", "dishes"),
+    "Platform": ("platform_id", "platforms"),
+}
+
+
+def _to_sql(value):
+    """Convert pandas/datetime values into something sqlite3 can bind."""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+
+class Storage:
+    """Interface every storage backend implements.
+
+    Row tables (``inventory``, ``sales``, ``expenses``) are exchanged as
+    DataFrames typed by :data:`~erp.schema.SCHEMAS`; the small config tables
+    (outlets, recipes, menu prices, platforms) as plain Python containers.
+    Outlets, dishes and platforms are always named, whatever the backend
+    keys them by.
+    """
+
+    # --- outlets ---
+    def outlets(self):
+        raise NotImplementedError
+
+    def archived_outlets(self):
+        """Deleted outlets whose rows were kept; adding one by name again restores it."""
+        raise NotImplementedError
+
+    def add_outlet(self, name):
+        raise NotImplementedError
+
+    def rename_outlet(self, old, new):
+        raise NotImplementedError
+
+    def delete_outlet(self, name, purge=False):
+        """Archive an outlet (its rows are kept but hidden), or with ``purge`` delete it and all its rows."""
+        raise NotImplementedError
+
+    # --- row tables ---
+    def query(self, table, outlet=None, start=None, end=None, items=None):
+        raise NotImplementedError
+
+    def insert(self, table, rows):
+        raise NotImplementedError
+
+    def update(self, table, row_id, values):
+        raise NotImplementedError
+
+    def delete(self, table, ids):
+        raise NotImplementedError
+
+    def update_many(self, table, outlet, rows):
+        """Overwrite columns of many of ``outlet``'s rows; ``rows`` has an ``id`` column plus those columns."""
+        with self.transaction():
+            for row in rows.to_dict("records"):
+                self.update(table, row.pop("id"), row)
+
+    def page(self, table, outlet, sort_by, descending=False, offset=0, limit=50, start=None, end=None):
+        """One sorted page of an outlet's rows (dated ``start``..``end``, if given), plus how many there are."""
+        df = self.query(table, outlet=outlet, start=start, end=end)
+        # By value (not category code), empty values first as SQLite sorts NULLs; descending is the exact reverse
+        values = pd.Series(df[sort_by].to_numpy(dtype=object), copy=False)
+        order = values.sort_values(kind="stable", na_position="first").index.to_numpy()
+        if descending:
+            order = order[::-1]
+        return df.iloc[order[offset:offset + limit]], len(df)
+
+    def consume_stock(self, outlet, demand, dry_run=False):
+        """Draw ``demand`` (item -> qty) from ``outlet``'s lots, oldest first.
+
+        Returns the cost of the stock consumed. Raises
+        :class:`~erp.inventory.InsufficientStock` (and writes nothing) if any
+        item falls short; ``dry_run`` only checks and prices the draw-down.
+        """
+        with self.transaction():
+            index = StockIndex(self.query("inventory", outlet=outlet, items=demand.keys()))
+            changes, cost = index.plan(demand)
+            if not dry_run:
+                for lot_id, values in changes.items():
+                    self.update("inventory", lot_id, values)
+        return cost
+
+    def outlet_lock(self, outlet):
+        """Lock serializing writes to one outlet's rows across threads.
+
+        Transactions already serialize a single backend, so this is a no-op
+        here; :class:`CachedStorage` returns a real per-outlet lock.
+        """
+        return nullcontext()
+
+    @contextmanager
+    def outlet_locks(self, outlets):
+        """Hold :meth:`outlet_lock` for several outlets, always taken in the same order."""
+        with ExitStack() as stack:
+            for outlet in sorted(set(outlets)):
+                stack.enter_context(self.outlet_lock(outlet))
+            yield
+
+    def period_totals(self, outlet, grain, start=None, end=None):
+        """Per-period P&L for one outlet (``grain`` is ``"month"`` or ``"year"``).
+
+        ``start`` and ``end`` limit it to the rows dated in that range.
+        """
+        rollups = {}
+        for table, measures in ROLLUP_MEASURES.items():
+            rollups[table] = PeriodRollup(measures)
+            rollups[table].add(self.query(table, outlet=outlet, start=start, end=end))
+        return period_pnl(rollups["sales"], rollups["expenses"], grain)
+
+    def outlet_totals(self, grain, outlets=None, start=None, end=None):
+        """Per-outlet, per-period P&L for ``outlets`` (default: all open outlets), optionally of ``start``..``end``."""
+        outlets = self.outlets() if outlets is None else list(outlets)
+        sales, expenses = (self.query(table, start=start, end=end) for table in ("sales", "expenses"))
+        return outlet_pnl(sales[sales["Outlet"].isin(outlets)], expenses[expenses["Outlet"].isin(outlets)], grain)
+
+    def platform_totals(self, outlets=None, start=None, end=None):
+        """Sales totals per outlet and platform, optionally of ``start``..``end``."""
+        outlets = self.outlets() if outlets is None else list(outlets)
+        sales = self.query("sales", start=start, end=end)
+        return platform_split(sales[sales["Outlet"].isin(outlets)])
+
+    # --- recipes & pricing ---
+    def recipes(self):
+        raise NotImplementedError
+
+    def menu_prices(self):
+        raise NotImplementedError
+
+    def dishes(self):
+        """Every dish name known, including ones only left in the sales history."""
+        raise NotImplementedError
+
+    def save_recipe(self, dish, recipe, cost):
+        raise NotImplementedError
+
+    def delete_recipe(self, dish):
+        raise NotImplementedError
+
+    def rename_dish(self, old, new):
+        """Rename a dish in the recipe book, menu prices and sales history."""
+        raise NotImplementedError
+
+    def dish_pricing(self, outlet):
+        """``outlet``'s per-unit pricing :data:`~erp.pricing.INPUTS`, indexed by dish (dishes with none left out)."""
+        raise NotImplementedError
+
+    def set_dish_pricing(self, outlet, inputs):
+        """Store pricing inputs (a frame indexed by dish) for ``outlet``; all-zero rows are cleared."""
+        raise NotImplementedError
+
+    def unit_costs(self, outlet):
+        """Unit and average unit cost of each stock item at ``outlet``."""
+        return stock_prices(self.query("inventory", outlet=outlet))
+
+    def dish_costs(self, outlet):
+        """Live production cost of every recipe priced at ``outlet``'s stock costs."""
+        engine = CostingEngine(self.recipes())
+        engine.set_prices(outlet, self.unit_costs(outlet)["Unit_Cost"])
+        return engine.dish_costs(outlet)
+
+    def stock_levels(self, outlet):
+        """On-hand quantity, unit and average unit cost of each item at ``outlet``."""
+        on_hand = self.query("inventory", outlet=outlet).groupby("Item", observed=True)["Qty"].sum()
+        on_hand.index = on_hand.index.astype(object)
+        levels = self.unit_costs(outlet)
+        return levels.assign(On_Hand=on_hand.reindex(levels.index, fill_value=0.0))
+
+    def stock_forecast(self, outlet, **options):
+        """Burn rates, cover and purchase suggestions for ``outlet`` (see :func:`erp.forecast.forecast`)."""
+        demand = DishDemand()
+        demand.add(self.query("sales", outlet=outlet))
+        return forecast(demand, self.recipes(), self.stock_levels(outlet), **options)
+
+    # --- outlet configs ---
+    def platforms(self, outlet):
+        raise NotImplementedError
+
+    def set_platform(self, outlet, platform, comm, delivery):
+        raise NotImplementedError
+
+    def delete_platform(self, outlet, platform):
+        raise NotImplementedError
+
+    def rate_schedule(self, outlets=None):
+        """Base and dated platform rates of ``outlets`` (default: all) as a DataFrame.
+
+        Columns are :data:`~erp.settlement.RATE_COLUMNS`; ``Effective`` is
+        ``NaT`` for a platform's base rate.
+        """
+        raise NotImplementedError
+
+    def set_platform_rate(self, outlet, platform, effective, comm, delivery):
+        """Change a linked platform's rates from the date ``effective`` on."""
+        raise NotImplementedError
+
+    def delete_platform_rate(self, outlet, platform, effective):
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes so they land together or not at all."""
+        raise NotImplementedError
+
+    def data_version(self):
+        """Token that changes when another process commits (``None`` if unknown)."""
+        return None
+
+    def revision(self):
+        """Token that changes whenever any process commits a change (for keying cached page results)."""
+        raise NotImplementedError
+
+    def row_counts(self):
+        """``{table: {outlet: rows}}`` for the row tables."""
+        return {table: self.query(table)["Outlet"].value_counts().to_dict() for table in TABLES}
+
+    # --- history ---
+    def history(self, limit=100):
+        """The latest ``limit`` journal entries (seq, ts, op, summary), newest first."""
+        raise NotImplementedError
+
+    def undo_to(self, seq):
+        """Undo every journaled change after entry ``seq``; returns how many entries were undone."""
+        raise NotImplementedError
+
+    def snapshot(self):
+        """Write a compacted snapshot of the current data; returns its path."""
+        raise NotImplementedError
+
+    def export_database(self):
+        """The whole database as the bytes of a SQLite file."""
+        raise NotImplementedError
+
+    def import_database(self, path):
+        """Replace all data with the SQLite file at ``path`` (undoable like any change)."""
+        raise NotImplementedError
+
+
+class SQLiteStorage(Storage):
+    """Single-file SQLite backend.
+
+    Outlets, dishes and platforms live in small dimension tables; every
+    other table stores their integer ids, so renaming one is a single-row
+    update and reads join the names back in. Ledger tables are indexed on
+    (outlet id, Date) and inventory on (outlet id, Item), which are the
+    only access paths the pages use.
+
+    Every transaction also appends one entry to the :mod:`~erp.journal`
+    (before/after images of the rows it changed), committed together with
+    the change itself. Every ``snapshot_every`` entries a compacted snapshot
+    is written to ``<path>.snapshots``.
+
+    Writes go through one connection, held by a single thread's transaction
+    at a time. Reads from any other thread use a second connection and see
+    the last committed data (WAL lets them run alongside the open
+    transaction), so they never wait for it to finish.
+    """
+
+    def __init__(self, path, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_dir = journal.snapshot_dir(path)
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()       # the write connection
+        self._read_lock = threading.RLock()  # the read connection
+        self._writer = None  # thread holding the open transaction
+        self._reader = None
+        self._depth = 0
+        self._pending = []  # journal entries of the open transaction
+        self._snapshot_seq = None  # journal seq of the newest snapshot, once migrated
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        upgraded = self._migrate()
+        if path != ":memory:":  # a second in-memory connection would be another database
+            self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        taken = journal.snapshots(self.snapshot_dir)
+        self._snapshot_seq = taken[-1][0] if taken else 0
+        if (upgraded or not taken) and self._snapshots_enabled():
+            # The base journal.restore replays from; older snapshots have the old layout
+            self.snapshot()
+
+    def _migrate(self):
+        """Bring the file up to the current schema; returns whether existing data was upgraded."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            with self.transaction():
+                for statement in script.split(";"):
+                    if statement.strip():
+                        self._conn.execute(statement)
+                self._conn.execute(f"PRAGMA user_version = {number}")
+        if version == 0:
+            with self.transaction():
+                for name in DEFAULT_OUTLETS:
+                    self.add_outlet(name)
+        return 0 < version < len(MIGRATIONS)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                # Take the write lock up front, so nothing commits between our reads and writes
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._pending = []
+                self._writer = threading.get_ident()
+            self._depth += 1
+            try:
+                yield self
+                if outermost:
+                    self._flush_journal()
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._pending = []
+                    self._writer = None
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self._writer = None
+                self._conn.execute("COMMIT")
+                self._maybe_snapshot()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    @contextmanager
+    def _reading(self):
+        """Connection for a consistent read.
+
+        Inside this thread's own transaction that is the write connection,
+        so the read sees the transaction's changes; otherwise it is the read
+        connection, in a read transaction of its own (nested reads share it).
+        """
+        if self._reader is None or self._writer == threading.get_ident():
+            with self._lock:
+                yield self._conn
+            return
+        with self._read_lock:
+            outermost = not self._reader.in_transaction
+            if outermost:
+                self._reader.execute("BEGIN")
+            try:
+                yield self._reader
+            finally:
+                if outermost:
+                    self._reader.execute("COMMIT")
+
+    def _read(self, sql, params=()):
+        with self._reading() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _rows(self, table, where, params=()):
+        """``(columns, rows)`` of ``table`` matching ``where``, as stored.
+
+        The rowid is included so an undone delete puts rows back where they
+        were (inventory lots are consumed in rowid order).
+        """
+        cursor = self._conn.execute(f"SELECT rowid, * FROM {table} WHERE {where}", params)
+        columns, rows = [d[0] for d in cursor.description], cursor.fetchall()
+        if columns[0] in columns[1:]:  # the rowid is an INTEGER PRIMARY KEY column already
+            return columns[1:], [row[1:] for row in rows]
+        return columns, rows
+
+    def _log(self, op, payload, note=""):
+        """Queue a journal entry; it is written just before the transaction commits."""
+        self._pending.append((op, payload, note))
+
+    def _log_rows(self, table, columns, before=(), after=()):
+        if before or after:
+            self._log("rows", {"changes": [journal.change(table, columns, before, after)]})
+
+    def _flush_journal(self):
+        # One entry per transaction, so a sale (lines plus stock draw-down) is undone as a unit
+        merged = []
+        for op, payload, note in self._pending:
+            if op == "rows" and merged and merged[-1][0] == "rows" and not note and not merged[-1][2]:
+                merged[-1][1]["changes"].extend(payload["changes"])
+            else:
+                merged.append((op, payload, note))
+        self._pending = []
+        for op, payload, note in merged:
+            journal.record(self._conn, op, payload, note)
+
+    def _snapshots_enabled(self):
+        return bool(self.snapshot_every) and self.path != ":memory:"
+
+    def _maybe_snapshot(self):
+        if self._snapshot_seq is None or not self._snapshots_enabled():
+            return
+        if journal.last_seq(self._conn) - self._snapshot_seq >= self.snapshot_every:
+            self.snapshot()
+
+    def close(self):
+        with self._lock, self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+            self._conn.close()
+
+    def row_counts(self):
+        return {table: dict(self._read(f"SELECT outlets.name, COUNT(*) FROM {table} t "
+                                       "JOIN outlets ON outlets.id = t.outlet_id GROUP BY t.outlet_id"))
+                for table in TABLES}
+
+    def data_version(self):
+        # Bumped by SQLite whenever another connection (e.g. the JSON API) commits. Asked of
+        # the write connection, which our own commits leave alone, but without its lock: the
+        # sqlite3 module serializes calls on a shared connection, and polling must not wait
+        # for another thread's transaction
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def revision(self):
+        # Every committed change is journaled, and the journal's seq never goes back
+        with self._reading() as conn:
+            return journal.last_seq(conn)
+
+    # --- dimensions ---
+    def _keys(self, dimension, names, create=False):
+        """``{name: id}`` of ``names`` in a dimension table; ``create`` adds (and journals) missing names."""
+        names = list({name for name in names if name is not None})
+        if not names:
+            return {}
+        marks = ", ".join("?" * len(names))
+        found = dict(self._read(f"SELECT name, id FROM {dimension} WHERE name IN ({marks})", names))
+        missing = [name for name in names if name not in found]
+        if missing and create:
+            with self.transaction():
+                self._conn.executemany(f"INSERT INTO {dimension} (name) VALUES (?)", [(name,) for name in missing])
+                columns, after = self._rows(dimension, f"name IN ({', '.join('?' * len(missing))})", missing)
+                self._log_rows(dimension, columns, after=after)
+            found.update((row[columns.index("name")], row[columns.index("id")]) for row in after)
+        return found
+
+    def _outlet_id(self, name, required=False):
+        rows = self._read("SELECT id FROM outlets WHERE name = ?", (name,))
+        if not rows and required:
+            raise SchemaError(f"Unknown outlet {name!r}")
+        return rows[0][0] if rows else None
+
+    def _stored(self, columns):
+        """Storage column names for ``columns`` of a row table (names become id keys)."""
+        return [DIMENSIONS[c][0] if c in DIMENSIONS else c for c in columns]
+
+    def _encoded(self, columns, rows):
+        """``rows`` (dicts) as tuples ready to bind, with outlet, dish and platform names swapped for ids.
+
+        Dishes and platforms seen for the first time are added; an unknown
+        outlet raises :class:`~erp.schema.SchemaError`.
+        """
+        lookups = {}
+        for column in columns:
+            if column in DIMENSIONS:
+                names = {_to_sql(row.get(column)) for row in rows}
+                lookups[column] = self._keys(DIMENSIONS[column][1], names, create=column != "Outlet")
+                unknown = names - set(lookups[column]) - {None}
+                if unknown:
+                    raise SchemaError(f"Unknown outlet(s): {', '.join(sorted(map(str, unknown)))}")
+        return [tuple(lookups[c].get(_to_sql(row.get(c))) if c in lookups else _to_sql(row.get(c)) for c in columns)
+                for row in rows]
+
+    def _labels(self, dimension, ids):
+        """Names for a column of ``dimension`` ids, as a categorical (missing ids become NaN)."""
+        rows = self._read(f"SELECT id, name FROM {dimension} ORDER BY name")
+        keys, names = [row[0] for row in rows], [row[1] for row in rows]
+        codes = pd.Index(keys, dtype=np.int64).get_indexer(ids.fillna(-1).astype(np.int64))
+        return pd.Categorical.from_codes(codes, categories=list(names)).remove_unused_categories()
+
+    def _select(self, table):
+        """``SELECT`` of a row table's schema columns (as ``t``), with ids joined back to names."""
+        fields, joins = [], []
+        for column in TABLES[table]:
+            if column in DIMENSIONS:
+                key, dimension = DIMENSIONS[column]
+                fields.append(f"{dimension}.name AS {column}")
+                joins.append(f"LEFT JOIN {dimension} ON {dimension}.id = t.{key}")
+            else:
+                fields.append(f"t.{column}")
+        return f"SELECT {', '.join(fields)} FROM {table} t {' '.join(joins)}"
+
+    # --- outlets ---
+    def outlets(self):
+        rows = self._read("SELECT name FROM outlets WHERE NOT archived ORDER BY position")
+        return [r[0] for r in rows]
+
+    def archived_outlets(self):
+        return [r[0] for r in self._read("SELECT name FROM outlets WHERE archived ORDER BY name")]
+
+    def add_outlet(self, name):
+        with self.transaction():
+            columns, before = self._rows("outlets", "name = ?", (name,))
+            if before:
+                # An archived outlet comes back with its history, at the end of the list
+                self._execute(
+                    "UPDATE outlets SET archived = 0, position = "
+                    "(SELECT COALESCE(MAX(position), -1) + 1 FROM outlets WHERE NOT archived) WHERE name = ?", (name,)
+                )
+            else:
+                self._execute(
+                    "INSERT INTO outlets (name, position) "
+                    "SELECT ?, COALESCE(MAX(position), -1) + 1 FROM outlets WHERE NOT archived", (name,)
+                )
+            self._log_rows("outlets", columns, before, self._rows("outlets", "name = ?", (name,))[1])
+
+    def rename_outlet(self, old, new):
+        with self.transaction():
+            columns, before = self._rows("outlets", "name = ?", (old,))
+            # Every other table refers to the outlet by id, so this is the only row that changes
+            self._execute("UPDATE outlets SET name = ? WHERE name = ?", (new, old))
+            after = self._rows("outlets", "name = ?", (new,))[1]
+            self._log("rows", {"changes": [journal.change("outlets", columns, before, after)]},
+                      note=f"rename {old} -> {new}")
+
+    def delete_outlet(self, name, purge=False):
+        outlet_id = self._outlet_id(name)
+        if outlet_id is None:
+            return
+        with self.transaction():
+            columns, before = self._rows("outlets", "id = ?", (outlet_id,))
+            if purge:
+                for table in (*TABLES, "outlet_platforms", "platform_rates", "dish_pricing"):
+                    names, rows = self._rows(table, "outlet_id = ?", (outlet_id,))
+                    self._execute(f"DELETE FROM {table} WHERE outlet_id = ?", (outlet_id,))
+                    self._log_rows(table, names, before=rows)
+                self._execute("DELETE FROM outlets WHERE id = ?", (outlet_id,))
+            else:
+                self._execute("UPDATE outlets SET archived = 1 WHERE id = ?", (outlet_id,))
+            self._log_rows("outlets", columns, before, self._rows("outlets", "id = ?", (outlet_id,))[1])
+
+    # --- row tables ---
+    def query(self, table, outlet=None, start=None, end=None, items=None):
+        clauses, params = [], []
+        if outlet is not None:
+            clauses.append("t.outlet_id = ?")
+            params.append(self._outlet_id(outlet))
+        if start is not None:
+            clauses.append("t.Date >= ?")
+            params.append(_to_sql(start))
+        if end is not None:
+            clauses.append("t.Date <= ?")
+            params.append(_to_sql(end))
+        if items is not None:
+            items = list(items)
+            clauses.append(f"t.Item IN ({', '.join('?' * len(items))})")
+            params.extend(items)
+        sql = f"SELECT {', '.join(self._stored(TABLES[table]))} FROM {table} t"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if table == "inventory":
+            sql += " ORDER BY t.rowid"  # lots in purchase order, for FIFO
+        with self._reading() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+            # Ids map straight to category codes, so names are never compared row by row
+            for column in TABLES[table]:
+                if column in DIMENSIONS:
+                    key, dimension = DIMENSIONS[column]
+                    df[column] = self._labels(dimension, df.pop(key))
+        return conform(table, df)
+
+    def page(self, table, outlet, sort_by, descending=False, offset=0, limit=50, start=None, end=None):
+        if sort_by not in TABLES[table]:
+            raise ValueError(f"Unknown column {sort_by!r} for {table}")
+        direction = "DESC" if descending else "ASC"
+        order = f"{DIMENSIONS[sort_by][1]}.name" if sort_by in DIMENSIONS else f"t.{sort_by}"
+        where, params = "t.outlet_id = ?", [None]
+        for bound, op in ((start, ">="), (end, "<=")):
+            if bound is not None:
+                where += f" AND t.Date {op} ?"
+                params.append(_to_sql(bound))
+        with self._reading() as conn:
+            params[0] = self._outlet_id(outlet)
+            df = pd.read_sql_query(
+                f"{self._select(table)} WHERE {where} "
+                f"ORDER BY {order} {direction}, t.rowid {direction} LIMIT ? OFFSET ?",
+                conn, params=params + [limit, offset],
+            )
+            total = conn.execute(f"SELECT COUNT(*) FROM {table} t WHERE {where}", params).fetchone()[0]
+        return conform(table, df), total
+
+    def insert(self, table, rows):
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.to_dict("records")
+        elif isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            return
+        # Columns a caller leaves out fall back to the schema defaults
+        present = set().union(*rows)
+        columns = [c for c in TABLES[table] if c in present]
+        stored = self._stored(columns)
+        sql = (f"INSERT INTO {table} ({', '.join(stored)}) "
+               f"VALUES ({', '.join('?' * len(stored))})")
+        with self.transaction():
+            values = self._encoded(columns, rows)
+            self._conn.executemany(sql, values)
+            self._log_rows(table, stored, after=values)
+
+    def update(self, table, row_id, values):
+        assignments = ", ".join(f"{c} = ?" for c in self._stored(values))
+        with self.transaction():
+            params = list(self._encoded(list(values), [values])[0]) + [row_id]
+            columns, before = self._rows(table, "id = ?", (row_id,))
+            self._execute(f"UPDATE {table} SET {assignments} WHERE id = ?", params)
+            self._log_rows(table, columns, before, self._rows(table, "id = ?", (row_id,))[1])
+
+    def delete(self, table, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        where = f"id IN ({', '.join('?' * len(ids))})"
+        with self.transaction():
+            columns, before = self._rows(table, where, ids)
+            self._execute(f"DELETE FROM {table} WHERE {where}", ids)
+            self._log_rows(table, columns, before=before)
+
+    def update_many(self, table, outlet, rows):
+        ids = rows["id"].tolist()
+        if not ids:
+            return
+        columns = [c for c in rows.columns if c != "id"]
+        assignments = ", ".join(f"{c} = ?" for c in self._stored(columns))
+        sql = f"UPDATE {table} SET {assignments} WHERE id = ? AND outlet_id = ?"
+        chunks = [ids[i:i + 10_000] for i in range(0, len(ids), 10_000)]  # under SQLite's variable limit
+        with self.transaction():
+            outlet_id = self._outlet_id(outlet, required=True)
+            values = [row + (row_id, outlet_id)
+                      for row_id, row in zip(ids, self._encoded(columns, rows[columns].to_dict("records")))]
+            before = [self._rows(table, f"id IN ({', '.join('?' * len(c))})", c) for c in chunks]
+            self._conn.executemany(sql, values)
+            for chunk, (names, old) in zip(chunks, before):
+                self._log_rows(table, names, old, self._rows(table, f"id IN ({', '.join('?' * len(chunk))})", chunk)[1])
+
+    # --- recipes & pricing ---
+    def recipes(self):
+        recipes = {}
+        for dish, item, qty in self._read("SELECT dishes.name, t.Item, t.Qty FROM recipes t "
+                                          "JOIN dishes ON dishes.id = t.dish_id ORDER BY t.rowid"):
+            recipes.setdefault(dish, {})[item] = qty
+        return recipes
+
+    def menu_prices(self):
+        return dict(self._read("SELECT dishes.name, t.Cost FROM menu_prices t "
+                               "JOIN dishes ON dishes.id = t.dish_id"))
+
+    def dishes(self):
+        return [r[0] for r in self._read("SELECT name FROM dishes ORDER BY name")]
+
+    def _log_dish(self, dish_id, change):
+        """Run ``change`` and journal what it did to a dish's recipe and menu price."""
+        before = {table: self._rows(table, "dish_id = ?", (dish_id,)) for table in ("recipes", "menu_prices")}
+        change()
+        for table, (columns, rows) in before.items():
+            self._log_rows(table, columns, rows, self._rows(table, "dish_id = ?", (dish_id,))[1])
+
+    def save_recipe(self, dish, recipe, cost):
+        def change():
+            self._execute("DELETE FROM recipes WHERE dish_id = ?", (dish_id,))
+            self._conn.executemany(
+                "INSERT INTO recipes (dish_id, Item, Qty) VALUES (?, ?, ?)",
+                [(dish_id, item, float(qty)) for item, qty in recipe.items()],
+            )
+            self._execute(
+                "INSERT OR REPLACE INTO menu_prices (dish_id, Cost) VALUES (?, ?)", (dish_id, float(cost))
+            )
+
+        with self.transaction():
+            dish_id = self._keys("dishes", [dish], create=True)[dish]
+            self._log_dish(dish_id, change)
+
+    def delete_recipe(self, dish):
+        # The dish itself stays in the dishes table while its sales refer to it
+        def change():
+            self._execute("DELETE FROM recipes WHERE dish_id = ?", (dish_id,))
+            self._execute("DELETE FROM menu_prices WHERE dish_id = ?", (dish_id,))
+
+        with self.transaction():
+            dish_id = self._keys("dishes", [dish]).get(dish)
+            if dish_id is not None:
+                self._log_dish(dish_id, change)
+
+    def rename_dish(self, old, new):
+        with self.transaction():
+            columns, before = self._rows("dishes", "name = ?", (old,))
+            self._execute("UPDATE dishes SET name = ? WHERE name = ?", (new, old))
+            after = self._rows("dishes", "name = ?", (new,))[1]
+            self._log("rows", {"changes": [journal.change("dishes", columns, before, after)]},
+                      note=f"rename {old} -> {new}")
+
+    def dish_pricing(self, outlet):
+        with self._reading() as conn:
+            frame = pd.read_sql_query(
+                f"SELECT dishes.name AS Dish, {', '.join(f't.{c}' for c in INPUTS)} FROM dish_pricing t "
+                "JOIN dishes ON dishes.id = t.dish_id WHERE t.outlet_id = ? ORDER BY dishes.name",
+                conn, params=(self._outlet_id(outlet),), index_col="Dish",
+            )
+        return frame.astype(float)
+
+    def set_dish_pricing(self, outlet, inputs):
+        with self.transaction():
+            outlet_id = self._outlet_id(outlet, required=True)
+            current = self.dish_pricing(outlet)
+            new = inputs[INPUTS].astype(float)
+            # Only dishes whose inputs actually changed are written (and journaled)
+            old = current.reindex(new.index, fill_value=0.0)
+            changed = new.index[~np.isclose(new.to_numpy(), old.to_numpy()).all(axis=1)]
+            if not len(changed):
+                return
+            dish_ids = self._keys("dishes", changed, create=True)
+            ids = [dish_ids[dish] for dish in changed]
+            where, params = f"outlet_id = ? AND dish_id IN ({', '.join('?' * len(ids))})", (outlet_id, *ids)
+            columns, before = self._rows("dish_pricing", where, params)
+            values = [(outlet_id, dish_id, *row) for dish_id, row in zip(ids, new.loc[changed].itertuples(index=False))]
+            # Upserted in place, so a row keeps its rowid and the journal sees an update
+            self._conn.executemany(
+                f"INSERT INTO dish_pricing (outlet_id, dish_id, {', '.join(INPUTS)}) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (outlet_id, dish_id) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in INPUTS),
+                [row for row in values if any(row[2:])],
+            )
+            self._conn.executemany("DELETE FROM dish_pricing WHERE outlet_id = ? AND dish_id = ?",
+                                   [row[:2] for row in values if not any(row[2:])])
+            self._log_rows("dish_pricing", columns, before, self._rows("dish_pricing", where, params)[1])
+
+    # --- outlet configs ---
+    def platforms(self, outlet):
+        rows = self._read(
+            "SELECT platforms.name, t.comm, t.del FROM outlet_platforms t "
+            "JOIN platforms ON platforms.id = t.platform_id WHERE t.outlet_id = ? ORDER BY t.rowid",
+            (self._outlet_id(outlet),),
+        )
+        return {name: {"comm": comm, "del": fee} for name, comm, fee in rows}
+
+    def _platform_key(self, outlet, platform, create=False):
+        """``(outlet_id, platform_id)``; the platform id is ``None`` if unknown and not created."""
+        return (self._outlet_id(outlet, required=True),
+                self._keys("platforms", [platform], create=create).get(platform))
+
+    def set_platform(self, outlet, platform, comm, delivery):
+        where = "outlet_id = ? AND platform_id = ?"
+        with self.transaction():
+            key = self._platform_key(outlet, platform, create=True)
+            columns, before = self._rows("outlet_platforms", where, key)
+            self._execute(
+                "INSERT OR REPLACE INTO outlet_platforms (outlet_id, platform_id, comm, del) VALUES (?, ?, ?, ?)",
+                key + (float(comm), float(delivery)),
+            )
+            self._log_rows("outlet_platforms", columns, before, self._rows("outlet_platforms", where, key)[1])
+
+    def delete_platform(self, outlet, platform):
+        with self.transaction():
+            key = self._platform_key(outlet, platform)
+            for table in ("platform_rates", "outlet_platforms"):
+                columns, before = self._rows(table, "outlet_id = ? AND platform_id = ?", key)
+                self._execute(f"DELETE FROM {table} WHERE outlet_id = ? AND platform_id = ?", key)
+                self._log_rows(table, columns, before=before)
+
+    def rate_schedule(self, outlets=None):
+        where, params = "", []
+        if outlets is not None:
+            params = list(self._keys("outlets", outlets).values())
+            where = f" WHERE t.outlet_id IN ({', '.join('?' * len(params))})"
+        names = ("SELECT outlets.name AS Outlet, platforms.name AS Platform, {effective}, t.comm, t.del FROM {table} t "
+                 "JOIN outlets ON outlets.id = t.outlet_id JOIN platforms ON platforms.id = t.platform_id")
+        sql = (names.format(effective="NULL AS Effective", table="outlet_platforms") + where + " UNION ALL "
+               + names.format(effective="t.Effective", table="platform_rates") + where
+               + " ORDER BY Outlet, Platform, Effective")
+        with self._reading() as conn:
+            schedule = pd.read_sql_query(sql, conn, params=params * 2)
+        schedule["Effective"] = pd.to_datetime(schedule["Effective"]).astype("datetime64[ns]")
+        return schedule[RATE_COLUMNS]
+
+    def set_platform_rate(self, outlet, platform, effective, comm, delivery):
+        where = "outlet_id = ? AND platform_id = ? AND Effective = ?"
+        with self.transaction():
+            key = self._platform_key(outlet, platform, create=True) + (_to_sql(effective),)
+            columns, before = self._rows("platform_rates", where, key)
+            self._execute(
+                "INSERT OR REPLACE INTO platform_rates (outlet_id, platform_id, Effective, comm, del) "
+                "VALUES (?, ?, ?, ?, ?)",
+                key + (float(comm), float(delivery)),
+            )
+            self._log_rows("platform_rates", columns, before, self._rows("platform_rates", where, key)[1])
+
+    def delete_platform_rate(self, outlet, platform, effective):
+        where = "outlet_id = ? AND platform_id = ? AND Effective = ?"
+        with self.transaction():
+            key = self._platform_key(outlet, platform) + (_to_sql(effective),)
+            columns, before = self._rows("platform_rates", where, key)
+            self._execute(f"DELETE FROM platform_rates WHERE {where}", key)
+            self._log_rows("platform_rates", columns, before=before)
+
+    # --- history ---
+    def history(self, limit=100):
+        with self._reading() as conn:
+            return pd.read_sql_query("SELECT seq, ts, op, summary FROM journal ORDER BY seq DESC LIMIT ?",
+                                     conn, params=(limit,))
+
+    def undo_to(self, seq):
+        with self.transaction():
+            first = (self._conn.execute("SELECT MIN(seq) FROM journal").fetchone()[0]
+                     or journal.last_seq(self._conn) + 1)
+            if seq < first - 1:
+                raise journal.JournalError(f"Entries up to #{first - 1} have been compacted; "
+                                           "restore an older snapshot instead")
+            entries = self._conn.execute(
+                "SELECT seq, op, payload FROM journal WHERE seq > ? ORDER BY seq DESC", (seq,)
+            ).fetchall()
+            for number, op, blob in entries:
+                payload = journal.decode(blob)
+                journal.apply(self._conn, op, payload, inverse=True)
+                # Undo is itself journaled, so it can be undone in turn
+                self._log(op, journal.inverse_payload(op, payload), note=f"undo of #{number}")
+        return len(entries)
+
+    def snapshot(self):
+        with self._lock:
+            seq = journal.last_seq(self._conn)
+            path = journal.write_snapshot(self._conn, self.snapshot_dir, seq)
+            self._snapshot_seq = seq
+            self._compact()
+        return path
+
+    def _compact(self):
+        """Keep the newest KEEP_SNAPSHOTS snapshots and only the journal entries after the oldest."""
+        kept = journal.snapshots(self.snapshot_dir)[-KEEP_SNAPSHOTS:]
+        if not kept:
+            return
+        oldest = kept[0][0]
+        for seq, path in journal.snapshots(self.snapshot_dir) + journal.snapshots(self.snapshot_dir, "import"):
+            if seq < oldest:
+                os.remove(path)
+        self._execute("DELETE FROM journal WHERE seq <= ?", (oldest,))
+
+    def export_database(self):
+        fd, target = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            dest = sqlite3.connect(target)
+            try:
+                with self._lock:
+                    self._conn.backup(dest)
+            finally:
+                dest.close()
+            with open(target, "rb") as fh:
+                return fh.read()
+        finally:
+            os.remove(target)
+
+    def import_database(self, path):
+        src = sqlite3.connect(path)
+        try:
+            version = src.execute("PRAGMA user_version").fetchone()[0]
+            tables = {row[0] for row in src.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            src.close()
+        if not 0 < version <= len(MIGRATIONS) or not {"outlets", "recipes", *TABLES} <= tables:
+            raise ValueError(f"{os.path.basename(path)} is not a Cloud K database this version can read")
+        with self._lock:
+            # Keep the incoming file and the current data side by side, so the
+            # import entry can be undone (and replayed by journal.restore)
+            before = self.snapshot()
+            after = os.path.join(self.snapshot_dir, f"import-{self._snapshot_seq:012d}.db")
+            shutil.copyfile(path, after)
+            try:
+                SQLiteStorage(after, snapshot_every=0).close()  # brings older files up to this schema
+                with self.transaction():
+                    journal.replace_all(self._conn, after)
+                    self._log("import", {"before": before, "after": after})
+            except (sqlite3.DatabaseError, journal.JournalError):
+                os.remove(after)
+                raise
+
+
+class CachedStorage(Storage):
+    """Write-through cache that serves per-outlet row tables from ledgers.
+
+    The first read of a (table, outlet) pair loads it from the backend into
+    a :class:`~erp.ledger.Ledger`; later inserts, updates and deletes are
+    written to the backend and then applied to the loaded ledger, so reruns
+    never re-read or re-copy the history. Sales and expense ledgers also
+    carry a :class:`~erp.rollups.PeriodRollup` that is adjusted row by row
+    (sales also a :class:`~erp.forecast.DishDemand`), and a shared
+    :class:`~erp.costing.CostingEngine` re-costs only the dishes whose
+    ingredients changed price. Inventory ledgers have a
+    :class:`~erp.inventory.StockIndex` for O(ingredients) stock checks.
+    Sales and expenses are held in a :class:`~erp.ledger.MonthlyLedger`: a
+    date-range read loads and scans only the months it overlaps, and the
+    rest of the history is read the first time something needs all of it.
+    Renaming an outlet or dish relabels the loaded rows in place.
+    Writes committed by another process (such as :mod:`erp.api`) are
+    noticed through :meth:`Storage.data_version` and drop the caches.
+
+    One instance is meant to be shared by every session of the process.
+    Each outlet's caches are guarded by that outlet's :meth:`outlet_lock`,
+    so sessions working on different outlets never wait for each other's
+    caches. Their reads (and the :meth:`Storage.data_version` poll) go
+    through the backend's read connection and do not wait for an open
+    transaction either; only writes take turns, one transaction at a time.
+    Locks are always taken outlet(s) first, then the backend, so a
+    transaction that writes an outlet's rows must hold that outlet's lock
+    before it starts.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._ledgers = {}
+        self._rollups = {}
+        self._prices = {}
+        self._priced = {}  # outlet -> the unit costs the costing engine was last given
+        self._stock = {}
+        self._demand = {}
+        self._costing = None
+        self._guard = threading.RLock()   # the cache dicts and the costing engine
+        self._locks = {}                  # outlet -> RLock
+        self._local = threading.local()   # this thread's transaction depth
+        self._version = backend.data_version()
+
+    def outlet_lock(self, outlet):
+        with self._guard:
+            return self._locks.setdefault(outlet, threading.RLock())
+
+    @property
+    def _depth(self):
+        return getattr(self._local, "depth", 0)
+
+    def _sync(self):
+        """Drop every cache if another process wrote to the backend since the last call."""
+        if self._depth:
+            return
+        version = self.backend.data_version()
+        if version != self._version:
+            with self._guard:
+                self._version = version
+                self._reset()
+
+    def _reset(self):
+        with self._guard:
+            self._ledgers, self._rollups, self._prices, self._stock, self._demand = {}, {}, {}, {}, {}
+            self._priced = {}
+            self._costing = None
+
+    @staticmethod
+    def _covers(ledger, start=None, end=None):
+        """Whether ``ledger`` holds every row of ``start``..``end`` (default: all rows)."""
+        return ledger is not None and (not isinstance(ledger, MonthlyLedger) or ledger.covers(start, end))
+
+    def _ledger(self, table, outlet, start=None, end=None):
+        """``outlet``'s ledger of ``table``, with at least the months of ``start``..``end`` loaded.
+
+        Without a range the whole history is loaded, as the rollups and
+        other aggregates over every row need.
+        """
+        key = (table, outlet)
+        ledger = self._ledgers.get(key)
+        if not self._covers(ledger, start, end):
+            with self.outlet_lock(outlet):
+                ledger = self._ledgers.get(key)
+                if ledger is None and table not in PARTITIONED:
+                    ledger = Ledger(SCHEMAS[table])
+                    ledger.extend(self.backend.query(table, outlet=outlet))
+                elif not self._covers(ledger, start, end):
+                    ledger = ledger or MonthlyLedger(SCHEMAS[table])
+                    # Whole months only, so every loaded partition is complete
+                    first, last = month_span(start, end)
+                    ledger.load(self.backend.query(table, outlet=outlet, start=first, end=last), first, last)
+                self._ledgers[key] = ledger
+        return ledger
+
+    def _preload(self, table, outlets):
+        """Load every missing (table, outlet) ledger with a single backend read."""
+        missing = [o for o in outlets if not self._covers(self._ledgers.get((table, o)))]
+        if len(missing) < 2:
+            return
+        with self.outlet_locks(missing):
+            rows = self.backend.query(table)
+            groups = {outlet: group for outlet, group in rows.groupby("Outlet", observed=True, sort=False)}
+            for outlet in missing:
+                ledger = self._ledgers.get((table, outlet))
+                if self._covers(ledger):
+                    continue
+                group = groups.get(outlet, rows.iloc[:0])
+                if table in PARTITIONED:
+                    ledger = ledger or MonthlyLedger(SCHEMAS[table])
+                    ledger.load(group)
+                else:
+                    ledger = Ledger(SCHEMAS[table])
+                    ledger.extend(group)
+                self._ledgers[(table, outlet)] = ledger
+
+    def _rollup(self, table, outlet):
+        key = (table, outlet)
+        with self.outlet_lock(outlet):
+            if key not in self._rollups:
+                rollup = PeriodRollup(ROLLUP_MEASURES[table])
+                rollup.add(self._ledger(table, outlet).frame())
+                self._rollups[key] = rollup
+            return self._rollups[key]
+
+    def _evict(self, key):
+        with self._guard:
+            self._ledgers.pop(key, None)
+            self._rollups.pop(key, None)
+            if key[0] == "sales":
+                self._demand.pop(key[1], None)
+            if key[0] == "inventory":
+                self._prices.pop(key[1], None)
+                self._stock.pop(key[1], None)
+                if self._costing is not None:
+                    self._costing.forget(key[1])
+
+    def _dish_demand(self, outlet):
+        with self.outlet_lock(outlet):
+            if outlet not in self._demand:
+                demand = DishDemand()
+                demand.add(self._ledger("sales", outlet).frame())
+                self._demand[outlet] = demand
+            return self._demand[outlet]
+
+    def _trackers(self, key):
+        """Loaded aggregates that follow the rows of ``key``'s ledger."""
+        found = [self._rollups.get(key)]
+        if key[0] == "sales":
+            found.append(self._demand.get(key[1]))
+        return [tracker for tracker in found if tracker is not None]
+
+    def _stock_index(self, outlet):
+        with self.outlet_lock(outlet):
+            if outlet not in self._stock:
+                self._stock[outlet] = StockIndex(self._ledger("inventory", outlet).frame())
+            return self._stock[outlet]
+
+    def _engine(self):
+        engine = self._costing
+        if engine is None:
+            recipes = self.backend.recipes()  # read before taking the guard (lock order)
+            with self._guard:
+                if self._costing is None:
+                    self._costing = CostingEngine(recipes)
+                engine = self._costing
+        return engine
+
+    def _owner(self, table, ids):
+        """Outlet whose loaded ledger holds any of ``ids`` (``None`` if none is loaded)."""
+        with self._guard:
+            loaded = [(key, ledger) for key, ledger in self._ledgers.items() if key[0] == table]
+        for (_, outlet), ledger in loaded:
+            if any(row_id in ledger for row_id in ids):
+                return outlet
+        return None
+
+    def _changed(self, key):
+        """Bookkeeping after a loaded ledger was mutated."""
+        if key[0] == "inventory":
+            # Stock prices are re-derived on the next read; the engine then diffs them
+            self._prices.pop(key[1], None)
+
+    @contextmanager
+    def transaction(self):
+        with self.backend.transaction():
+            # The backend holds the write lock now, so a commit by another process can no longer
+            # slip in between this check and the writes planned from the caches
+            self._sync()
+            self._local.depth = self._depth + 1
+            try:
+                yield self
+            except BaseException:
+                # The backend rolled back. Any cache may hold the aborted writes, either applied
+                # to it or read from the open transaction when it was built, so drop them all
+                self._reset()
+                raise
+            finally:
+                self._local.depth -= 1
+
+    def row_counts(self):
+        return self.backend.row_counts()
+
+    def revision(self):
+        return self.backend.revision()
+
+    def cache_stats(self):
+        """Rows and in-memory bytes of every loaded ledger, for the Diagnostics page."""
+        with self._guard:
+            loaded = list(self._ledgers.items())
+        return [{"Table": table, "Outlet": outlet, "Rows": len(ledger),
+                 "Bytes": int(ledger.frame().memory_usage(deep=True).sum())}
+                for (table, outlet), ledger in loaded]
+
+    # --- history ---
+    def history(self, limit=100):
+        return self.backend.history(limit)
+
+    @contextmanager
+    def _rewriting(self):
+        """Hold every outlet's lock while the backend rewrites arbitrary rows, then drop the caches."""
+        with self._guard:
+            known = set(self._locks)
+        with self.outlet_locks(known | set(self.outlets())):
+            try:
+                yield
+            finally:
+                self._reset()
+
+    def undo_to(self, seq):
+        self._sync()
+        with self._rewriting():
+            return self.backend.undo_to(seq)
+
+    def snapshot(self):
+        return self.backend.snapshot()
+
+    def export_database(self):
+        return self.backend.export_database()
+
+    def import_database(self, path):
+        self._sync()
+        with self._rewriting():
+            self.backend.import_database(path)
+
+    # --- outlets ---
+    def outlets(self):
+        return self.backend.outlets()
+
+    def archived_outlets(self):
+        return self.backend.archived_outlets()
+
+    def add_outlet(self, name):
+        self.backend.add_outlet(name)
+
+    def rename_outlet(self, old, new):
+        self._sync()
+        with self.outlet_locks([old, new]):
+            self.backend.rename_outlet(old, new)
+            with self._guard:
+                # The loaded rows and aggregates are still right; only their outlet label moves
+                for cache in (self._ledgers, self._rollups):
+                    for table, _ in [k for k in cache if k[1] == old]:
+                        cache[(table, new)] = cache.pop((table, old))
+                for (_, outlet), ledger in list(self._ledgers.items()):
+                    if outlet == new:
+                        ledger.rename_category("Outlet", old, new)
+                for cache in (self._prices, self._stock, self._demand):
+                    if old in cache:
+                        cache[new] = cache.pop(old)
+                if self._costing is not None:
+                    self._costing.forget(old)
+
+    def delete_outlet(self, name, purge=False):
+        self._sync()
+        with self.outlet_lock(name):
+            self.backend.delete_outlet(name, purge)
+            if purge:
+                with self._guard:
+                    stale = [k for k in self._ledgers if k[1] == name]
+                for key in stale:
+                    self._evict(key)
+
+    # --- row tables ---
+    def query(self, table, outlet=None, start=None, end=None, items=None):
+        self._sync()
+        if outlet is None:
+            return self.backend.query(table, start=start, end=end, items=items)
+        with self.outlet_lock(outlet):
+            if table in PARTITIONED:
+                # Only the months overlapping the range are loaded and concatenated
+                df = self._ledger(table, outlet, start, end).frame(start, end)
+            else:
+                df = self._ledger(table, outlet).frame()
+        if start is None and end is None and items is None:
+            return df
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df["Date"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df["Date"] <= pd.Timestamp(end)
+        if items is not None:
+            mask &= df["Item"].isin(list(items))
+        return df[mask]
+
+    def insert(self, table, rows):
+        self._sync()
+        # Checked and typed once here; ledgers, rollups and pages reuse the dtypes
+        df = validate(table, rows)
+        if df.empty:
+            return
+        groups = list(df.groupby("Outlet", observed=True, sort=False))
+        with self.outlet_locks(outlet for outlet, _ in groups):
+            self.backend.insert(table, df)
+            for outlet, group in groups:
+                key = (table, outlet)
+                if key in self._ledgers:
+                    self._ledgers[key].extend(group)
+                    self._changed(key)
+                    for tracker in self._trackers(key):
+                        tracker.add(group)
+                if table == "inventory" and outlet in self._stock:
+                    for lot_id, item, qty, cost in zip(group["id"], group["Item"], group["Qty"], group["Total_Cost"]):
+                        self._stock[outlet].add_lot(lot_id, item, qty, cost)
+
+    def update(self, table, row_id, values):
+        self._sync()
+        outlet = self._owner(table, [row_id])
+        if outlet is None:
+            self.backend.update(table, row_id, values)
+            return
+        key = (table, outlet)
+        with self.outlet_lock(outlet):
+            self.backend.update(table, row_id, values)
+            ledger = self._ledgers.get(key)
+            if ledger is None or row_id not in ledger:
+                return
+            trackers = self._trackers(key)
+            for tracker in trackers:
+                tracker.remove(ledger.rows([row_id]))
+            ledger.update(row_id, values)
+            for tracker in trackers:
+                tracker.add(ledger.rows([row_id]))
+            if table == "inventory" and outlet in self._stock:
+                lot = ledger.rows([row_id]).iloc[0]
+                self._stock[outlet].update_lot(row_id, lot["Item"], lot["Qty"], lot["Total_Cost"])
+            self._changed(key)
+
+    def delete(self, table, ids):
+        self._sync()
+        ids = list(ids)
+        outlet = self._owner(table, ids)
+        if outlet is None:
+            self.backend.delete(table, ids)
+            return
+        key = (table, outlet)
+        with self.outlet_lock(outlet):
+            self.backend.delete(table, ids)
+            ledger = self._ledgers.get(key)
+            if ledger is None:
+                return
+            for tracker in self._trackers(key):
+                tracker.remove(ledger.rows(ids))
+            if table == "inventory" and outlet in self._stock:
+                for lot_id in ids:
+                    self._stock[outlet].remove_lot(lot_id)
+            if ledger.delete(ids):
+                self._changed(key)
+
+    def update_many(self, table, outlet, rows):
+        self._sync()
+        if rows.empty:
+            return
+        key = (table, outlet)
+        with self.outlet_lock(outlet):
+            self.backend.update_many(table, outlet, rows)
+            ledger = self._ledgers.get(key)
+            if ledger is None:
+                return
+            ids = rows["id"].tolist()
+            trackers = self._trackers(key)
+            for tracker in trackers:
+                tracker.remove(ledger.rows(ids))
+            ledger.update_many(ids, {c: rows[c].to_numpy() for c in rows.columns if c != "id"})
+            for tracker in trackers:
+                tracker.add(ledger.rows(ids))
+            if table == "inventory":
+                with self._guard:
+                    self._stock.pop(outlet, None)
+            self._changed(key)
+
+    def consume_stock(self, outlet, demand, dry_run=False):
+        self._sync()
+        # Planning and deducting under the outlet's lock makes check-and-deduct atomic
+        # for concurrent cashiers; other outlets are not blocked
+        with self.outlet_lock(outlet):
+            if dry_run:
+                return self._stock_index(outlet).plan(demand)[1]
+            # Planned inside the transaction, after it has caught up with other processes
+            with self.transaction():
+                changes, cost = self._stock_index(outlet).plan(demand)
+                for lot_id, values in changes.items():
+                    self.update("inventory", lot_id, values)
+        return cost
+
+    def period_totals(self, outlet, grain, start=None, end=None):
+        self._sync()
+        if start is not None or end is not None:
+            # A window is summed from the months it overlaps, not from the whole-history rollups
+            return super().period_totals(outlet, grain, start, end)
+        return period_pnl(self._rollup("sales", outlet), self._rollup("expenses", outlet), grain)
+
+    def outlet_totals(self, grain, outlets=None, start=None, end=None):
+        self._sync()
+        outlets = self.outlets() if outlets is None else list(outlets)
+        if start is not None or end is not None:
+            sales, expenses = (self._stacked(table, outlets, start, end) for table in ("sales", "expenses"))
+            return outlet_pnl(sales, expenses, grain)
+        # Stacks the per-outlet rollups, so only newly loaded outlets are aggregated
+        for table in ROLLUP_MEASURES:
+            self._preload(table, outlets)
+        return stack_pnl({o: (self._rollup("sales", o), self._rollup("expenses", o)) for o in outlets}, grain)
+
+    def platform_totals(self, outlets=None, start=None, end=None):
+        self._sync()
+        outlets = self.outlets() if outlets is None else list(outlets)
+        if start is None and end is None:
+            self._preload("sales", outlets)
+        return pd.concat([platform_split(self.query("sales", outlet=o, start=start, end=end)) for o in outlets],
+                         ignore_index=True)
+
+    def _stacked(self, table, outlets, start=None, end=None):
+        """Rows of several outlets dated ``start``..``end``, read from each outlet's ledger."""
+        frames = [self.query(table, outlet=o, start=start, end=end) for o in outlets]
+        return pd.concat(frames, ignore_index=True) if frames else conform(table, pd.DataFrame())
+
+    # --- recipes & pricing ---
+    def recipes(self):
+        return self.backend.recipes()
+
+    def menu_prices(self):
+        return self.backend.menu_prices()
+
+    def dishes(self):
+        return self.backend.dishes()
+
+    def save_recipe(self, dish, recipe, cost):
+        self.backend.save_recipe(dish, recipe, cost)
+        with self._guard:
+            if self._costing is not None and self._costing.set_recipe(dish, recipe):
+                # New ingredients joined every outlet's prices at 0; give the engine the real ones
+                self._priced = {}
+
+    def delete_recipe(self, dish):
+        self.backend.delete_recipe(dish)
+        with self._guard:
+            if self._costing is not None:
+                self._costing.remove_recipe(dish)
+
+    def rename_dish(self, old, new):
+        self._sync()
+        with self._guard:
+            known = set(self._locks)
+        # Any outlet's loaded sales may name the dish
+        with self.outlet_locks(known):
+            self.backend.rename_dish(old, new)
+            with self._guard:
+                for (table, _), ledger in list(self._ledgers.items()):
+                    if table == "sales":
+                        ledger.rename_category("Dish", old, new)
+                for demand in self._demand.values():
+                    demand.rename(old, new)
+                if self._costing is not None:
+                    self._costing.rename_recipe(old, new)
+
+    def dish_pricing(self, outlet):
+        return self.backend.dish_pricing(outlet)
+
+    def set_dish_pricing(self, outlet, inputs):
+        self.backend.set_dish_pricing(outlet, inputs)
+
+    def unit_costs(self, outlet):
+        self._sync()
+        with self.outlet_lock(outlet):
+            if outlet not in self._prices:
+                self._prices[outlet] = stock_prices(self._ledger("inventory", outlet).frame())
+            return self._prices[outlet]
+
+    def dish_costs(self, outlet):
+        self._sync()
+        engine = self._engine()
+        with self.outlet_lock(outlet):
+            prices = self.unit_costs(outlet)
+            with self._guard:
+                # Any stock change replaces the outlet's unit costs, even if unit_costs() read them first
+                if self._priced.get(outlet) is not prices or not engine.has_prices(outlet):
+                    engine.set_prices(outlet, prices["Unit_Cost"])
+                    self._priced[outlet] = prices
+                return engine.dish_costs(outlet)
+
+    def stock_levels(self, outlet):
+        self._sync()
+        with self.outlet_lock(outlet):
+            levels = self.unit_costs(outlet)
+            index = self._stock_index(outlet)
+            return levels.assign(On_Hand=[index.on_hand(item) for item in levels.index])
+
+    def stock_forecast(self, outlet, **options):
+        self._sync()
+        recipes = self.recipes()
+        with self.outlet_lock(outlet):
+            # Dish demand is kept up to date by every sale, so no history is rescanned here
+            return forecast(self._dish_demand(outlet), recipes, self.stock_levels(outlet), **options)
+
+    # --- outlet configs ---
+    def platforms(self, outlet):
+        return self.backend.platforms(outlet)
+
+    def set_platform(self, outlet, platform, comm, delivery):
+        self.backend.set_platform(outlet, platform, comm, delivery)
+
+    def delete_platform(self, outlet, platform):
+        self.backend.delete_platform(outlet, platform)
+
+    def rate_schedule(self, outlets=None):
+        return self.backend.rate_schedule(outlets)
+
+    def set_platform_rate(self, outlet, platform, effective, comm, delivery):
+        self.backend.set_platform_rate(outlet, platform, effective, comm, delivery)
+
+    def delete_platform_rate(self, outlet, platform, effective):
+        self.backend.delete_platform_rate(outlet, platform, effective)
+
+
+def open_storage(path=None):
+    """Open the configured backend (``CLOUDK_DB`` env var, default ``cloudk.db``)."""
+    path = path or os.environ.get("CLOUDK_DB", "cloudk.db")
+    return CachedStorage(SQLiteStorage(path))
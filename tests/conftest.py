@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from erp import core
+from erp.storage import CachedStorage, SQLiteStorage
+
+OUTLET = "The Home Plate"
+
+
+@pytest.fixture
+def backend(tmp_path):
+    store = SQLiteStorage(str(tmp_path / "cloudk.db"), snapshot_every=0)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def db(backend):
+    return CachedStorage(backend)
+
+
+@pytest.fixture
+def kitchen(db):
+    """An outlet with Bun and Patty lots, a Burger recipe and a Zomato link."""
+    core.add_stock(db, OUTLET, "Bun", 10, "pcs", 50)       # ₹5 each
+    core.add_stock(db, OUTLET, "Patty", 5, "pcs", 100)     # ₹20 each
+    core.add_stock(db, OUTLET, "Patty", 5, "pcs", 150)     # ₹30 each, used after the first lot
+    db.save_recipe("Burger", {"Bun": 1, "Patty": 1}, 25.0)
+    core.set_platform(db, OUTLET, "Zomato", 20, 10)
+    return db
+
+
+def expenses(dates, outlet=OUTLET):
+    return pd.DataFrame({
+        "id": [f"e{i}" for i in range(len(dates))], "Date": pd.to_datetime(dates), "Outlet": outlet,
+        "Category": "Rent", "Amount": [float(i + 1) for i in range(len(dates))], "Notes": "",
+    })
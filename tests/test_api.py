@@ -0,0 +1,106 @@
+import http.client
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from erp import api, core
+from erp.core import BatchError
+
+from conftest import OUTLET
+
+
+@pytest.fixture
+def server(kitchen):
+    server = api.make_server(kitchen, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, events):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    try:
+        conn.request("POST", "/events", json.dumps({"events": events}), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_batch_is_written(server, kitchen):
+    status, reply = _post(server, [
+        {"type": "stock", "outlet": OUTLET, "item": "Bun", "qty": 5, "unit": "pcs", "total_cost": 25},
+        {"type": "sale", "outlet": OUTLET, "date": "2025-01-02", "dish": "Burger", "qty": "2", "platform": "Zomato"},
+        {"type": "expense", "outlet": OUTLET, "date": "2025-01-02", "amount": 100},
+    ])
+    assert status == 200
+    assert (reply["stock"], reply["sale"], reply["expense"]) == (1, 1, 1)
+    assert len(kitchen.query("sales", outlet=OUTLET)) == 1
+
+
+def test_malformed_events_are_reported_by_number(server, kitchen):
+    status, reply = _post(server, [
+        {"type": "sale", "outlet": OUTLET, "dish": "Burger"},
+        {"type": "sale", "outlet": [OUTLET], "date": "2025-01-02", "dish": "Burger", "qty": 1},
+        {"type": "sale", "outlet": OUTLET, "date": "someday", "dish": 7, "qty": "lots"},
+        {"type": "expense", "outlet": OUTLET, "date": "2025-01-02", "amount": True, "notes": None},
+        {"type": "stock", "outlet": "Nowhere", "item": "Bun", "qty": 1},
+        {"type": "sale", "outlet": OUTLET, "date": "2025-01-02", "dish": "Burger", "qty": 1},
+    ])
+    assert status == 400
+    assert reply["errors"] == [
+        "Event 1: missing field(s) date, qty",
+        "Event 2: outlet must be text",
+        "Event 3: date must be a readable date; dish must be text; qty must be a number",
+        "Event 4: amount must be a number",
+        "Event 5: unknown outlet 'Nowhere'",
+    ]
+    assert kitchen.query("sales", outlet=OUTLET).empty  # nothing written, not even the valid event
+
+
+def test_unexpected_failures_still_reply_with_json(server, monkeypatch):
+    def broken(db, events):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(api, "apply_events", broken)
+    status, reply = _post(server, [])
+    assert status == 500
+    assert reply == {"errors": ["Internal error: RuntimeError: disk on fire"]}
+
+
+@pytest.mark.parametrize("length", ["lots", "-1"])
+def test_bad_content_length_gets_a_json_error(server, length):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    try:
+        conn.putrequest("POST", "/events")
+        conn.putheader("Content-Length", length)
+        conn.endheaders()
+        response = conn.getresponse()
+        assert response.status == 400
+        assert json.loads(response.read()) == {"errors": ["Content-Length must be a whole number of bytes"]}
+    finally:
+        conn.close()
+
+
+def test_apply_events_rejects_missing_fields_without_writing(kitchen):
+    with pytest.raises(BatchError) as caught:
+        core.apply_events(kitchen, [
+            {"type": "stock", "outlet": OUTLET, "qty": 1},
+            {"type": "expense", "outlet": OUTLET, "date": "2025-01-02", "category": "Rent"},
+        ])
+    assert caught.value.problems == ["Event 1: missing field(s) item", "Event 2: missing field(s) amount"]
+    assert kitchen.query("expenses", outlet=OUTLET).empty
+
+
+def test_rejected_batch_leaves_no_trace_in_the_cache(kitchen, backend):
+    with pytest.raises(BatchError):
+        core.apply_events(kitchen, [
+            {"type": "stock", "outlet": OUTLET, "item": "Milk", "qty": 10, "unit": "l", "total_cost": 500},
+            {"type": "sale", "outlet": OUTLET, "date": "2025-01-02", "dish": "Mystery", "qty": 1},
+        ])
+    assert "Milk" not in backend.stock_levels(OUTLET).index
+    pd.testing.assert_frame_equal(kitchen.stock_levels(OUTLET), backend.stock_levels(OUTLET))
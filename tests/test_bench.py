@@ -0,0 +1,46 @@
+import pandas as pd
+
+from bench.generate import Scale, generate, outlet_names
+from bench.run import _measure
+from erp.storage import CachedStorage, SQLiteStorage
+
+SMALL = Scale(outlets=2, recipes=4, items=6, years=1, sales_per_day=2, expenses_per_month=3, seed=7)
+
+
+def _generated(path):
+    backend = SQLiteStorage(path, snapshot_every=0)
+    try:
+        recipes = generate(CachedStorage(backend), SMALL)
+        return recipes, {t: backend.query(t).sort_values("id").reset_index(drop=True)
+                         for t in ("inventory", "sales", "expenses")}
+    finally:
+        backend.close()
+
+
+def test_generator_is_seeded_and_sized_by_scale(tmp_path):
+    recipes, tables = _generated(str(tmp_path / "a.db"))
+    again, same = _generated(str(tmp_path / "b.db"))
+    assert recipes == again
+    for table in tables:
+        pd.testing.assert_frame_equal(tables[table], same[table])
+
+    outlets = outlet_names(SMALL.outlets)
+    assert len(recipes) == SMALL.recipes
+    assert len(tables["sales"]) == len(outlets) * 365 * SMALL.sales_per_day
+    assert len(tables["expenses"]) == len(outlets) * 12 * SMALL.expenses_per_month
+    assert set(tables["sales"]["Outlet"]) == set(outlets)
+    sales = tables["sales"]
+    net = sales["Revenue"] - sales["Ing_Cost"] - sales["Comm_Paid"] - sales["Del_Cost"]
+    assert (net - sales["Net_Profit"]).abs().max() < 1e-6
+
+
+def test_measure_releases_every_state_it_built():
+    built, released = [], []
+
+    def setup():
+        built.append(object())
+        return built[-1]
+
+    result = _measure(lambda state: None, setup, repeat=3, teardown=released.append)
+    assert result["repeat"] == 3
+    assert released == built and len(built) == 4  # three timed runs and the traced one
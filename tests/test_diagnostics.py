@@ -0,0 +1,34 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from erp import diagnostics
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_sections_nest_and_are_recorded():
+    diagnostics.start("Page")
+    with diagnostics.section("outer"):
+        with diagnostics.section("inner"):
+            pass
+    record = diagnostics.finish()
+    assert record["page"] == "Page"
+    assert set(record["sections"]) == {"outer", "outer/inner"}
+    assert diagnostics.finish() is None  # nothing left to record
+
+
+def test_reruns_ending_in_st_rerun_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLOUDK_DB", str(tmp_path / "app.db"))
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["page"] = "Misc Expenses"
+    at.run()
+    assert not at.exception
+    before = len(diagnostics.RECENT)
+
+    at.number_input[0].set_value(250.0)
+    at.button[0].click()  # "Record Expense" ends its run with st.rerun()
+    at.run()
+    assert not at.exception
+    recorded = list(diagnostics.RECENT)[before:]
+    assert [r["page"] for r in recorded] == ["Misc Expenses", "Misc Expenses"]
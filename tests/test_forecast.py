@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from erp import core
+from erp.forecast import DishDemand, forecast
+
+from conftest import OUTLET
+
+RECIPES = {"Burger": {"Bun": 1, "Patty": 2}}
+STOCK = pd.DataFrame({"Unit": ["pcs", "pcs", "pcs"], "On_Hand": [10.0, 30.0, 5.0], "Unit_Cost": [5.0, 20.0, 50.0]},
+                     index=pd.Index(["Bun", "Patty", "Cheese"], name="Item"))
+
+
+def _demand(sales):
+    demand = DishDemand()
+    demand.add(pd.DataFrame({"Date": pd.to_datetime(list(sales)), "Dish": "Burger", "Qty": list(sales.values())}))
+    return demand
+
+
+def test_burn_cover_and_reorder():
+    demand = _demand({"2025-01-07": 4, "2025-01-09": 8})
+    table = forecast(demand, RECIPES, STOCK, as_of="2025-01-10", window=4, lead_time=2, cover=7, z=1.65)
+    table = table.set_index("Item")
+    assert table.index.tolist() == ["Bun", "Patty", "Cheese"]  # by days of cover
+
+    # Burgers sold over Jan 7..10 are 4, 0, 8, 0: the days without sales count as zero
+    safety = 1.65 * np.sqrt(11) * np.sqrt(2)
+    bun = table.loc["Bun"]
+    assert bun["Burn_Per_Day"] == pytest.approx(3)
+    assert bun["Days_Of_Cover"] == pytest.approx(10 / 3)
+    assert bun["Reorder_Point"] == pytest.approx(3 * 2 + safety)
+    assert bun["Suggested_Qty"] == pytest.approx(3 * 9 + safety - 10)
+    assert bun["Est_Cost"] == pytest.approx(5 * bun["Suggested_Qty"])
+
+    patty = table.loc["Patty"]
+    assert patty["Burn_Per_Day"] == pytest.approx(6) and patty["Days_Of_Cover"] == pytest.approx(5)
+    assert patty["Reorder_Point"] == pytest.approx(12 + 2 * safety)
+    assert patty["Suggested_Qty"] == 0  # above its reorder point
+
+    cheese = table.loc["Cheese"]
+    assert cheese["Burn_Per_Day"] == 0 and cheese["Days_Of_Cover"] == np.inf and cheese["Suggested_Qty"] == 0
+
+
+def test_young_outlet_is_averaged_over_the_days_it_traded():
+    table = forecast(_demand({"2025-01-09": 6}), RECIPES, STOCK, as_of="2025-01-10", window=28).set_index("Item")
+    assert table.loc["Bun", "Burn_Per_Day"] == pytest.approx(3)
+
+
+def test_stale_demand_is_not_forecast(kitchen):
+    core.record_order(kitchen, OUTLET, pd.Timestamp.today() - pd.Timedelta(days=60), [("Burger", 5, "Zomato")])
+    table = kitchen.stock_forecast(OUTLET).set_index("Item")
+    assert (table["Burn_Per_Day"] == 0).all() and (table["Suggested_Qty"] == 0).all()
+    recent = kitchen.stock_forecast(OUTLET, window=90).set_index("Item")
+    assert recent.loc["Bun", "Burn_Per_Day"] == pytest.approx(5 / 61)
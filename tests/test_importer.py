@@ -0,0 +1,60 @@
+import io
+
+import pandas as pd
+import pytest
+
+from erp.importer import ReportError, parse_dates, read_report
+
+
+def _csv(text):
+    return io.StringIO(text)
+
+
+def test_iso_dates_are_never_read_day_first():
+    dates, ambiguous = parse_dates(pd.Series([
+        "2024-03-05 13:10:00", "2024-03-20", "2024/03/05", "2024-03-05T10:00:00+05:30",
+        "05/03/2024", "5 Mar 2024", "05.03.24 10:00",
+    ]))
+    assert (dates == pd.Timestamp("2024-03-05")).tolist() == [True, False, True, True, True, True, True]
+    assert dates[1] == pd.Timestamp("2024-03-20")
+    assert not ambiguous.any()
+
+
+def test_report_rejects_ambiguous_and_unreadable_dates():
+    report = _csv("Date,Dish,Qty\n2024-03-05 13:10:00,Burger,1\n03/25/2024,Burger,1\nsoon,Burger,1\n")
+    with pytest.raises(ReportError) as caught:
+        read_report(report, platform="Zomato")
+    assert caught.value.problems == ["Unreadable date on row(s) 4",
+                                     "Ambiguous date (expected day/month/year or YYYY-MM-DD) on row(s) 3"]
+
+
+def test_report_dates_land_in_the_right_month():
+    lines = read_report(_csv("Order Date,Item Name,Quantity\n2024-03-05 13:10:00,Burger,2\n06/03/2024,Fries,1\n"),
+                        platform="Swiggy")
+    assert lines["Date"].tolist() == [pd.Timestamp("2024-03-05"), pd.Timestamp("2024-03-06")]
+    assert lines["Platform"].tolist() == ["Swiggy", "Swiggy"]
+
+
+@pytest.mark.parametrize("name, data, problem", [
+    ("report.xlsx", b"garbage", "Could not read report.xlsx"),
+    ("report.xlsx", b"PK\x03\x04garbage", "Could not read report.xlsx"),
+    ("report.csv", b"\xff\xfe\x00\x81" * 10, "Could not read report.csv"),
+    ("report.csv", b'Date,Dish,Qty\n2024-03-05,"Burger,1\n', "Could not read report.csv"),
+    ("report.csv", b"", "The file has no rows."),
+    ("report.xls", b"\xd0\xcf\x11\xe0", "report.xls: old .xls workbooks are not supported"),
+])
+def test_unreadable_files_are_report_errors(name, data, problem):
+    with pytest.raises(ReportError) as caught:
+        read_report(io.BytesIO(data), name=name, platform="Zomato")
+    assert caught.value.problems[0].startswith(problem)
+
+
+def test_net_payouts_are_not_read_as_revenue():
+    with pytest.raises(ReportError) as caught:
+        read_report(_csv("Date,Dish,Qty,Net Payout\n2024-03-05,Burger,1,80\n"), platform="Zomato")
+    assert caught.value.problems == [
+        "Column 'Net Payout' is the platform payout after commission and fees; "
+        "add the gross order value (Revenue or Order Value) or remove the column."
+    ]
+    lines = read_report(_csv("Date,Dish,Qty,Order Value,Payout\n2024-03-05,Burger,1,100,80\n"), platform="Zomato")
+    assert lines["Revenue"].tolist() == [100.0]
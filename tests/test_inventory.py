@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from erp import core
+from erp.costing import stock_prices
+from erp.inventory import InsufficientStock, StockIndex
+
+from conftest import OUTLET
+
+
+def test_plan_draws_oldest_lots_first():
+    index = StockIndex()
+    index.add_lot("a", "Patty", 5, 100)
+    index.add_lot("b", "Patty", 5, 150)
+    changes, cost = index.plan({"Patty": 7})
+    assert changes == {"a": {"Qty": 0.0, "Total_Cost": 0.0}, "b": {"Qty": 3.0, "Total_Cost": 90.0}}
+    assert cost == pytest.approx(5 * 20 + 2 * 30)
+    with pytest.raises(InsufficientStock) as caught:
+        index.plan({"Patty": 11, "Bun": 1})
+    assert caught.value.shortfalls == {"Patty": (11, 10.0), "Bun": (1, 0.0)}
+
+
+def test_orders_consume_fifo_and_cost_what_was_drawn(kitchen):
+    lines = core.record_order(kitchen, OUTLET, pd.Timestamp("2025-01-02"), [("Burger", 7, "Zomato")])
+    assert lines["Ing_Cost"].sum() == pytest.approx(7 * 5 + 5 * 20 + 2 * 30)
+    stock = kitchen.query("inventory", outlet=OUTLET).groupby("Item", observed=True)["Qty"].sum()
+    assert stock["Patty"] == pytest.approx(3) and stock["Bun"] == pytest.approx(3)
+
+    with pytest.raises(InsufficientStock):
+        core.record_order(kitchen, OUTLET, pd.Timestamp("2025-01-03"), [("Burger", 4, "Zomato")])
+    assert len(kitchen.query("sales", outlet=OUTLET)) == 1  # nothing written by the failed order
+
+
+def test_unit_cost_survives_running_out(kitchen):
+    assert kitchen.dish_costs(OUTLET)["Burger"] == pytest.approx(5 + 250 / 10)  # average of both Patty lots
+    core.record_order(kitchen, OUTLET, pd.Timestamp("2025-01-02"), [("Burger", 10, "Zomato")])
+    assert kitchen.stock_levels(OUTLET).loc["Patty", "On_Hand"] == 0
+    # Patty is out: it is costed at its newest lot's purchase price, not at 0
+    assert kitchen.unit_costs(OUTLET).loc["Patty", "Unit_Cost"] == pytest.approx(30)
+    assert kitchen.dish_costs(OUTLET)["Burger"] == pytest.approx(5 + 30)
+    assert stock_prices(kitchen.backend.query("inventory", outlet=OUTLET)).loc["Patty", "Unit_Cost"] == 30
+
+    core.add_stock(kitchen, OUTLET, "Patty", 2, "pcs", 70)
+    assert kitchen.dish_costs(OUTLET)["Burger"] == pytest.approx(5 + 35)
+
+
+def test_recipe_with_a_new_ingredient_is_costed_at_its_stock_price(kitchen):
+    core.add_stock(kitchen, OUTLET, "Cheese", 4, "pcs", 200)  # ₹50 each, used by no recipe yet
+    assert kitchen.dish_costs(OUTLET)["Burger"] == pytest.approx(5 + 250 / 10)
+    kitchen.save_recipe("Cheese Burger", {"Bun": 1, "Patty": 1, "Cheese": 1}, 80.0)
+    assert kitchen.dish_costs(OUTLET)["Cheese Burger"] == pytest.approx(5 + 25 + 50)
+    pd.testing.assert_series_equal(kitchen.dish_costs(OUTLET).sort_index(),
+                                   kitchen.backend.dish_costs(OUTLET).sort_index())
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from erp import core, journal
+from erp.storage import SQLiteStorage
+
+from conftest import OUTLET
+
+
+def _tables(db):
+    return {t: db.query(t).sort_values("id").reset_index(drop=True) for t in ("inventory", "sales", "expenses")}
+
+
+def _assert_same(a, b):
+    for table in a:
+        pd.testing.assert_frame_equal(a[table], b[table], check_categorical=False)
+
+
+def test_undo_reverts_every_later_change(kitchen):
+    db = kitchen
+    mark = int(db.history(1)["seq"][0])
+    before = _tables(db)
+    core.record_order(db, OUTLET, pd.Timestamp("2025-01-02"), [("Burger", 3, "Zomato")])
+    core.record_expense(db, OUTLET, "2025-01-03", "Rent", 900)
+    core.rename_outlet(db, OUTLET, "Renamed")
+    db.delete_recipe("Burger")
+
+    assert db.undo_to(mark) == 4
+    assert OUTLET in db.outlets() and "Renamed" not in db.outlets()
+    assert "Burger" in db.recipes()
+    _assert_same(_tables(db), before)
+    # The undo is journaled too, and can itself be undone
+    assert db.history(1)["summary"][0]
+
+
+def test_undo_past_compacted_entries_is_refused(kitchen):
+    core.record_expense(kitchen, OUTLET, "2025-01-03", "Rent", 900)
+    kitchen.snapshot()
+    core.record_expense(kitchen, OUTLET, "2025-01-04", "Rent", 900)
+    with pytest.raises(journal.JournalError):
+        kitchen.undo_to(0)
+
+
+def test_restore_replays_the_tail_after_a_snapshot(kitchen, backend, tmp_path):
+    core.record_expense(kitchen, OUTLET, "2025-01-03", "Rent", 900)
+    kitchen.snapshot()
+    core.record_order(kitchen, OUTLET, pd.Timestamp("2025-01-05"), [("Burger", 2, "Zomato")])
+    core.record_expense(kitchen, OUTLET, "2025-01-06", "Salary", 500)
+    midway = int(kitchen.history(2)["seq"][1])
+
+    target = str(tmp_path / "restored.db")
+    assert journal.restore(target, backend.path) == 2
+    restored = SQLiteStorage(target, snapshot_every=0)
+    try:
+        _assert_same(_tables(restored), _tables(kitchen))
+    finally:
+        restored.close()
+
+    journal.restore(target, backend.path, upto=midway)
+    restored = SQLiteStorage(target, snapshot_every=0)
+    try:
+        assert restored.query("expenses")["Category"].astype(object).tolist() == ["Rent"]
+        assert len(restored.query("sales")) == 1
+    finally:
+        restored.close()
+
+
+def test_backup_import_round_trip_and_undo(kitchen, tmp_path):
+    core.record_order(kitchen, OUTLET, pd.Timestamp("2025-01-05"), [("Burger", 2, "Zomato")])
+    saved = _tables(kitchen)
+    backup = kitchen.export_database()
+
+    core.record_expense(kitchen, OUTLET, "2025-01-06", "Salary", 500)
+    core.add_outlet(kitchen, "Pop-up")
+    mark = int(kitchen.history(1)["seq"][0])
+    core.import_backup(kitchen, backup)
+    _assert_same(_tables(kitchen), saved)
+    assert "Pop-up" not in kitchen.outlets()
+
+    kitchen.undo_to(mark)
+    assert "Pop-up" in kitchen.outlets()
+    assert kitchen.query("expenses")["Category"].astype(object).tolist() == ["Salary"]
+
+    with pytest.raises(ValueError):
+        core.import_backup(kitchen, b"not a database")
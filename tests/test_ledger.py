@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from erp import core
+from erp.ledger import Ledger, MonthlyLedger, month_span
+from erp.schema import SCHEMAS
+
+from conftest import OUTLET, expenses
+
+DATES = ["2024-01-15", "2024-01-31", "2024-02-01", "2024-02-20", "2024-03-10", "2024-04-02", "2024-04-30"]
+
+
+def _sorted(df):
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.sort_values("id").reset_index(drop=True)
+
+
+def test_ledger_appends_updates_and_deletes():
+    ledger = Ledger(SCHEMAS["expenses"], chunk_size=2)
+    rows = expenses(DATES)
+    ledger.extend(rows.iloc[:3])
+    for row in rows.iloc[3:].to_dict("records"):
+        ledger.append(row)
+    assert len(ledger) == len(DATES)
+    ledger.update("e1", {"Amount": 99.0, "Category": "Salary"})
+    assert ledger.delete(["e0", "e6", "missing"]) == 2
+
+    frame = ledger.frame()
+    assert frame["id"].tolist() == ["e1", "e2", "e3", "e4", "e5"]
+    assert frame["Amount"].tolist() == [99.0, 3.0, 4.0, 5.0, 6.0]
+    assert frame["Category"].dtype == "category"
+    assert ledger.categories("Category") == ["Rent", "Salary"]
+
+
+def test_monthly_ledger_matches_plain_ledger():
+    rows = expenses(DATES)
+    plain, monthly = Ledger(SCHEMAS["expenses"]), MonthlyLedger(SCHEMAS["expenses"])
+    for ledger in (plain, monthly):
+        ledger.load(rows) if ledger is monthly else ledger.extend(rows)
+        ledger.update("e0", {"Date": pd.Timestamp("2024-03-01")})  # moves between months
+        ledger.update_many(["e2", "e3"], {"Amount": np.array([7.0, 8.0])})
+        ledger.delete(["e5"])
+        ledger.rename_category("Category", "Rent", "Lease")
+    pd.testing.assert_frame_equal(_sorted(monthly.frame()), _sorted(plain.frame()))
+
+    march = monthly.frame(pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-31"))
+    assert sorted(march["id"]) == ["e0", "e4"]
+    assert set(march["Category"]) == {"Lease"}
+
+
+def test_partial_loads_track_which_months_are_in_memory():
+    rows = expenses(DATES)
+    ledger = MonthlyLedger(SCHEMAS["expenses"])
+    first, last = month_span(pd.Timestamp("2024-02-10"), pd.Timestamp("2024-02-12"))
+    assert (first, last) == (pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29"))
+    ledger.load(rows[(rows["Date"] >= first) & (rows["Date"] <= last)], first, last)
+    assert ledger.covers(pd.Timestamp("2024-02-05"), pd.Timestamp("2024-02-25"))
+    assert not ledger.covers(pd.Timestamp("2024-02-05"), pd.Timestamp("2024-03-01"))
+    assert not ledger.covers() and not ledger.complete
+
+    # Rows of months that are not loaded are left to storage
+    ledger.extend(expenses(["2024-02-03", "2024-05-01"]).assign(id=["n0", "n1"]))
+    assert "n0" in ledger and "n1" not in ledger
+
+    start, _ = month_span(pd.Timestamp("2024-04-15"))
+    ledger.load(rows[rows["Date"] >= start], start)
+    assert ledger.covers(pd.Timestamp("2024-04-20")) and ledger.covers(pd.Timestamp("2024-06-01"), None)
+    ledger.load(rows)
+    assert ledger.complete and len(ledger) == len(DATES) + 1
+
+
+def test_end_only_loads_cover_up_to_their_month():
+    rows = expenses(DATES)
+    ledger = MonthlyLedger(SCHEMAS["expenses"])
+    _, last = month_span(None, pd.Timestamp("2024-02-10"))
+    ledger.load(rows[rows["Date"] <= last], None, last)
+    assert ledger.covers(None, pd.Timestamp("2024-02-25")) and ledger.covers(pd.Timestamp("2024-01-20"), last)
+    assert not ledger.covers(None, pd.Timestamp("2024-03-01")) and not ledger.covers()
+    assert not ledger.complete and len(ledger) == 4
+
+    # A tail that meets the head makes the whole history loaded
+    start, _ = month_span(pd.Timestamp("2024-03-05"))
+    ledger.load(rows[rows["Date"] >= start], start)
+    assert ledger.complete and len(ledger) == len(DATES)
+
+
+def test_end_only_read_then_full_read(db, backend):
+    db.insert("expenses", expenses(DATES))
+    db.query("expenses", outlet=OUTLET, end=pd.Timestamp("2024-02-10"))
+    assert len(db.query("expenses", outlet=OUTLET)) == len(DATES)
+    totals = db.period_totals(OUTLET, "month")
+    pd.testing.assert_frame_equal(totals, backend.period_totals(OUTLET, "month"))
+    assert len(totals) == 4
+
+
+RANGES = [
+    (None, None),
+    ("2024-02-10", "2024-03-05"),
+    ("2024-03-01", None),
+    ("2024-01-01", "2024-01-31"),
+    (None, "2024-02-10"),
+]
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_cached_reads_match_the_backend(db, backend, start, end):
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    db.insert("expenses", expenses(DATES))
+    # A narrower read first, so the cache starts out partly loaded
+    db.query("expenses", outlet=OUTLET, start=pd.Timestamp("2024-02-01"), end=pd.Timestamp("2024-02-29"))
+    core.record_expense(db, OUTLET, "2024-02-15", "Salary", 50)  # loaded month
+    core.record_expense(db, OUTLET, "2024-04-15", "Salary", 60)  # not loaded yet
+    db.delete("expenses", ["e2", "e5"])
+
+    pd.testing.assert_frame_equal(_sorted(db.query("expenses", outlet=OUTLET, start=start, end=end)),
+                                  _sorted(backend.query("expenses", outlet=OUTLET, start=start, end=end)))
+    pd.testing.assert_frame_equal(db.period_totals(OUTLET, "month", start, end),
+                                  backend.period_totals(OUTLET, "month", start, end))
+    rows, total = db.page("expenses", OUTLET, "Date", True, 0, 3, start, end)
+    expected, expected_total = backend.page("expenses", OUTLET, "Date", True, 0, 3, start, end)
+    assert total == expected_total
+    assert rows["id"].tolist() == expected["id"].tolist()
+
+
+@pytest.mark.parametrize("sort_by", ["Notes", "Category", "Amount", "Date"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_sort_missing_values_like_sqlite(db, backend, sort_by, descending):
+    rows = expenses(DATES).assign(Notes=["b", None, "a", None, "c", "a", None],
+                                  Category=["Rent", None, "Salary", "Rent", None, "Misc", "Rent"])
+    db.insert("expenses", rows)
+    cached, total = db.page("expenses", OUTLET, sort_by, descending, 0, 10)
+    stored, _ = backend.page("expenses", OUTLET, sort_by, descending, 0, 10)
+    assert total == len(DATES)
+    assert cached["id"].tolist() == stored["id"].tolist()
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from erp.storage import MIGRATIONS, SQLiteStorage
+
+
+def _old_file(path, version, statements):
+    """A database left at schema ``version`` with some rows in it."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    for script in MIGRATIONS[:version]:
+        conn.executescript(script)
+    for statement in statements:
+        conn.execute(statement)
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.close()
+
+
+V1_ROWS = [
+    "INSERT INTO outlets VALUES ('Cafe', 0)",
+    "INSERT INTO inventory VALUES ('i1', 'Cafe', 'Bun', 10, 'pcs', 50)",
+    "INSERT INTO sales VALUES ('s1', '2024-03-05', 'Cafe', 'Burger', 'Zomato', 2, 130, 26, 10, 20, 74)",
+    "INSERT INTO sales VALUES ('s2', '2024-03-06', 'Closed', 'Burger', NULL, 1, 65, 0, 0, 10, 55)",
+    "INSERT INTO expenses VALUES ('e1', '2024-03-07', 'Cafe', 'Rent', 900, 'March')",
+    "INSERT INTO recipes VALUES ('Burger', 'Bun', 1)",
+    "INSERT INTO menu_prices VALUES ('Burger', 5)",
+    "INSERT INTO platforms VALUES ('Cafe', 'Zomato', 20, 10)",
+]
+
+
+@pytest.mark.parametrize("version", [1, 3])
+def test_old_files_upgrade_to_current_schema(tmp_path, version):
+    path = str(tmp_path / "old.db")
+    rows = V1_ROWS + (["INSERT INTO platform_rates VALUES ('Cafe', 'Zomato', '2024-04-01', 25, 10)"]
+                      if version >= 3 else [])
+    _old_file(path, version, rows)
+
+    db = SQLiteStorage(path, snapshot_every=0)
+    try:
+        assert db._conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert db.outlets() == ["Cafe"]  # the outlet only seen in sales is archived, not listed
+        sales = db.query("sales").sort_values("id")
+        assert sales["Outlet"].tolist() == ["Cafe", "Closed"]
+        assert sales["Platform"].astype(object).tolist()[0] == "Zomato"
+        assert pd.isna(sales["Platform"].iloc[1])
+        assert sales["Revenue"].tolist() == [130.0, 65.0]
+        assert db.query("expenses", outlet="Cafe")["Notes"].tolist() == ["March"]
+        assert db.unit_costs("Cafe").loc["Bun", "Unit_Cost"] == 5.0  # per-lot price filled in from the totals
+        assert db.recipes() == {"Burger": {"Bun": 1.0}}
+        assert db.platforms("Cafe")["Zomato"] == {"comm": 20.0, "del": 10.0}
+        schedule = db.rate_schedule(["Cafe"])
+        assert len(schedule) == (2 if version >= 3 else 1)
+        assert db.dish_pricing("Cafe").empty
+    finally:
+        db.close()
+
+
+def test_new_file_gets_default_outlets(tmp_path):
+    db = SQLiteStorage(str(tmp_path / "new.db"), snapshot_every=0)
+    try:
+        assert db._conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert db.outlets()
+    finally:
+        db.close()
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from erp import core
+from erp.pricing import grand_total, price_table
+
+from conftest import OUTLET
+
+
+def _inputs(rows):
+    return pd.DataFrame(rows, index=["comm", "adv", "misc"]).T
+
+
+def test_pricing_grid_saves_only_changed_dishes(kitchen):
+    db = kitchen
+    db.save_recipe("Fries", {"Bun": 0.5}, 2.5)
+    core.set_dish_pricing(db, OUTLET, _inputs({"Burger": [5.0, 2.0, None], "Fries": [0.0, 0.0, 0.0]}))
+    assert db.dish_pricing(OUTLET).to_dict("index") == {"Burger": {"comm": 5.0, "adv": 2.0, "misc": 0.0}}
+    entries = len(db.history())
+
+    core.set_dish_pricing(db, OUTLET, _inputs({"Burger": [5.0, 2.0, 0.0], "Fries": [0.0, 0.0, 0.0]}))
+    assert len(db.history()) == entries  # nothing changed, nothing journaled
+    core.set_dish_pricing(db, OUTLET, _inputs({"Burger": [0.0, 0.0, 0.0], "Fries": [1.0, 0.0, 0.0]}))
+    assert db.dish_pricing(OUTLET).to_dict("index") == {"Fries": {"comm": 1.0, "adv": 0.0, "misc": 0.0}}
+    assert db.dish_pricing("No Cap Burgers").empty  # per outlet
+
+    db.undo_to(int(db.history(2)["seq"].iloc[1]))
+    assert db.dish_pricing(OUTLET).loc["Burger", "comm"] == 5.0
+
+
+@pytest.mark.parametrize("rows, problem", [
+    ({"Burger": [-1.0, 0.0, 0.0]}, "Costs cannot be negative: Burger"),
+    ({"Pizza": [1.0, 0.0, 0.0]}, "No recipe for dish(es): Pizza"),
+])
+def test_pricing_grid_rejects_bad_rows(kitchen, rows, problem):
+    with pytest.raises(core.RecipeError, match=problem.replace("(", r"\(").replace(")", r"\)")):
+        core.set_dish_pricing(kitchen, OUTLET, _inputs(rows))
+    assert kitchen.dish_pricing(OUTLET).empty
+
+
+def test_new_sales_are_priced_at_the_saved_grand_total(kitchen):
+    db = kitchen
+    core.set_dish_pricing(db, OUTLET, _inputs({"Burger": [6.0, 2.0, 0.0]}))
+    cost = db.dish_costs(OUTLET)["Burger"]
+    table = price_table(db.recipes(), db.dish_costs(OUTLET), db.dish_pricing(OUTLET)).set_index("Dish")
+    assert table.loc["Burger", "Grand_Total"] == pytest.approx(grand_total(cost, 6.0, 2.0))
+    lines = core.record_order(db, OUTLET, pd.Timestamp("2025-01-02"), [("Burger", 2, "Zomato")])
+    assert lines["Revenue"].sum() == pytest.approx(2 * grand_total(cost, 6.0, 2.0))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from erp import core
+
+from conftest import OUTLET
+
+
+def _assert_rates(db, comm, delivery):
+    """Each sale (oldest first) is settled at ``comm``% and a ``delivery`` fee."""
+    sales = db.query("sales", outlet=OUTLET).sort_values("Date")
+    revenue = sales["Revenue"].to_numpy()
+    assert sales["Comm_Paid"].to_numpy() == pytest.approx(revenue * np.array(comm) / 100)
+    assert sales["Del_Cost"].tolist() == delivery
+    net = revenue - sales["Ing_Cost"] - sales["Comm_Paid"] - sales["Del_Cost"]
+    assert sales["Net_Profit"].to_numpy() == pytest.approx(net.to_numpy())
+
+
+def test_dated_rates_apply_from_their_effective_date(kitchen):
+    for day in ("2025-01-05", "2025-02-05", "2025-03-05"):
+        core.record_order(kitchen, OUTLET, pd.Timestamp(day), [("Burger", 1, "Zomato")])
+    _assert_rates(kitchen, [20, 20, 20], [10.0, 10.0, 10.0])
+
+    # Back-dated change: only sales on or after Feb 1 are re-priced
+    assert core.set_platform_rate(kitchen, OUTLET, "Zomato", "2025-02-01", 30, 15) == 2
+    _assert_rates(kitchen, [20, 30, 30], [10.0, 15.0, 15.0])
+
+    # New orders after the change are settled at the new rate straight away
+    core.record_order(kitchen, OUTLET, pd.Timestamp("2025-03-06"), [("Burger", 1, "Zomato")])
+    _assert_rates(kitchen, [20, 30, 30, 30], [10.0, 15.0, 15.0, 15.0])
+
+    core.delete_platform_rate(kitchen, OUTLET, "Zomato", "2025-02-01")
+    _assert_rates(kitchen, [20] * 4, [10.0] * 4)
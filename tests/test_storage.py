@@ -0,0 +1,86 @@
+import threading
+from contextlib import contextmanager
+
+from erp import core
+from erp.storage import SQLiteStorage
+
+from conftest import OUTLET, expenses
+
+OTHER = "No Cap Burgers"
+
+
+def test_reads_do_not_wait_for_another_outlets_transaction(db):
+    db.insert("expenses", expenses(["2024-01-05"], outlet=OTHER))
+    db.query("expenses", outlet=OTHER)
+    opened, release = threading.Event(), threading.Event()
+
+    def long_write():
+        with db.outlet_lock(OUTLET), db.transaction():
+            core.record_expense(db, OUTLET, "2024-01-06", "Rent", 500)
+            opened.set()
+            release.wait(10)
+
+    writer = threading.Thread(target=long_write)
+    writer.start()
+    try:
+        assert opened.wait(10)
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(
+            version=db.backend.data_version(),
+            other=len(db.query("expenses", outlet=OTHER)),
+            mine=len(db.backend.query("expenses", outlet=OUTLET)),
+            page=db.page("expenses", OTHER, "Date")[1],
+        ))
+        reader.start()
+        reader.join(5)
+        assert not reader.is_alive(), "read blocked by another outlet's open transaction"
+        # Other threads see only committed data
+        assert result["other"] == 1 and result["page"] == 1 and result["mine"] == 0
+    finally:
+        release.set()
+        writer.join()
+    assert len(db.query("expenses", outlet=OUTLET)) == 1
+
+
+def test_own_transaction_reads_its_uncommitted_writes(backend):
+    with backend.transaction():
+        backend.add_outlet("Pop-up")
+        assert "Pop-up" in backend.outlets()
+        backend.insert("expenses", expenses(["2024-01-05"], outlet="Pop-up"))
+        assert len(backend.query("expenses", outlet="Pop-up")) == 1
+
+
+def test_own_commits_leave_data_version_alone(backend, tmp_path):
+    version = backend.data_version()
+    backend.insert("expenses", expenses(["2024-01-05"]))
+    assert backend.data_version() == version
+    other = SQLiteStorage(str(tmp_path / "cloudk.db"), snapshot_every=0)
+    try:
+        other.insert("expenses", expenses(["2024-01-06"]).assign(id="x"))
+    finally:
+        other.close()
+    assert backend.data_version() != version
+    assert len(backend.query("expenses")) == 2
+
+
+def test_writes_catch_up_with_a_commit_from_another_process(kitchen, backend, monkeypatch):
+    other = SQLiteStorage(backend.path, snapshot_every=0)  # e.g. the JSON API
+    kitchen.stock_levels(OUTLET)  # stock index cached
+    begin = backend.transaction
+
+    @contextmanager
+    def racing():
+        # The other process commits a deduction just before this one takes the write lock
+        monkeypatch.setattr(backend, "transaction", begin)
+        other.consume_stock(OUTLET, {"Bun": 4})
+        with begin() as store:
+            yield store
+
+    monkeypatch.setattr(backend, "transaction", racing)
+    try:
+        kitchen.consume_stock(OUTLET, {"Bun": 3})
+    finally:
+        other.close()
+    bun = backend.query("inventory", outlet=OUTLET, items=["Bun"])["Qty"].sum()
+    assert bun == 3
+    assert kitchen.stock_levels(OUTLET).loc["Bun", "On_Hand"] == 3
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from erp import core
+
+from conftest import OUTLET, expenses
+
+OTHER = "No Cap Burgers"
+
+
+def _frames_equal(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+
+@pytest.fixture
+def two_outlets(kitchen):
+    core.add_stock(kitchen, OTHER, "Bun", 10, "pcs", 50)
+    core.add_stock(kitchen, OTHER, "Patty", 10, "pcs", 200)
+    core.set_platform(kitchen, OTHER, "Swiggy", 15, 5)
+    core.record_order(kitchen, OUTLET, pd.Timestamp("2024-01-10"), [("Burger", 2, "Zomato")])
+    core.record_order(kitchen, OTHER, pd.Timestamp("2024-02-03"), [("Burger", 3, "Swiggy")])
+    kitchen.insert("expenses", expenses(["2024-01-05", "2024-02-05"]))
+    kitchen.insert("expenses", expenses(["2024-01-07"], outlet=OTHER).assign(id="x0"))
+    return kitchen
+
+
+def test_all_outlet_totals_stack_each_outlets_totals(two_outlets, backend):
+    db = two_outlets
+    totals = db.outlet_totals("month")
+    _frames_equal(totals, backend.outlet_totals("month"))
+    assert sorted(set(totals["Outlet"])) == sorted([OUTLET, OTHER])
+    for outlet in (OUTLET, OTHER):
+        own = totals[totals["Outlet"] == outlet].drop(columns="Outlet")
+        _frames_equal(own, db.period_totals(outlet, "month"))
+    _frames_equal(db.outlet_totals("year", outlets=[OTHER]), backend.outlet_totals("year", outlets=[OTHER]))
+    _frames_equal(db.platform_totals().sort_values(["Outlet", "Platform"]),
+                  backend.platform_totals().sort_values(["Outlet", "Platform"]))
+
+
+def test_all_outlet_totals_follow_writes_and_ranges(two_outlets, backend):
+    db = two_outlets
+    db.outlet_totals("month")  # rollups loaded
+    core.record_order(db, OTHER, pd.Timestamp("2024-03-01"), [("Burger", 1, "Swiggy")])
+    core.record_expense(db, OUTLET, "2024-01-20", "Salary", 300)
+    db.delete("expenses", ["x0"])
+    _frames_equal(db.outlet_totals("month"), backend.outlet_totals("month"))
+    start, end = pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-31")
+    _frames_equal(db.outlet_totals("month", start=start, end=end),
+                  backend.outlet_totals("month", start=start, end=end))
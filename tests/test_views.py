@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from erp import core
+from erp.storage import open_storage
+
+from conftest import OUTLET, expenses
+from widgets import memoized
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app on ``page``, against a fresh database file."""
+    path = str(tmp_path / "app.db")
+    monkeypatch.setenv("CLOUDK_DB", path)
+
+    def run(page):
+        at = AppTest.from_file(APP, default_timeout=60)
+        at.session_state["page"] = page
+        at.run()
+        assert not at.exception
+        return at
+
+    run.path = path
+    return run
+
+
+def test_stock_room_shows_the_inventory_page(app):
+    at = app("Stock Room")
+    assert "Your stock room is empty" in at.info[0].value
+
+    db = open_storage(app.path)
+    core.add_stock(db, OUTLET, "Bun", 10, "pcs", 50)
+    core.add_stock(db, OUTLET, "Patty", 5, "pcs", 100)
+    at.run()
+    assert not at.exception
+    assert at.dataframe[0].value["Item"].tolist() == ["Bun", "Patty"]
+    assert any("of 2 stock items" in caption.value for caption in at.caption)
+
+
+def test_memoized_results_are_reused_until_a_write(db, tmp_path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return db.period_totals(OUTLET, "month")
+
+    key = ("test", str(tmp_path))
+    first = memoized(db, key, build)
+    assert memoized(db, key, build) is first and len(calls) == 1
+    core.record_expense(db, OUTLET, "2024-01-05", "Rent", 100)
+    assert memoized(db, key, build)["Amount"].sum() == 100 and len(calls) == 2
+
+
+def test_expense_history_is_paged(app):
+    db = open_storage(app.path)
+    db.insert("expenses", expenses([pd.Timestamp("2024-01-01") + pd.Timedelta(days=i) for i in range(60)]))
+    at = app("Misc Expenses")
+    at.radio(key="expenses_range").set_value("All Time").run()
+    assert at.dataframe[0].value["Amount"].tolist()[:2] == [60.0, 59.0]  # newest first
+    assert any("Showing 1–25 of 60 expenses · page 1 of 3" == caption.value for caption in at.caption)
+
+    at.number_input(key="expenses_page").set_value(3).run()
+    assert not at.exception
+    assert at.dataframe[0].value["Amount"].tolist() == [float(i) for i in range(10, 0, -1)]
+    assert any("Showing 51–60 of 60 expenses · page 3 of 3" == caption.value for caption in at.caption)
+
+
+def test_menu_pricing_grid_shows_and_saves_the_inputs(app):
+    db = open_storage(app.path)
+    core.add_stock(db, OUTLET, "Bun", 10, "pcs", 50)
+    db.save_recipe("Burger", {"Bun": 2}, 10.0)
+    core.set_dish_pricing(db, OUTLET, pd.DataFrame({"comm": [3.0], "adv": [1.0], "misc": [0.0]}, index=["Burger"]))
+    at = app("Menu & Pricing")
+    grid = at.dataframe[0].value.set_index("Dish")
+    assert grid.loc["Burger", ["Production_Cost", "comm", "adv"]].tolist() == [10.0, 3.0, 1.0]
+
+    at.button[0].click().run()  # "Save Pricing" with the grid as shown
+    assert not at.exception and not at.error
+    assert db.dish_pricing(OUTLET).to_dict("index") == {"Burger": {"comm": 3.0, "adv": 1.0, "misc": 0.0}}
@@ -0,0 +1,31 @@
+"""The Cloud K pages, one module per sidebar entry.
+
+Each module exposes ``render(db, selected_outlet)``. A page's module (and
+whatever it imports, such as plotly for the Dashboard) is only imported the
+first time that page is shown, so opening the app or clicking through the
+other pages never pays for it.
+"""
+import importlib
+
+from erp import diagnostics
+
+# Sidebar label -> module in this package, in menu order
+PAGES = {
+    "Dashboard": "dashboard",
+    "Sale Entry": "sale_entry",
+    "Bulk Import": "bulk_import",
+    "Misc Expenses": "expenses",
+    "Stock Room": "stock_room",
+    "Recipe Master": "recipes",
+    "Menu & Pricing": "menu_pricing",
+    "Outlet & Platform Settings": "settings",
+    "Backup & History": "backup",
+    "Diagnostics": "diagnostics",
+}
+
+
+def render(page, db, selected_outlet):
+    """Draw ``page``, importing its module on first use."""
+    with diagnostics.section("load page"):
+        module = importlib.import_module(f"{__name__}.{PAGES[page]}")
+    module.render(db, selected_outlet)
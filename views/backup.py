@@ -0,0 +1,60 @@
+"""Backup & History: the change journal, undo, snapshots and full backups."""
+import streamlit as st
+from datetime import datetime
+
+from erp import core, diagnostics
+from erp.journal import JournalError
+
+
+def render(db, selected_outlet):
+    st.title("🕘 Backup & History")
+    st.caption("Every change is journaled. Undoing rolls the books back to before any entry below, "
+               "and is journaled too, so an undo can itself be undone.")
+
+    with diagnostics.section("history"):
+        history = db.history(200)
+    if history.empty:
+        st.info("No changes since the last snapshot.")
+    else:
+        st.dataframe(history, hide_index=True, width="stretch",
+                     column_config={"seq": "#", "ts": "Time", "op": "Type", "summary": "Change"})
+        summaries = dict(zip(history["seq"], history["summary"]))
+        c1, c2 = st.columns([3, 1])
+        undo_from = c1.selectbox("Undo this change and everything after it", list(summaries),
+                                 format_func=lambda seq: f"#{seq} · {summaries[seq]}")
+        c2.write("")
+        if c2.button("↩️ Undo", width="stretch"):
+            try:
+                with diagnostics.section("undo"):
+                    undone = db.undo_to(undo_from - 1)
+            except JournalError as exc:
+                st.error(str(exc))
+            else:
+                st.success(f"Undid {undone} change(s).")
+                st.rerun()
+
+    st.divider()
+    st.subheader("💾 Full Backup")
+    b1, b2 = st.columns(2)
+    with b1:
+        st.download_button("📥 Download Full Backup", db.export_database,
+                           f"cloudk-backup-{datetime.now():%Y%m%d-%H%M}.db", "application/x-sqlite3")
+        if st.button("📸 Take Snapshot Now"):
+            db.snapshot()
+            st.success("Snapshot saved.")
+    with b2:
+        # Bumping the key clears the uploader after a successful restore
+        backup_key = f"backup_upload_{st.session_state.get('backup_round', 0)}"
+        backup = st.file_uploader("Restore From Backup", type=["db", "sqlite"], key=backup_key)
+        if backup is not None:
+            st.warning("This replaces the data of every outlet. It can be undone from the history above.")
+            if st.button("⚠️ Replace All Data"):
+                try:
+                    with diagnostics.section("import backup"):
+                        core.import_backup(db, backup.getvalue())
+                except ValueError as exc:
+                    st.error(f"❌ Nothing was restored: {exc}")
+                else:
+                    st.session_state.backup_round = st.session_state.get("backup_round", 0) + 1
+                    st.success("Backup restored!")
+                    st.rerun()
@@ -0,0 +1,49 @@
+"""Bulk Import: load aggregator sales reports."""
+import streamlit as st
+
+from erp import core, diagnostics
+from erp.orders import SaleError
+
+
+def render(db, selected_outlet):
+    st.title(f"📥 Bulk Import: {selected_outlet}")
+    st.caption("Upload a Zomato/Swiggy sales export (CSV or Excel .xlsx) with Date, Dish and Qty columns. "
+               "Platform and gross order value (Amount) columns are used when present; net payouts are not.")
+
+    # Bumping the key clears the uploader after a successful import
+    upload_key = f"report_upload_{st.session_state.get('import_round', 0)}"
+    c1, c2 = st.columns([3, 2])
+    report = c1.file_uploader("Sales Report", type=["csv", "xlsx"], key=upload_key)
+    plat_choice = c2.selectbox("Platform", ["From file"] + (list(db.platforms(selected_outlet)) or ["Direct"]))
+    report_plat = None if plat_choice == "From file" else plat_choice
+
+    if report is not None:
+        try:
+            # Dry run: parse, validate, cost and check stock without writing anything
+            report.seek(0)
+            with diagnostics.section("import dry run"):
+                lines, demand = core.import_report(db, selected_outlet, report, name=report.name,
+                                              platform=report_plat, dry_run=True)
+        except SaleError as exc:
+            for problem in exc.problems:
+                st.error(f"❌ {problem}")
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Sale Lines", len(lines))
+            m2.metric("Revenue", f"₹{round(lines['Revenue'].sum(), 2)}")
+            m3.metric("Ingredient Cost", f"₹{round(lines['Ing_Cost'].sum(), 2)}")
+
+            st.dataframe(lines.head(100), hide_index=True, width="stretch")
+            with st.expander("🧾 Stock that will be deducted"):
+                st.dataframe(demand.rename("Qty").reset_index(), hide_index=True)
+
+            if st.button("✅ Import All Lines & Deduct Stock"):
+                try:
+                    report.seek(0)
+                    core.import_report(db, selected_outlet, report, name=report.name, platform=report_plat)
+                except SaleError as exc:
+                    st.error(f"❌ Nothing was imported: {exc}")
+                else:
+                    st.session_state.import_round = st.session_state.get("import_round", 0) + 1
+                    st.success(f"✅ Imported {len(lines)} sales!")
+                    st.rerun()
@@ -0,0 +1,100 @@
+"""Dashboard: period P&L, outlet comparison and platform split."""
+import plotly.express as px
+import streamlit as st
+
+from erp import diagnostics
+from erp.rollups import contribution_ranking
+from widgets import date_range, memoized
+
+COLORS = {'Revenue': '#3498db', 'Final_Profit': '#2ecc71'}
+
+
+def _period_chart(stats):
+    return px.bar(stats, x='Period', y=['Revenue', 'Final_Profit'], barmode='group', color_discrete_map=COLORS)
+
+
+def _outlet_view(db, outlet, grain, start=None, end=None):
+    """Per-period totals of one outlet and their chart."""
+    # Whole history: pre-aggregated totals kept up to date on every insert and delete;
+    # a date range only reads the months it covers
+    stats = db.period_totals(outlet, grain, start, end)
+    return {"stats": stats, "chart": None if stats.empty else _period_chart(stats)}
+
+
+def _all_outlets_view(db, grain, start=None, end=None):
+    """Totals, ranking and charts across every outlet."""
+    # Per-outlet, per-period P&L for every outlet from one grouped pass
+    outlet_stats = db.outlet_totals(grain, start=start, end=end)
+    stats = outlet_stats.groupby("Period", sort=False).sum(numeric_only=True).reset_index()
+    view = {"stats": stats, "chart": None}
+    if not stats.empty:
+        ranking = contribution_ranking(outlet_stats)
+        view.update(
+            chart=_period_chart(stats),
+            ranking=ranking,
+            comparison=px.bar(ranking, x='Outlet', y=['Revenue', 'Final_Profit'], barmode='group',
+                              color_discrete_map=COLORS),
+            trend=px.line(outlet_stats, x='Period', y='Final_Profit', color='Outlet', markers=True),
+        )
+    return view
+
+
+def render(db, selected_outlet):
+    scope = st.radio("Scope", ["Active Outlet", "All Outlets"], horizontal=True)
+    view_type = st.radio("Switch View", ["Monthly Analytics", "Yearly Analytics"], horizontal=True)
+    grain = "month" if view_type == "Monthly Analytics" else "year"
+    start, end = date_range("dashboard", default="All Time")
+
+    # Figures and totals are shared by every session and rebuilt only after the data changes
+    with diagnostics.section("aggregate"):
+        if scope == "Active Outlet":
+            st.title(f"📊 {selected_outlet}: Financial Engine")
+            view = memoized(db, ("dashboard", selected_outlet, grain, start, end),
+                            lambda: _outlet_view(db, selected_outlet, grain, start, end))
+        else:
+            st.title("📊 All Outlets: Financial Engine")
+            view = memoized(db, ("dashboard", None, grain, start, end),
+                            lambda: _all_outlets_view(db, grain, start, end))
+    final_stats = view["stats"]
+
+    if final_stats.empty:
+        st.info("No data found. Start by entering sales or expenses!")
+    else:
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Total Revenue", f"₹{round(final_stats['Revenue'].sum(), 2)}")
+        m2.metric("Inventory Costs", f"₹{round(final_stats['Ing_Cost'].sum(), 2)}")
+        m3.metric("Platform & Delivery", f"₹{round(final_stats['Comm_Paid'].sum() + final_stats['Del_Cost'].sum(), 2)}")
+        
+        actual_profit = final_stats['Final_Profit'].sum()
+        m4.metric("Net Profit", f"₹{round(actual_profit, 2)}", delta=f"{round(actual_profit, 2)}")
+
+        with diagnostics.section("period chart"):
+            st.plotly_chart(view["chart"], width="stretch")
+
+    if scope == "All Outlets" and not final_stats.empty:
+        st.subheader("🏪 Outlet Comparison")
+        with diagnostics.section("outlet comparison"):
+            c1, c2 = st.columns(2)
+            c1.plotly_chart(view["comparison"], width="stretch")
+            c2.plotly_chart(view["trend"], width="stretch")
+
+        st.subheader("🏆 Contribution Ranking")
+        st.dataframe(
+            view["ranking"], hide_index=True, width="stretch",
+            column_config={
+                "Revenue": st.column_config.NumberColumn(format="₹%.2f"),
+                "Final_Profit": st.column_config.NumberColumn("Profit", format="₹%.2f"),
+                "Revenue_Share": st.column_config.ProgressColumn("Revenue Share", format="percent",
+                                                                 min_value=0.0, max_value=1.0),
+                "Profit_Share": st.column_config.ProgressColumn("Profit Share", format="percent",
+                                                               min_value=0.0, max_value=1.0),
+            },
+        )
+
+        st.subheader("🛵 Platform Split")
+        with diagnostics.section("platform split"):
+            metric = st.radio("Measure", ["Revenue", "Net_Profit", "Qty"], horizontal=True, key="platform_measure")
+            fig = memoized(db, ("platform split", metric, start, end),
+                           lambda: px.bar(db.platform_totals(start=start, end=end), x='Outlet', y=metric,
+                                          color='Platform', barmode='stack'))
+            st.plotly_chart(fig, width="stretch")
@@ -0,0 +1,54 @@
+"""Diagnostics (hidden): rerun timings, slow sections and cache sizes."""
+import pandas as pd
+import streamlit as st
+
+from erp import diagnostics
+
+
+def render(db, selected_outlet):
+    st.title("🩺 Diagnostics")
+    st.caption(f"Reruns over {diagnostics.SLOW_RERUN_S}s, or sections over {diagnostics.SLOW_SECTION_S}s, "
+               "are logged as warnings. Set CLOUDK_PERF_LOG to also write every rerun as JSON lines.")
+
+    runs = list(diagnostics.RECENT)
+    if not runs:
+        st.info("No reruns recorded yet. Visit some pages first.")
+    else:
+        history = pd.DataFrame([{k: r[k] for k in ("ts", "page", "total_ms", "rss_mib", "slow")} for r in runs])
+        st.subheader("⏱️ Reruns per Page")
+        st.dataframe(
+            history.groupby("page")["total_ms"]
+                   .agg(runs="count", median_ms="median", p95_ms=lambda s: s.quantile(0.95), max_ms="max")
+                   .join(history.groupby("page")["slow"].sum().rename("slow_runs"))
+                   .reset_index(),
+            hide_index=True, width="stretch",
+        )
+
+        st.subheader("🔬 Sections")
+        sections = pd.DataFrame([
+            {"page": r["page"], "section": name, "ms": timing["ms"], "calls": timing["calls"]}
+            for r in runs for name, timing in r["sections"].items()
+        ])
+        if not sections.empty:
+            st.dataframe(
+                sections.groupby(["page", "section"])["ms"]
+                        .agg(runs="count", median_ms="median", max_ms="max").reset_index(),
+                hide_index=True, width="stretch",
+            )
+
+        st.subheader("📜 Recent Reruns")
+        st.dataframe(history.iloc[::-1].head(100), hide_index=True, width="stretch",
+                     column_config={"slow": st.column_config.CheckboxColumn("Slow")})
+
+    st.subheader("🗄️ Tables")
+    rss = diagnostics.rss_mib()
+    if rss is not None:
+        st.metric("Process memory (RSS)", f"{round(rss, 1)} MiB")
+    counts = pd.DataFrame([{"Table": table, "Outlet": outlet, "Rows": rows}
+                           for table, per_outlet in db.row_counts().items() for outlet, rows in per_outlet.items()])
+    cached = pd.DataFrame(db.cache_stats(), columns=["Table", "Outlet", "Rows", "Bytes"])
+    if not counts.empty:
+        counts = counts.merge(cached.rename(columns={"Rows": "Cached_Rows"}), on=["Table", "Outlet"], how="left")
+        counts["Cached_MiB"] = counts.pop("Bytes") / 2**20
+        st.dataframe(counts, hide_index=True, width="stretch",
+                     column_config={"Cached_MiB": st.column_config.NumberColumn("Cached (MiB)", format="%.2f")})
@@ -0,0 +1,38 @@
+"""Misc Expenses: record and page through an outlet's overheads."""
+import streamlit as st
+from datetime import datetime
+
+from erp import core
+from widgets import date_range, paged_grid
+
+
+def render(db, selected_outlet):
+    st.title(f"💸 Expenses: {selected_outlet}")
+    
+    with st.form("add_expense", clear_on_submit=True):
+        c1, c2, c3 = st.columns(3)
+        cat = c1.selectbox("Category", ["Rent", "Salary", "Electricity", "Marketing", "Misc"])
+        amt = c2.number_input("Amount (₹)", min_value=0.0)
+        date_input = c3.date_input("Date", datetime.now())
+        note = st.text_input("Notes")
+        
+        if st.form_submit_button("Record Expense"):
+            core.record_expense(db, selected_outlet, date_input, cat, amt, note)
+            st.success("Expense Recorded!")
+            st.rerun()
+
+    st.divider()
+    st.subheader("📜 Expense History")
+    start, end = date_range("expenses")
+
+    # Paginated grid: only the visible page of the chosen months is sliced out and rendered
+    shown = paged_grid(
+        db, "expenses", selected_outlet, ["Date", "Category", "Amount", "Notes"],
+        key="expenses", sort_by="Date", label="expenses", start=start, end=end,
+        column_config={
+            "Date": st.column_config.DateColumn(format="DD-MMM-YYYY"),
+            "Amount": st.column_config.NumberColumn(format="₹%.2f"),
+        },
+    )
+    if not shown:
+        st.info("No expenses found in this date range.")
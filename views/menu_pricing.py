@@ -0,0 +1,63 @@
+"""Menu & Pricing: selling prices and the costing table per platform."""
+import streamlit as st
+
+from erp import core, diagnostics
+from erp.pricing import LABOUR_RATE, PROFIT_RATE, price_table
+
+
+def _money(label, **options):
+    return st.column_config.NumberColumn(label, format="₹%.2f", **options)
+
+
+def render(db, selected_outlet):
+    st.title("💰 Menu Master & advanced Costing")
+
+    recipes = db.recipes()
+    if not recipes:
+        st.info("⚠️ No recipes found. Please create a recipe in 'Recipe Master' first to see it here.")
+    else:
+        with diagnostics.section("dish costs"):
+            dish_costs = db.dish_costs(selected_outlet)
+        st.subheader(f"Costing Analysis for {selected_outlet}")
+        st.caption("Enter each dish's per-unit platform commission, advertisement and misc costs, then save. "
+                   "Sale Entry prices new sales at the Grand Total.")
+
+        # One numeric table for every dish, recomputed column-wise from the saved inputs
+        with diagnostics.section("pricing table"):
+            table = price_table(recipes, dish_costs, db.dish_pricing(selected_outlet))
+
+        with st.form("pricing_form"):
+            # The grid is rebuilt (and unsaved edits dropped) whenever the saved table changes
+            edited = st.data_editor(
+                table, hide_index=True, width="stretch", key=f"pricing_{selected_outlet}",
+                column_config={
+                    "Dish": st.column_config.TextColumn("Dish Name", disabled=True),
+                    "Production_Cost": _money("Production Cost", disabled=True),
+                    "comm": _money("Platform Commission", min_value=0.0, step=1.0),
+                    "adv": _money("Advertisement Cost", min_value=0.0, step=1.0),
+                    "misc": _money("Misc", min_value=0.0, step=1.0),
+                    "Total_Spent": _money("Total Spent", disabled=True),
+                    "Labour": _money(f"Labour ({LABOUR_RATE:.0%})", disabled=True),
+                    "Profit": _money(f"Profit ({PROFIT_RATE:.0%})", disabled=True),
+                    "Grand_Total": _money("Grand Total", disabled=True),
+                },
+            )
+            saved = st.form_submit_button("💾 Save Pricing")
+
+        if saved:
+            try:
+                core.set_dish_pricing(db, selected_outlet, edited.set_index("Dish"))
+            except core.RecipeError as exc:
+                st.error(f"❌ {exc}")
+            else:
+                st.toast(f"Pricing for {selected_outlet} saved")
+                st.rerun()
+
+        # Exported as plain numbers, straight from the table
+        st.download_button(
+            "📥 Download Pricing Table",
+            table.to_csv(index=False, float_format="%.2f").encode('utf-8'),
+            f"Pricing_Analysis_{selected_outlet}.csv",
+            "text/csv",
+            key='download-csv'
+        )
@@ -0,0 +1,94 @@
+"""Recipe Master: build dishes from stock items and see their live cost."""
+import streamlit as st
+
+from erp import core, diagnostics
+
+
+def render(db, selected_outlet):
+    st.title("👨‍🍳 Recipe Builder")
+    
+    # 1. Cost per single piece/unit of each stock item, kept up to date by the costing engine
+    with diagnostics.section("stock lookup"):
+        stock_lookup = db.unit_costs(selected_outlet)
+
+    if stock_lookup.empty:
+        st.warning(f"⚠️ Stock Room is empty for '{selected_outlet}'. Please add items in the 'Stock Room' first.")
+    else:
+
+        # 2. Recipe Inputs (Outside form for live updates)
+        st.subheader("Create a New Dish")
+        dish_name = st.text_input("Dish Name (e.g., Burger)")
+        
+        selected_ings = st.multiselect(
+            "Select Ingredients from Stock", 
+            options=list(stock_lookup.index)
+        )
+        
+        st.divider()
+        
+        recipe_map = {}
+        total_production_cost = 0.0
+        
+        if selected_ings:
+            st.write("**Specify Pieces/Amount Used per Dish:**")
+            for ing in selected_ings:
+                u_price = stock_lookup.at[ing, 'Unit_Cost']
+                u_type = stock_lookup.at[ing, 'Unit']
+                
+                c1, c2, c3 = st.columns([3, 2, 2])
+                
+                # These inputs now update 'total_production_cost' instantly
+                qty_used = c1.number_input(f"Amount of {ing} ({u_type})", min_value=0.0, step=0.01, key=f"rec_{ing}")
+                
+                item_cost = qty_used * u_price
+                
+                c2.write(f"Cost per {u_type}: ₹{round(u_price, 2)}")
+                c3.write(f"**Subtotal: ₹{round(item_cost, 2)}**")
+                
+                recipe_map[ing] = qty_used
+                total_production_cost += item_cost
+            
+            st.divider()
+            st.success(f"💰 **Total Ingredient Cost for this Dish: ₹{round(total_production_cost, 2)}**")
+
+            # 3. Save Button (Inside a small form to trigger the save action)
+            with st.form("save_recipe_form"):
+                st.write("Confirm and Save to Menu")
+                if st.form_submit_button("Save Recipe"):
+                    if dish_name and recipe_map:
+                        db.save_recipe(dish_name, recipe_map, total_production_cost)
+                        st.success(f"✅ Recipe for {dish_name} saved!")
+                        st.rerun()
+                    else:
+                        st.error("Please provide a name and ingredients.")
+
+    # --- DISPLAY SAVED RECIPES ---
+    recipes = db.recipes()
+    if recipes:
+        # Live costs at this outlet's current stock prices
+        with diagnostics.section("dish costs"):
+            dish_costs = db.dish_costs(selected_outlet)
+        st.divider()
+        st.subheader(f"📜 Saved Recipes & Production Costs ({selected_outlet})")
+        with diagnostics.section("recipe list"):
+            for dish, ingredients in recipes.items():
+                cost = dish_costs.get(dish, 0)
+                with st.expander(f"🍴 {dish} — Production Cost: ₹{round(cost, 2)}"):
+                    for item, amount in ingredients.items():
+                        unit_disp = stock_lookup.at[item, "Unit"] if item in stock_lookup.index else "units"
+                        st.write(f"- {item}: {amount} {unit_disp}")
+                
+                    if st.button(f"Delete {dish}", key=f"rm_{dish}"):
+                        db.delete_recipe(dish)
+                        st.rerun()
+
+                    r1, r2 = st.columns([3, 1])
+                    new_dish_name = r1.text_input("Rename to", key=f"rename_{dish}", label_visibility="collapsed",
+                                                  placeholder="New name (sales history follows)")
+                    if r2.button("Rename", key=f"mv_{dish}"):
+                        try:
+                            core.rename_dish(db, dish, new_dish_name)
+                        except core.RecipeError as exc:
+                            st.error(str(exc))
+                        else:
+                            st.rerun()
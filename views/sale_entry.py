@@ -0,0 +1,81 @@
+"""Sale Entry: record orders against stock and page through the sales log."""
+import pandas as pd
+import streamlit as st
+from datetime import datetime
+
+from erp import core, diagnostics
+from erp.inventory import InsufficientStock
+from erp.orders import SaleError
+from widgets import date_range, paged_grid
+
+
+def render(db, selected_outlet):
+    st.title(f"🎯 Sale Entry: {selected_outlet}")
+    
+    # 1. Verification
+    recipes = db.recipes()
+    if not recipes:
+        st.warning("⚠️ No recipes found. Please create recipes in 'Recipe Master' first.")
+    else:
+        # Fetch platforms from config
+        platform_options = list(db.platforms(selected_outlet).keys()) or ["Direct"]
+        entry_mode = st.radio("Entry Mode", ["Single Dish", "Order (Multiple Dishes)"], horizontal=True)
+
+        # Both modes price lines at the Menu & Pricing "Grand Total", check the combined
+        # ingredient demand once, deduct stock FIFO and write every line in one commit
+        order_lines = None
+        if entry_mode == "Single Dish":
+            with st.form("sale_entry_form", clear_on_submit=True):
+                c1, c2, c3, c4 = st.columns(4)
+                sale_date = c1.date_input("Sale Date", datetime.now())
+                selected_dish = c2.selectbox("Select Dish", list(recipes.keys()))
+                selected_plat = c3.selectbox("Platform", platform_options)
+                qty_sold = c4.number_input("Quantity Sold", min_value=1, step=1)
+                
+                if st.form_submit_button("🔨 Record Sale & Deduct Stock"):
+                    order_lines = [(selected_dish, qty_sold, selected_plat)]
+        else:
+            with st.form("order_entry_form", clear_on_submit=True):
+                sale_date = st.date_input("Order Date", datetime.now())
+                cart = st.data_editor(
+                    pd.DataFrame({"Dish": pd.Series(dtype=object), "Qty": pd.Series(dtype=int),
+                                  "Platform": pd.Series(dtype=object)}),
+                    num_rows="dynamic", width="stretch", key="order_cart",
+                    column_config={
+                        "Dish": st.column_config.SelectboxColumn(options=list(recipes.keys()), required=True),
+                        "Qty": st.column_config.NumberColumn(min_value=1, step=1, default=1, required=True),
+                        "Platform": st.column_config.SelectboxColumn(options=platform_options,
+                                                                     default=platform_options[0]),
+                    },
+                )
+                if st.form_submit_button("🧾 Record Order & Deduct Stock"):
+                    order_lines = cart.itertuples(index=False, name=None)
+
+        if order_lines is not None:
+            try:
+                with diagnostics.section("record order"):
+                    recorded = core.record_order(db, selected_outlet, sale_date, order_lines)
+            except SaleError as exc:
+                for problem in exc.problems:
+                    st.error(f"❌ {problem}")
+            except InsufficientStock as exc:
+                for item, (need, have) in exc.shortfalls.items():
+                    st.error(f"❌ Insufficient {item}. Need {need}, have {round(have, 2)}")
+            else:
+                st.success(f"✅ Recorded {len(recorded)} line(s)! Revenue: ₹{round(recorded['Revenue'].sum(), 2)} (Grand Total)")
+                st.rerun()
+
+    # --- RECENT SALES LOGS ---
+    st.divider()
+    st.subheader("📜 Recent Sales Logs")
+    start, end = date_range("sales")
+    shown = paged_grid(
+        db, "sales", selected_outlet, ["Date", "Dish", "Platform", "Qty", "Revenue"],
+        key="sales", sort_by="Date", label="sales", start=start, end=end,
+        column_config={
+            "Date": st.column_config.DateColumn(format="DD-MMM-YYYY"),
+            "Revenue": st.column_config.NumberColumn("Grand Total (Revenue)", format="₹%.2f"),
+        },
+    )
+    if not shown:
+        st.info("No sales recorded in this date range.")
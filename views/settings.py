@@ -0,0 +1,139 @@
+"""Outlet & Platform Settings: outlets, linked platforms and dated rates."""
+import streamlit as st
+from datetime import datetime
+
+from erp import core, diagnostics
+
+
+def render(db, selected_outlet):
+    st.title("⚙️ Outlet & Platform Config")
+    
+    # --- OUTLET MANAGEMENT SECTION ---
+    st.subheader("🏢 Outlet Management")
+    c1, c2 = st.columns(2)
+    
+    with c1:
+        # Add New Outlet
+        with st.expander("➕ Add New Outlet"):
+            new_outlet_name = st.text_input("New Outlet Name")
+            if st.button("Create Outlet"):
+                try:
+                    core.add_outlet(db, new_outlet_name)
+                except core.OutletError as exc:
+                    st.error(str(exc))
+                else:
+                    st.success(f"Outlet '{new_outlet_name}' added!")
+                    st.rerun()
+
+    with c2:
+        # Rename Current Outlet
+        with st.expander("📝 Rename Current Outlet"):
+            rename_val = st.text_input("New name for " + selected_outlet)
+            if st.button("Update Name"):
+                if rename_val:
+                    # Rows refer to the outlet by id, so only the outlet's own name changes
+                    try:
+                        core.rename_outlet(db, selected_outlet, rename_val)
+                    except core.OutletError as exc:
+                        st.error(str(exc))
+                    else:
+                        st.success("Outlet renamed!")
+                        st.rerun()
+
+    # Delete Outlet
+    with st.expander("🗑️ Danger Zone: Delete Outlet"):
+        purge = st.radio(
+            "What happens to its data?",
+            ["Archive (keep stock, sales and expenses; can be restored)", "Delete the outlet and all of its data"],
+            key="delete_mode",
+        ).startswith("Delete")
+        if purge:
+            st.warning(f"This will delete '{selected_outlet}' with every stock, sale, expense and platform row. "
+                       "It can only be brought back from Backup & History.")
+        else:
+            st.warning(f"This will remove '{selected_outlet}' from the list. Its data is kept and comes back "
+                       "if the outlet is restored.")
+        if st.button(f"Permanently Delete {selected_outlet}" if purge else f"Archive {selected_outlet}"):
+            try:
+                core.delete_outlet(db, selected_outlet, purge=purge)
+            except core.OutletError as exc:
+                st.error(str(exc))
+            else:
+                st.success("Outlet deleted." if purge else "Outlet archived.")
+                st.rerun()
+
+    archived = db.archived_outlets()
+    if archived:
+        with st.expander(f"🗄️ Archived Outlets ({len(archived)})"):
+            for name in archived:
+                col_n, col_b = st.columns([3, 1])
+                col_n.write(name)
+                if col_b.button("Restore", key=f"restore_{name}"):
+                    core.add_outlet(db, name)
+                    st.rerun()
+
+    st.divider()
+
+    # --- PLATFORM MANAGEMENT SECTION ---
+    st.subheader("🌐 Platform Settings")
+    p1, p2 = st.columns(2)
+    with p1:
+        st.markdown("#### Link New Platform")
+        p_name = st.text_input("Platform Name (e.g., Zomato, Swiggy)")
+        p_comm = st.number_input("Commission %", min_value=0.0, step=0.1)
+        p_del = st.number_input("Delivery Fee (₹)", min_value=0.0, step=1.0)
+        if st.button("Add Platform"):
+            # Re-prices sales already recorded through this platform at the new base rates
+            try:
+                repriced = core.set_platform(db, selected_outlet, p_name, p_comm, p_del)
+            except core.OutletError as exc:
+                st.error(str(exc))
+            else:
+                st.success(f"Linked {p_name} to {selected_outlet}! Re-priced {repriced} sale(s).")
+
+    with p2:
+        st.markdown("#### Active Platforms")
+        platforms = db.platforms(selected_outlet)
+        if platforms:
+            for plat, details in platforms.items():
+                col_p, col_b = st.columns([3, 1])
+                col_p.write(f"**{plat}**: {details['comm']}% comm | ₹{details['del']} fee")
+                if col_b.button("🗑️", key=f"del_plat_{plat}"):
+                    core.delete_platform(db, selected_outlet, plat)
+                    st.rerun()
+        else:
+            st.info("No platforms linked to this outlet.")
+
+    # --- DATED RATE CHANGES ---
+    if platforms:
+        st.markdown("#### 📅 Rate Changes")
+        st.caption("Commission is a % of each sale's revenue and the delivery fee is charged per sale line. "
+                   "A change applies to sales dated on or after its date, including ones already recorded.")
+        r1, r2, r3, r4 = st.columns(4)
+        rate_plat = r1.selectbox("Platform", list(platforms), key="rate_platform")
+        rate_from = r2.date_input("Effective From", datetime.now(), key="rate_from")
+        rate_comm = r3.number_input("New Commission %", min_value=0.0, step=0.1,
+                                    value=float(platforms[rate_plat]["comm"]), key="rate_comm")
+        rate_del = r4.number_input("New Delivery Fee (₹)", min_value=0.0, step=1.0,
+                                   value=float(platforms[rate_plat]["del"]), key="rate_del")
+        if st.button("Schedule Rate Change"):
+            with diagnostics.section("resettle"):
+                repriced = core.set_platform_rate(db, selected_outlet, rate_plat, rate_from, rate_comm, rate_del)
+            st.success(f"Rate change saved. Re-priced {repriced} sale(s).")
+
+        schedule = db.rate_schedule([selected_outlet])
+        dated = schedule[schedule["Effective"].notna()]
+        for plat, effective, comm, fee in zip(dated["Platform"], dated["Effective"], dated["comm"], dated["del"]):
+            col_r, col_b = st.columns([3, 1])
+            col_r.write(f"**{plat}** from {effective:%d-%b-%Y}: {comm}% comm | ₹{fee} fee")
+            if col_b.button("🗑️", key=f"del_rate_{plat}_{effective:%Y%m%d}"):
+                core.delete_platform_rate(db, selected_outlet, plat, effective)
+                st.rerun()
+
+    with st.expander("🔁 Recalculate Settlements"):
+        st.caption(f"Re-price commission, delivery and net profit of every sale at {selected_outlet} "
+                   "with the current rate table (e.g. for sales recorded before rates were tracked).")
+        if st.button("Recalculate All Sales"):
+            with diagnostics.section("resettle"):
+                repriced = core.resettle(db, selected_outlet)
+            st.success(f"Re-priced {repriced} sale(s).")
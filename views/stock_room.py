@@ -0,0 +1,85 @@
+"""Stock Room: purchases, stock on hand and reorder suggestions."""
+import streamlit as st
+
+from erp import core, diagnostics
+from erp.forecast import COVER_DAYS, LEAD_TIME_DAYS, WINDOW_DAYS
+from widgets import paged_grid
+
+
+def render(db, selected_outlet):
+    st.title(f"📦 Stock Room: {selected_outlet}")
+    
+    # 1. Add New Item Form
+    with st.expander("➕ Add New Inventory Item", expanded=False):
+        with st.form("add_inventory_form", clear_on_submit=True):
+            c1, c2, c3, c4 = st.columns(4)
+            item_name = c1.text_input("Item Name (e.g., Flour, Oil)")
+            qty = c2.number_input("Quantity", min_value=0.0, step=0.1)
+            unit = c3.selectbox("Unit", ["kg", "ltr", "gm", "ml", "pcs", "box"])
+            cost = c4.number_input("Total Cost (₹)", min_value=0.0, step=1.0)
+            
+            if st.form_submit_button("Add to Stock"):
+                if item_name:
+                    core.add_stock(db, selected_outlet, item_name, qty, unit, cost)
+                    st.success(f"Added {item_name} to inventory!")
+                    st.rerun()
+                else:
+                    st.error("Please enter an item name.")
+
+    st.divider()
+
+    # 2. Display and Manage Inventory
+    st.subheader("📋 Current Stock Levels")
+    
+    # Only the visible page is read; an empty stock room has no rows to page
+    shown = paged_grid(
+        db, "inventory", selected_outlet, ["Item", "Qty", "Unit", "Total_Cost"],
+        key="inventory", sort_by="Item", descending=False, label="stock items",
+        column_config={
+            "Item": "Item Name",
+            "Qty": st.column_config.NumberColumn("Quantity"),
+            "Total_Cost": st.column_config.NumberColumn("Total Cost", format="₹%.2f"),
+        },
+    )
+    if not shown:
+        st.info("Your stock room is empty. Add items above to get started.")
+
+    # 3. Burn Rate & Reorder Suggestions (driven by recent sales × recipes)
+    st.subheader("📈 Cover & Reorder")
+    f1, f2, f3 = st.columns(3)
+    window = f1.number_input("Average Over (days)", min_value=1, max_value=365, value=WINDOW_DAYS, step=1)
+    lead_time = f2.number_input("Supplier Lead Time (days)", min_value=0, max_value=60, value=LEAD_TIME_DAYS, step=1)
+    cover = f3.number_input("Order For (days)", min_value=1, max_value=90, value=COVER_DAYS, step=1)
+    with diagnostics.section("stock forecast"):
+        outlook = db.stock_forecast(selected_outlet, window=window, lead_time=lead_time, cover=cover)
+
+    if outlook.empty:
+        st.info("No stock or recipes to forecast yet.")
+    else:
+        running_out = outlook[outlook["Days_Of_Cover"] <= lead_time]
+        if not running_out.empty:
+            st.warning(f"⚠️ Will run out before a new order arrives: {', '.join(running_out['Item'].tolist())}")
+        st.dataframe(
+            outlook, width="stretch", hide_index=True,
+            column_config={
+                "On_Hand": st.column_config.NumberColumn("On Hand", format="%.2f"),
+                "Burn_Per_Day": st.column_config.NumberColumn("Use / Day", format="%.2f"),
+                "Days_Of_Cover": st.column_config.NumberColumn("Days of Cover", format="%.1f"),
+                "Reorder_Point": st.column_config.NumberColumn("Reorder At", format="%.2f"),
+                "Suggested_Qty": st.column_config.NumberColumn("Order Qty", format="%.2f"),
+                "Est_Cost": st.column_config.NumberColumn("Est. Cost", format="₹%.2f"),
+            },
+        )
+        order = outlook[outlook["Suggested_Qty"] > 0]
+        if order.empty:
+            st.success("✅ Nothing needs reordering yet.")
+        else:
+            st.metric("Suggested Purchase", f"₹{order['Est_Cost'].sum():,.2f}", f"{len(order)} item(s)",
+                      delta_color="off")
+            st.download_button(
+                "📥 Download Purchase List",
+                order[["Item", "Unit", "Suggested_Qty", "Est_Cost"]].to_csv(index=False).encode("utf-8"),
+                f"Purchase_List_{selected_outlet}.csv",
+                "text/csv",
+                key="download-purchase",
+            )
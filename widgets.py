@@ -0,0 +1,101 @@
+"""Reusable Streamlit widgets for the Cloud K pages."""
+import math
+
+import pandas as pd
+import streamlit as st
+
+from erp import diagnostics
+
+PAGE_SIZES = [25, 50, 100, 250]
+RANGES = ["This Month", "Last 3 Months", "This Year", "All Time", "Custom"]
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _memo(key, revision, _build):
+    return _build()
+
+
+def memoized(db, key, build):
+    """``build()``, reused by every session until the data changes.
+
+    Results are keyed by ``key`` plus :meth:`~erp.storage.Storage.revision`,
+    so any committed write (from this process or another) makes the next
+    call build afresh. The result is shared, not copied: callers must not
+    mutate it.
+    """
+    return _memo((id(db),) + tuple(key), db.revision(), build)
+
+
+def date_range(key, default="Last 3 Months"):
+    """Preset or custom date window as inclusive ``(start, end)`` Timestamps.
+
+    Either bound is ``None`` when open ("All Time" has neither, the presets
+    run to the latest entry), so queries only read the months in the window.
+    """
+    c1, c2 = st.columns([3, 2])
+    preset = c1.radio("Date range", RANGES, index=RANGES.index(default), horizontal=True, key=f"{key}_range")
+    today = pd.Timestamp.today().normalize()
+    if preset == "This Month":
+        return today.replace(day=1), None
+    if preset == "Last 3 Months":
+        return (today.replace(day=1) - pd.DateOffset(months=2)), None
+    if preset == "This Year":
+        return today.replace(month=1, day=1), None
+    if preset == "All Time":
+        return None, None
+    picked = c2.date_input("From – to", (today - pd.Timedelta(days=30), today), key=f"{key}_dates")
+    # While picking, the widget briefly holds only the first date
+    start, end = (tuple(picked) + (None, None))[:2]
+    return (None if start is None else pd.Timestamp(start)), (None if end is None else pd.Timestamp(end))
+
+
+def paged_grid(db, table, outlet, columns, key, sort_by, descending=True, column_config=None, label="rows",
+               start=None, end=None):
+    """Sortable, paginated grid of one outlet's rows with multi-row delete.
+
+    Only the requested page is sliced out of storage and handed to
+    ``st.dataframe``, so the render cost depends on the page size and not
+    on how many rows the outlet has. ``start``/``end`` limit it to a date
+    window. Returns the number of rows shown across all pages.
+    """
+    c1, c2, c3 = st.columns([3, 2, 2])
+    sort_col = c1.selectbox("Sort by", columns, index=columns.index(sort_by), key=f"{key}_sort")
+    order = c2.radio("Order", ["Newest / Z-A", "Oldest / A-Z"], index=0 if descending else 1,
+                     horizontal=True, key=f"{key}_order")
+    page_size = c3.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+
+    def fetch(page_no):
+        with diagnostics.section(f"{key} grid/fetch"):
+            return db.page(table, outlet, sort_col, descending=order.startswith("Newest"),
+                           offset=(page_no - 1) * page_size, limit=page_size, start=start, end=end)
+
+    # The page selector is drawn below the grid, so read its value from the previous run
+    page_no = st.session_state.get(f"{key}_page", 1)
+    rows, total = fetch(page_no)
+    if total == 0:
+        return 0
+    pages = max(1, math.ceil(total / page_size))
+    if page_no > pages:
+        # Rows were deleted or the page size grew; fall back to the last page
+        page_no = st.session_state[f"{key}_page"] = pages
+        rows, total = fetch(page_no)
+
+    with diagnostics.section(f"{key} grid/render"):
+        event = st.dataframe(
+            rows[columns], hide_index=True, width="stretch",
+            column_config=column_config, on_select="rerun", selection_mode="multi-row",
+            # Keyed by the view so a selection never carries over to a different page
+            key=f"{key}_grid_{sort_col}_{order}_{page_size}_{page_no}_{start}_{end}",
+        )
+
+    p1, p2, p3 = st.columns([2, 3, 2])
+    p1.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    first = (page_no - 1) * page_size + 1
+    p2.caption(f"Showing {first}–{first + len(rows) - 1} of {total} {label} · page {page_no} of {pages}")
+
+    selected = rows["id"].iloc[event.selection.rows].tolist()
+    if selected and p3.button(f"🗑️ Delete {len(selected)} selected", key=f"{key}_delete"):
+        db.delete(table, selected)
+        st.toast(f"Deleted {len(selected)} {label}")
+        st.rerun()
+    return total